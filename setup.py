@@ -21,11 +21,12 @@ setup(
     packages=find_packages("src"),
     package_dir={"": "src"},
     package_data={"rxn-ca": ["py.typed"]},
-    scripts=["bin/react", "bin/enumerate", "bin/build-library"],
+    scripts=["bin/react", "bin/enumerate", "bin/build-library", "bin/convert-library"],
     zip_safe=False,
     include_package_data=True,
     install_requires=[
         'numpy >= 1.21.5',
+        'scipy',
         'matplotlib >= 3.5.1',
         'tqdm >= 4.63.0',
         'reaction-network',
@@ -1,2 +1,3 @@
 from .reaction_step_analyzer import ReactionStepAnalyzer
 from .bulk_reaction_analyzer import BulkReactionAnalyzer
+from .equilibrium_detector import EquilibriumDetector
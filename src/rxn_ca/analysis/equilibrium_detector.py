@@ -0,0 +1,91 @@
+from typing import Dict
+
+from pylattica.core import SimulationResult
+from pylattica.core.constants import GENERAL
+
+from ..core.constants import REACTION_CHOSEN
+from ..phases.solid_phase_set import SolidPhaseSet
+from .reaction_step_analyzer import ReactionStepAnalyzer
+
+
+class EquilibriumDetector():
+    """Decides whether a simulation held at a constant temperature has stopped
+    evolving. The simulation is fed to the detector in pieces of any length, and
+    is judged once per window of sweeps. A window is considered to be at equilibrium
+    if no reaction was chosen during it, or, if a tolerance is provided, if no phase
+    volume fraction changed by more than that tolerance since the end of the
+    previous window.
+    """
+
+    def __init__(self, phase_set: SolidPhaseSet, window: int = 5, volume_tolerance: float = None):
+        """Initializes an EquilibriumDetector
+
+        Args:
+            phase_set (SolidPhaseSet): The phases in the simulation
+            window (int, optional): The number of sweeps in each window. Defaults to 5.
+            volume_tolerance (float, optional): The largest change in any phase volume
+            fraction over a window which is still considered to be at equilibrium. If
+            None, only the reactions chosen are considered. Defaults to None.
+        """
+        self.analyzer = ReactionStepAnalyzer(phase_set)
+        self.window = window
+        self.volume_tolerance = volume_tolerance
+        self.reset()
+
+    def reset(self) -> None:
+        """Forgets everything seen so far, for instance when the temperature changes."""
+        self._steps_seen: int = 0
+        self._any_reactions: bool = False
+        self._prev_fractions: Dict[str, float] = None
+
+    def steps_until_check(self, num_sites: int) -> int:
+        """Returns the number of steps remaining in the current window
+
+        Args:
+            num_sites (int): The number of sites in the simulation
+
+        Returns:
+            int:
+        """
+        return self.window * num_sites - self._steps_seen
+
+    def update(self, result: SimulationResult) -> bool:
+        """Adds the steps of a result to the current window, and judges the window
+        if it is complete.
+
+        Args:
+            result (SimulationResult): The result of running the next piece of the simulation
+
+        Returns:
+            bool: Whether the simulation has reached equilibrium
+        """
+        self._steps_seen += len(result._diffs)
+        self._any_reactions = self._any_reactions or any(
+            diff.get(GENERAL, {}).get(REACTION_CHOSEN) is not None for diff in result._diffs
+        )
+
+        if self.steps_until_check(result.output.size) > 0:
+            return False
+
+        any_reactions = self._any_reactions
+        self._steps_seen = 0
+        self._any_reactions = False
+
+        if self.volume_tolerance is None:
+            return not any_reactions
+
+        fractions = self.analyzer.set_step_group(result.output).get_all_volume_fractions()
+        prev_fractions = self._prev_fractions
+        self._prev_fractions = fractions
+
+        if not any_reactions:
+            return True
+
+        if prev_fractions is None:
+            return False
+
+        max_change = max(
+            abs(fractions.get(phase, 0) - prev_fractions.get(phase, 0))
+            for phase in set(fractions) | set(prev_fractions)
+        )
+        return max_change <= self.volume_tolerance
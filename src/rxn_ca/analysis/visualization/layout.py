@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import numpy as np
 import plotly.graph_objects as go
 from plotly.graph_objs.layout import YAxis,XAxis
 
@@ -19,6 +20,17 @@ class RxnCALayout():
         """
         self.heating_schedule = heating_sched
         self.step_size = step_size
+
+    def get_temperatures(self, step_idxs) -> np.ndarray:
+        """Returns the temperature at each of the given simulation steps
+
+        Args:
+            step_idxs (array-like): Indices of steps in the simulation result
+
+        Returns:
+            np.ndarray:
+        """
+        return self.heating_schedule.temps_at(np.asarray(step_idxs) / self.step_size)
     
     def get_layout(self, y_label, title, **layout_kwargs):
         default_kwargs = dict(title={
@@ -43,6 +43,7 @@ class ReactionPlotter():
         self.rip_config = rip_config
         self.phase_colors = phase_colors
         self.focus_phases = focus_phases
+        self._step_temperatures = None
 
     def get_heating_trace(self):
         heating_xs, heating_ys = self.bulk_analyzer.heating_schedule.get_xy_for_plot(self.bulk_analyzer.result_length)
@@ -55,6 +56,11 @@ class ReactionPlotter():
             line = dict(color='crimson', width=3, dash='dash')
         )
     
+    def _get_step_temperatures(self):
+        if self._step_temperatures is None:
+            self._step_temperatures = self.layout.get_temperatures(self.bulk_analyzer.loaded_step_idxs)
+        return self._step_temperatures
+
     def _get_plotly_trace(self):
         return go.Scatter(
             mode='lines',
@@ -71,6 +77,12 @@ class ReactionPlotter():
         if self.phase_colors is not None:
             default_trace.line.update(color=self.phase_colors.get(t.name))
 
+        if self.include_heating_trace:
+            default_trace.update(
+                customdata=self._get_step_temperatures(),
+                hovertemplate="%{y}<br>%{customdata} K",
+            )
+
         return default_trace
     
     def _get_rip_trace(self, pt: PhaseTrace, plotly_trace: go.Scatter):
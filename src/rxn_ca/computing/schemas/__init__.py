@@ -1,2 +1,3 @@
 from .ca_result_schema import RxnCAResultDoc
 from .base_reaction_inputs import BaseReactionInputs
+from .ca_result_schema import RxnCAResultManifest, ResultShard
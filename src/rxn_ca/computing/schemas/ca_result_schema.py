@@ -1,11 +1,18 @@
-from typing import List
+import dataclasses
+import os
+from typing import Dict, List
 
 from ...core.recipe import ReactionRecipe
-from ...core.constants import REACTION_CHOSEN
+from ...core.constants import REACTION_CHOSEN, VOLUME
 from ...core.reaction_result import ReactionResult
 from ...reactions.reaction_library import ReactionLibrary
 from ...phases.solid_phase_set import SolidPhaseSet
+from pylattica.core import Simulation, SimulationState
+from pylattica.core.periodic_structure import PeriodicStructure
 from pylattica.core.simulation_result import compress_result
+from pylattica.core.constants import SITES, GENERAL
+from pylattica.discrete.state_constants import DISCRETE_OCCUPANCY
+from monty.json import MSONable
 
 from .base_schema import BaseSchema
 from dataclasses import dataclass
@@ -18,6 +25,135 @@ class RxnCAResultDoc(BaseSchema):
     reaction_library: ReactionLibrary = None
     phases: SolidPhaseSet = None
     metadata: dict = None
+    library_fingerprint: str = None
+    initial_simulation: Simulation = None
+    seeds: List[dict] = None
+
+    def __post_init__(self):
+        self.initial_simulation = _decode_simulation(self.initial_simulation)
+
+    @property
+    def is_replayable(self) -> bool:
+        return self.seeds is not None
+
+def _decode_simulation(simulation):
+    # Simulations serialize without class information, so they come back as
+    # dicts, though the state and structure inside may already be decoded
+    if isinstance(simulation, dict):
+        state = simulation["state"]
+        structure = simulation["structure"]
+        if isinstance(state, dict):
+            state = SimulationState.from_dict(state)
+        if isinstance(structure, dict):
+            structure = PeriodicStructure.from_dict(structure)
+        simulation = Simulation(state, structure)
+    return simulation
+
+@dataclass
+class ResultShard(MSONable):
+    """A handle to a single realization written to its own file, with a
+    summary of the realization that can be read without loading it.
+    """
+
+    fpath: str
+    num_steps: int
+    num_reactions: int
+    final_phase_volumes: Dict[str, float]
+
+    def load(self) -> ReactionResult:
+        return ReactionResult.from_file(self.fpath)
+
+def write_shard(result: ReactionResult, fpath: str) -> ResultShard:
+    """Writes a realization to a file and summarizes it
+
+    Args:
+        result (ReactionResult): The realization
+        fpath (str): The file to write it to
+
+    Returns:
+        ResultShard: A handle to the written realization
+    """
+    result.to_file(fpath)
+
+    num_reactions = 0
+    for diff in result._diffs:
+        if diff.get(GENERAL, {}).get(REACTION_CHOSEN) is not None:
+            num_reactions += 1
+
+    final_phase_volumes = {}
+    for site_state in result.last_step.all_site_states():
+        phase = site_state[DISCRETE_OCCUPANCY]
+        final_phase_volumes[phase] = final_phase_volumes.get(phase, 0) + site_state[VOLUME]
+
+    return ResultShard(
+        fpath=os.path.abspath(fpath),
+        num_steps=len(result),
+        num_reactions=num_reactions,
+        final_phase_volumes=final_phase_volumes,
+    )
+
+@dataclass
+class RxnCAResultManifest(BaseSchema):
+    """The counterpart of an RxnCAResultDoc whose realizations were written to
+    separate shard files by the workers that ran them. The manifest holds everything
+    but the realizations themselves, along with a handle to each shard.
+
+    Shard paths are stored relative to the manifest when it is written to a file, so
+    a manifest and its shards can be moved together.
+    """
+
+    recipe: ReactionRecipe
+    shards: List[ResultShard]
+    reaction_library: ReactionLibrary = None
+    phases: SolidPhaseSet = None
+    metadata: dict = None
+    library_fingerprint: str = None
+    initial_simulation: Simulation = None
+    seeds: List[dict] = None
+
+    @classmethod
+    def from_file(cls, fname):
+        manifest = super().from_file(fname)
+        base_dir = os.path.dirname(os.path.abspath(fname))
+        for shard in manifest.shards:
+            shard.fpath = os.path.join(base_dir, shard.fpath)
+        return manifest
+
+    def __post_init__(self):
+        self.initial_simulation = _decode_simulation(self.initial_simulation)
+
+    def to_file(self, fname):
+        base_dir = os.path.dirname(os.path.abspath(fname))
+        relative = dataclasses.replace(self, shards=[
+            dataclasses.replace(shard, fpath=os.path.relpath(shard.fpath, base_dir))
+            for shard in self.shards
+        ])
+        BaseSchema.to_file(relative, fname)
+
+    def load_results(self) -> List[ReactionResult]:
+        return [shard.load() for shard in self.shards]
+
+    def to_result_doc(self) -> RxnCAResultDoc:
+        """Loads every shard and assembles the full result document
+
+        Returns:
+            RxnCAResultDoc:
+        """
+        return RxnCAResultDoc(recipe=self.recipe,
+                              results=self.load_results(),
+                              reaction_library=self.reaction_library,
+                              phases=self.phases,
+                              metadata=self.metadata,
+                              library_fingerprint=self.library_fingerprint,
+                              initial_simulation=self.initial_simulation,
+                              seeds=self.seeds)
+
+def get_metadata_from_shards(shards: List[ResultShard]):
+    return {
+        "num_steps": [s.num_steps for s in shards],
+        "num_reactions": [s.num_reactions for s in shards],
+        "final_phase_volumes": [s.final_phase_volumes for s in shards],
+    }
 
 def compress_doc(result_doc: RxnCAResultDoc, num_steps=100):
     results = result_doc.results
@@ -26,7 +162,34 @@ def compress_doc(result_doc: RxnCAResultDoc, num_steps=100):
                           results=compressed,
                           phases=result_doc.phases,
                           reaction_library=result_doc.reaction_library,
-                          metadata=result_doc.metadata)
+                          metadata=result_doc.metadata,
+                          library_fingerprint=result_doc.library_fingerprint,
+                          initial_simulation=result_doc.initial_simulation,
+                          seeds=result_doc.seeds)
+
+def replayable_doc(result_doc: RxnCAResultDoc, keep_library: bool = False):
+    """Returns a copy of the result document without the trajectories, keeping only what
+    is needed to regenerate them with rxn_ca.utilities.replay.
+
+    Args:
+        result_doc (RxnCAResultDoc): A document produced by run_single_sim or run_sim_parallel
+        keep_library (bool, optional): Whether to keep the reaction library in the document.
+        If False, the same library must be supplied when replaying. Defaults to False.
+
+    Returns:
+        RxnCAResultDoc:
+    """
+    if not result_doc.is_replayable:
+        raise ValueError("This result document does not record the seeds needed to replay it")
+
+    return RxnCAResultDoc(recipe=result_doc.recipe,
+                          results=[],
+                          phases=result_doc.phases,
+                          reaction_library=result_doc.reaction_library if keep_library else None,
+                          metadata=result_doc.metadata,
+                          library_fingerprint=result_doc.library_fingerprint,
+                          initial_simulation=result_doc.initial_simulation,
+                          seeds=result_doc.seeds)
 
 def get_metadata_from_results(results: List[ReactionResult]):
     return {
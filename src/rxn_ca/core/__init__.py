@@ -1,4 +1,12 @@
 from .reaction_controller import ReactionController
 from .reaction_result import ReactionResult
 from .reaction_simulation import ReactionSimulation
-from .heating import HeatingSchedule
\ No newline at end of file
+from .heating import HeatingSchedule
+from .array_state import ArraySimulationState
+from .neighbor_arrays import NeighborArrays
+from .stencil_neighborhood import StencilNeighborhood
+from .kmc_runner import RejectionFreeRunner
+from .batch_runner import ColoredBatchRunner
+from .frontier_runner import FrontierRunner
+from .ensemble_runner import EnsembleRunner
+from .domain_runner import DomainDecompositionRunner
@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+import copy
+from typing import Dict, List
+
+import numpy as np
+
+from pylattica.core.simulation_state import SimulationState
+from pylattica.core.constants import GENERAL, SITES, SITE_ID
+from pylattica.discrete.state_constants import DISCRETE_OCCUPANCY
+
+from ..phases.solid_phase_set import SolidPhaseSet
+from .constants import VOLUME
+
+OCCUPANCY_DTYPE = np.int16
+VOLUME_DTYPE = np.float32
+
+
+class ArraySimulationState():
+    """An array backed alternative to SimulationState for reaction simulations.
+    The phase occupying each site is stored as an integer phase ID, and the volume
+    of each site is stored as a float32, so each site costs a few bytes rather
+    than a dictionary. The general state (temperature, evolved gases, melted amounts)
+    is stored as a plain dictionary alongside the arrays.
+
+    Site IDs are expected to run contiguously from zero, as they do for the square
+    grid structures used by rxn-ca. The methods used by the calculators, controllers and
+    analyzers to read and write SimulationStates are mirrored here, and the state can be
+    converted to and from a SimulationState so that results can be stored as usual.
+    """
+
+    @classmethod
+    def from_simulation_state(cls, state: SimulationState, phases: List[str] = None) -> ArraySimulationState:
+        """Builds an ArraySimulationState from a SimulationState.
+
+        Args:
+            state (SimulationState): The state to convert
+            phases (List[str], optional): An ordering of phases to use for the phase IDs,
+            for instance the phases of a CompiledReactionSet. Phases present in the
+            state but missing from this list are appended to it.
+
+        Returns:
+            ArraySimulationState:
+        """
+        if phases is None:
+            phases = [SolidPhaseSet.FREE_SPACE]
+
+        site_ids = state.site_ids()
+        num_sites = max(site_ids) + 1 if len(site_ids) > 0 else 0
+
+        array_state = cls(
+            np.zeros(num_sites, dtype=OCCUPANCY_DTYPE),
+            np.zeros(num_sites, dtype=VOLUME_DTYPE),
+            phases=phases,
+            general_state=state.get_general_state(),
+        )
+
+        for site_id in site_ids:
+            array_state.set_site_state(site_id, state.get_site_state(site_id))
+
+        return array_state
+
+    @classmethod
+    def from_dict(cls, state_dict: Dict) -> ArraySimulationState:
+        return cls(
+            np.array(state_dict["occupancy"], dtype=OCCUPANCY_DTYPE),
+            np.array(state_dict["volume"], dtype=VOLUME_DTYPE),
+            phases=state_dict["phases"],
+            general_state=state_dict["general"],
+        )
+
+    def __init__(self,
+                 occupancy: np.ndarray,
+                 volume: np.ndarray,
+                 phases: List[str],
+                 general_state: Dict = None):
+        """Initializes an ArraySimulationState
+
+        Args:
+            occupancy (np.ndarray): The phase ID of every site
+            volume (np.ndarray): The volume of every site
+            phases (List[str]): The phases, indexed by phase ID
+            general_state (Dict, optional): The general state of the simulation
+        """
+        self.occupancy: np.ndarray = occupancy
+        self.volume: np.ndarray = volume
+        self.phases: List[str] = list(phases)
+        self.phase_ids: Dict[str, int] = { p: idx for idx, p in enumerate(self.phases) }
+        self._general: Dict = copy.deepcopy(general_state) if general_state is not None else {}
+
+    def phase_id(self, phase: str) -> int:
+        """Returns the ID used for the supplied phase, registering the phase
+        if it has not been seen before.
+
+        Args:
+            phase (str): The phase of interest
+
+        Returns:
+            int:
+        """
+        phase_id = self.phase_ids.get(phase)
+        if phase_id is None:
+            phase_id = len(self.phases)
+            if phase_id > np.iinfo(OCCUPANCY_DTYPE).max:
+                raise ValueError(f"Too many phases to store in an ArraySimulationState: {phase}")
+            self.phases.append(phase)
+            self.phase_ids[phase] = phase_id
+        return phase_id
+
+    @property
+    def size(self) -> int:
+        return len(self.occupancy)
+
+    def site_ids(self) -> List[int]:
+        return list(range(self.size))
+
+    def get_site_state(self, site_id: int) -> Dict:
+        return {
+            SITE_ID: site_id,
+            DISCRETE_OCCUPANCY: self.phases[self.occupancy[site_id]],
+            VOLUME: float(self.volume[site_id]),
+        }
+
+    def all_site_states(self) -> List[Dict]:
+        phases = self.phases
+        return [
+            {
+                SITE_ID: site_id,
+                DISCRETE_OCCUPANCY: phases[occ],
+                VOLUME: vol,
+            }
+            for site_id, (occ, vol) in enumerate(zip(self.occupancy.tolist(), self.volume.tolist()))
+        ]
+
+    def set_site_state(self, site_id: int, updates: Dict) -> None:
+        if DISCRETE_OCCUPANCY in updates:
+            self.occupancy[site_id] = self.phase_id(updates[DISCRETE_OCCUPANCY])
+        if VOLUME in updates:
+            self.volume[site_id] = updates[VOLUME]
+
+    def get_general_state(self, key: str = None, default=None) -> Dict:
+        if key is None:
+            return copy.deepcopy(self._general)
+        else:
+            return copy.deepcopy(self._general.get(key, default))
+
+    def set_general_state(self, updates: Dict) -> None:
+        self._general = {**self._general, **copy.deepcopy(updates)}
+
+    def batch_update(self, update_batch: Dict) -> None:
+        """Applies a batch of updates formatted in the same way as those
+        accepted by SimulationState.batch_update
+
+        Args:
+            update_batch (Dict): The updates to apply
+        """
+        if GENERAL in update_batch or SITES in update_batch:
+            for site_id, updates in update_batch.get(SITES, {}).items():
+                self.set_site_state(site_id, updates)
+
+            self.set_general_state(update_batch.get(GENERAL, {}))
+        else:
+            for site_id, updates in update_batch.items():
+                self.set_site_state(site_id, updates)
+
+    def phase_volumes(self) -> Dict[str, float]:
+        """Sums the volume of every phase present on the lattice,
+        excluding free space.
+
+        Returns:
+            Dict[str, float]: A map of phase to total volume
+        """
+        totals = np.bincount(self.occupancy, weights=self.volume, minlength=len(self.phases))
+        counts = np.bincount(self.occupancy, minlength=len(self.phases))
+        return {
+            phase: float(totals[idx])
+            for idx, phase in enumerate(self.phases)
+            if counts[idx] > 0 and phase != SolidPhaseSet.FREE_SPACE
+        }
+
+    def copy(self) -> ArraySimulationState:
+        return ArraySimulationState(
+            self.occupancy.copy(),
+            self.volume.copy(),
+            phases=self.phases,
+            general_state=self._general,
+        )
+
+    def to_simulation_state(self) -> SimulationState:
+        """Converts this state back into a dictionary backed SimulationState
+
+        Returns:
+            SimulationState:
+        """
+        return SimulationState({
+            SITES: { site_state[SITE_ID]: site_state for site_state in self.all_site_states() },
+            GENERAL: self._general,
+        })
+
+    def as_dict(self) -> Dict:
+        return {
+            "@module": self.__class__.__module__,
+            "@class": self.__class__.__name__,
+            "occupancy": self.occupancy.tolist(),
+            "volume": self.volume.tolist(),
+            "phases": self.phases,
+            "general": self._general,
+        }
+
+    def __eq__(self, other: ArraySimulationState) -> bool:
+        return self.to_simulation_state() == other.to_simulation_state()
@@ -0,0 +1,77 @@
+import warnings
+
+from tqdm import tqdm
+
+from pylattica.core import AsynchronousRunner
+from pylattica.core.basic_controller import BasicController
+from pylattica.core.simulation_result import SimulationResult
+from pylattica.core.simulation_state import SimulationState
+from pylattica.core.runner.base_runner import Runner
+from pylattica.core.runner.common import merge_updates
+
+from .array_state import ArraySimulationState
+
+
+class ColoredBatchRunner(Runner):
+    """Runs a simulation by updating groups of non-interacting sites together.
+
+    The controller partitions the lattice into colors such that no two sites of
+    the same color share a neighbor. Each sweep visits the colors in a random
+    order, and the controller selects interactions for every site in a color at
+    once with NumPy. Because the sites in a color do not interact, the result is
+    the same as visiting them one at a time.
+
+    Unlike the AsynchronousRunner, which draws sites with replacement, every site
+    is visited exactly once per sweep. Each visit is still recorded as one step,
+    so a sweep occupies as many steps as there are sites.
+
+    Batching only pays off for small neighborhoods, like that of the
+    LiquidSwapController. If the controller returns no colors because they would
+    hold too few sites (see can_batch), a warning is given and the run falls back
+    to the AsynchronousRunner.
+
+    The controller must implement get_site_colors and get_batch_state_updates in
+    addition to the usual BasicController methods, and the colors are ordered
+    using its RandomStream.
+    """
+
+    def _run(self,
+             initial_state: SimulationState,
+             result: SimulationResult,
+             controller: BasicController,
+             num_steps: int,
+             verbose: bool = False) -> SimulationResult:
+        state = ArraySimulationState.from_simulation_state(result.live_state)
+        rng = controller.rng
+        colors = controller.get_site_colors(state.site_ids())
+        if len(colors) == 0:
+            warnings.warn(
+                "The neighborhood is too large to color the sites into batches of a worthwhile "
+                "size; running with the AsynchronousRunner instead of the ColoredBatchRunner"
+            )
+            return AsynchronousRunner()._run(initial_state, result, controller, num_steps, verbose=verbose)
+
+        visited = 0
+        with tqdm(total=num_steps, disable=(not verbose)) as progress:
+            while visited < num_steps:
+                for color_idx in rng.generator.permutation(len(colors)):
+                    site_ids = colors[color_idx]
+                    remaining = num_steps - visited
+
+                    if remaining <= 0:
+                        break
+
+                    if len(site_ids) > remaining:
+                        site_ids = rng.generator.choice(site_ids, remaining, replace=False)
+
+                    # The updates are applied as they are produced, so that later
+                    # sites in the color see the gases evolved by earlier ones
+                    for site_id, state_updates in controller.get_batch_state_updates(site_ids, state):
+                        state_updates = merge_updates(state_updates, site_id=site_id)
+                        state.batch_update(state_updates)
+                        result.add_step(state_updates)
+
+                    visited += len(site_ids)
+                    progress.update(len(site_ids))
+
+        return result
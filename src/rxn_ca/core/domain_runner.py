@@ -0,0 +1,309 @@
+import multiprocessing as mp
+import os
+import warnings
+from multiprocessing import shared_memory
+from typing import Dict, List, Tuple
+
+import numpy as np
+from tqdm import tqdm
+
+from pylattica.core import AsynchronousRunner
+from pylattica.core.basic_controller import BasicController
+from pylattica.core.constants import GENERAL, SITES
+from pylattica.core.periodic_structure import PeriodicStructure
+from pylattica.core.simulation_result import SimulationResult
+from pylattica.core.simulation_state import SimulationState
+from pylattica.core.runner.base_runner import Runner
+from pylattica.core.runner.common import merge_updates
+from pylattica.discrete.state_constants import DISCRETE_OCCUPANCY
+
+from .array_state import ArraySimulationState, OCCUPANCY_DTYPE, VOLUME_DTYPE
+from .constants import GASES_EVOLVED, GASES_CONSUMED, REACTION_CHOSEN, VOLUME
+from .idle_steps import add_idle_steps
+from .rng import RandomStream
+
+# General state entries which accumulate amounts, and so must be summed
+# over the workers rather than taken from whichever worker wrote last
+ADDITIVE_GENERAL_KEYS = [GASES_EVOLVED, GASES_CONSUMED]
+
+# Seconds to wait for a worker to exit after it is told to stop before it is terminated
+WORKER_JOIN_TIMEOUT = 10
+
+
+def grid_slabs(structure: PeriodicStructure, neighbors, max_slabs: int) -> List[Tuple[int, int]]:
+    """Splits a periodic grid into an even number of slabs along the axis whose
+    sites have contiguous IDs, so that each slab is a range of site IDs. Every slab
+    is at least twice as thick as the reach of the neighborhood along that axis, so
+    updates in two slabs of the same parity can never read or write the same site.
+
+    Args:
+        structure (PeriodicStructure): A square or cubic grid structure
+        neighbors (Union[NeighborArrays, StencilNeighborhood]): The neighborhood used by the update rule
+        max_slabs (int): The most slabs to split the grid into
+
+    Returns:
+        List[Tuple[int, int]]: The first and last (exclusive) site ID of each slab,
+        or an empty list if the grid cannot be split into at least two pairs of slabs
+    """
+    dim = structure.dim
+    num_sites = len(structure.site_ids)
+    size = int(round(num_sites ** (1 / dim)))
+    if size ** dim != num_sites:
+        return []
+
+    stride = size ** (dim - 1)
+    strides = []
+    for axis in range(dim):
+        unit = [0] * dim
+        unit[axis] = 1
+        strides.append(structure.id_at(tuple(unit)))
+
+    if stride not in strides:
+        return []
+
+    nb_ids, _, mask = neighbors.padded()
+    coords = np.arange(num_sites) // stride
+    offsets = np.abs(coords[nb_ids] - coords[:, None])
+    offsets = np.minimum(offsets, size - offsets)
+    reach = int(offsets[mask].max()) if mask.any() else 0
+
+    thickness = max(2 * reach, 1)
+    num_pairs = min(max_slabs // 2, size // (2 * thickness))
+    if num_pairs < 2:
+        return []
+
+    bounds = np.linspace(0, size, 2 * num_pairs + 1).astype(int)
+    return [(int(start) * stride, int(stop) * stride) for start, stop in zip(bounds[:-1], bounds[1:])]
+
+
+def _serve(conn, controller: BasicController, rng: RandomStream, occupancy: np.ndarray, volume: np.ndarray, phases: List[str]):
+    """The loop run by each worker process. Each task names a slab, the number
+    of visits to make to random sites within it, and the general state to start
+    from. The sites are updated in shared memory, so the worker only replies with
+    the last reaction it chose, if any, and its final general state.
+    """
+    controller.set_rng(rng)
+    while True:
+        task = conn.recv()
+        if task is None:
+            break
+
+        start, stop, num_visits, general_state = task
+        try:
+            # A new state object is used for every task so that the calculator
+            # does not reuse interactions cached before the other slabs changed
+            state = ArraySimulationState(occupancy, volume, phases, general_state)
+            last_reaction = None
+            for _ in range(num_visits):
+                site_id = start + rng.randrange(stop - start)
+                state_updates = merge_updates(controller.get_state_update(site_id, state), site_id=site_id)
+                state.batch_update(state_updates)
+
+                reaction = state_updates.get(GENERAL, {}).get(REACTION_CHOSEN)
+                if reaction is not None:
+                    last_reaction = reaction
+
+            if len(state.phases) != len(phases):
+                raise RuntimeError("A worker encountered a phase which was not registered before the run")
+
+            conn.send((last_reaction, state.get_general_state()))
+        except Exception as e:
+            conn.send(e)
+
+
+class DomainDecompositionRunner(Runner):
+    """Runs a single simulation on several cores by splitting the lattice into slabs.
+
+    The occupancy and volume of every site are kept in shared memory. The grid is
+    split into an even number of slabs, each at least twice as thick as the reach of
+    the neighborhood, and each worker process owns one pair of neighboring slabs.
+    Every sweep is made of two sub-sweeps: first each worker makes random visits to
+    sites in the first slab of its pair, then in the second. A worker reads and
+    writes a halo as wide as the neighborhood around its slab directly in shared
+    memory, and since slabs of the same parity are separated by a full slab, no two
+    workers ever touch the same site during a sub-sweep.
+
+    The workers do not send their updates back. Instead, each sub-sweep is recorded
+    in bulk from the sites whose occupancy or volume changed in shared memory: as
+    idle steps (see add_idle_steps) for all but the last of its visits, followed by a
+    single step with every change. The result therefore has one step per visit and
+    the state at the end of every sub-sweep is exact, but the states in between are
+    not recorded, and the REACTION_CHOSEN of a sub-sweep is only the last reaction
+    chosen during it, if any. Evolved and consumed gases are summed over the workers.
+
+    Every slab must be at least twice as thick as the reach of the neighborhood, and
+    the grid must split into at least four slabs, so its side must be at least eight
+    times that reach: 8 sites for the von Neumann neighborhood of the
+    LiquidSwapController and 40 for the radius 5 neighborhood of the ReactionController.
+    Smaller grids are run with the AsynchronousRunner instead, with a warning. Worker
+    processes are forked, and each one draws from a stream spawned from the
+    controller's RandomStream.
+    """
+
+    def __init__(self, num_workers: int = None):
+        """Initializes a DomainDecompositionRunner
+
+        Args:
+            num_workers (int, optional): The number of worker processes. Defaults to
+            the number of CPUs.
+        """
+        if num_workers is None:
+            num_workers = os.cpu_count()
+        self.num_workers = num_workers
+
+    def _run(self,
+             initial_state: SimulationState,
+             result: SimulationResult,
+             controller: BasicController,
+             num_steps: int,
+             verbose: bool = False) -> SimulationResult:
+        calculator = controller.reaction_calculator
+        live_state = result.live_state
+        num_sites = live_state.size
+
+        slabs = grid_slabs(controller.structure, calculator.get_neighbor_arrays(num_sites), 2 * self.num_workers)
+        if len(slabs) == 0:
+            warnings.warn(
+                "The grid is too small, or has too few sites per worker, to split into at least four "
+                "slabs at least twice as thick as the reach of the neighborhood; running with the "
+                "AsynchronousRunner instead of the DomainDecompositionRunner"
+            )
+            return AsynchronousRunner()._run(initial_state, result, controller, num_steps, verbose=verbose)
+
+        # Every phase that could appear is registered up front, so that all of the
+        # workers agree on the phase IDs stored in shared memory
+        array_state = ArraySimulationState.from_simulation_state(live_state, phases=calculator.compiled_rxns.phases)
+        phases = array_state.phases
+
+        occupancy_bytes = num_sites * np.dtype(OCCUPANCY_DTYPE).itemsize
+        volume_offset = -(-occupancy_bytes // 8) * 8
+        shm = shared_memory.SharedMemory(create=True, size=volume_offset + num_sites * np.dtype(VOLUME_DTYPE).itemsize)
+
+        occupancy = np.ndarray(num_sites, dtype=OCCUPANCY_DTYPE, buffer=shm.buf)
+        volume = np.ndarray(num_sites, dtype=VOLUME_DTYPE, buffer=shm.buf, offset=volume_offset)
+        occupancy[:] = array_state.occupancy
+        volume[:] = array_state.volume
+
+        ctx = mp.get_context("fork")
+        connections = []
+        workers = []
+        try:
+            for rng in controller.rng.spawn(len(slabs) // 2):
+                conn, worker_conn = ctx.Pipe()
+                worker = ctx.Process(
+                    target=_serve,
+                    args=(worker_conn, controller, rng, occupancy, volume, phases),
+                    daemon=True,
+                )
+                worker.start()
+                connections.append(conn)
+                workers.append(worker)
+
+            general_state = live_state.get_general_state()
+            remaining = num_steps
+            with tqdm(total=num_steps, disable=(not verbose)) as progress:
+                while remaining > 0:
+                    for parity in [0, 1]:
+                        if remaining <= 0:
+                            break
+                        sub_sweep = slabs[parity::2]
+                        visits = self._split_visits(sub_sweep, remaining)
+                        prev_occupancy = occupancy.copy()
+                        prev_volume = volume.copy()
+
+                        for conn, (start, stop), num_visits in zip(connections, sub_sweep, visits):
+                            conn.send((start, stop, num_visits, general_state))
+
+                        replies = []
+                        for conn in connections:
+                            reply = conn.recv()
+                            if isinstance(reply, Exception):
+                                raise reply
+                            replies.append(reply)
+
+                        changed = np.flatnonzero((occupancy != prev_occupancy) | (volume != prev_volume))
+                        site_updates = {
+                            site_id: { DISCRETE_OCCUPANCY: phases[occ], VOLUME: vol }
+                            for site_id, occ, vol in zip(changed.tolist(), occupancy[changed].tolist(), volume[changed].tolist())
+                        }
+                        general_state = self._record(result, general_state, replies, site_updates, sum(visits))
+                        remaining -= sum(visits)
+                        progress.update(sum(visits))
+        finally:
+            # A worker may already have died, so stopping it must not prevent the
+            # others from being stopped or the shared memory from being freed
+            for conn in connections:
+                try:
+                    conn.send(None)
+                except (BrokenPipeError, OSError):
+                    pass
+            try:
+                for worker in workers:
+                    worker.join(timeout=WORKER_JOIN_TIMEOUT)
+                    if worker.is_alive():
+                        worker.terminate()
+                        worker.join()
+            finally:
+                del occupancy, volume
+                shm.close()
+                shm.unlink()
+
+        return result
+
+    def _split_visits(self, sub_sweep: List[Tuple[int, int]], remaining: int) -> List[int]:
+        """Shares the visits of a sub-sweep between its slabs in proportion to their size.
+        A sub-sweep makes one visit per site in its slabs, unless fewer steps remain.
+        """
+        sizes = np.array([stop - start for start, stop in sub_sweep])
+        total = min(int(sizes.sum()), remaining)
+        visits = (sizes * total) // sizes.sum()
+        visits[:total - int(visits.sum())] += 1
+        return visits.tolist()
+
+    def _record(self,
+                result: SimulationResult,
+                general_state: Dict,
+                replies: List[Tuple[int, Dict]],
+                site_updates: Dict[int, Dict],
+                num_visits: int) -> Dict:
+        """Adds the visits made during a sub-sweep to the result, as idle steps followed
+        by one step with the updates to every site that changed. The accumulated amounts
+        in the general state of each worker only include its own contributions, so those
+        of all of the workers are summed.
+
+        Returns:
+            Dict: The general state at the end of the sub-sweep
+        """
+        if num_visits == 0:
+            return general_state
+
+        offsets: Dict[str, Dict[str, float]] = { key: {} for key in ADDITIVE_GENERAL_KEYS }
+        last_reaction = None
+
+        for reaction, worker_general in replies:
+            if reaction is not None:
+                last_reaction = reaction
+
+            for key, offset in offsets.items():
+                start_amts = general_state.get(key) or {}
+                end_amts = worker_general.get(key) or {}
+                for phase, amt in end_amts.items():
+                    offset[phase] = offset.get(phase, 0) + amt - start_amts.get(phase, 0)
+
+        merged = dict(replies[-1][1])
+        for key, offset in offsets.items():
+            # Keys first added during this sub-sweep are summed over the workers too
+            if key in general_state or len(offset) > 0:
+                merged[key] = _add_amounts(general_state.get(key) or {}, offset)
+        merged[REACTION_CHOSEN] = last_reaction
+
+        add_idle_steps(result, num_visits - 1)
+        result.add_step({ SITES: site_updates, GENERAL: merged })
+        return merged
+
+
+def _add_amounts(amts: Dict[str, float], offset: Dict[str, float]) -> Dict[str, float]:
+    total = dict(amts)
+    for phase, amt in offset.items():
+        total[phase] = total.get(phase, 0) + amt
+    return total
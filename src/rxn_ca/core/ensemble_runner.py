@@ -0,0 +1,159 @@
+from typing import List
+
+import numpy as np
+from tqdm import tqdm
+
+from pylattica.core.simulation_state import SimulationState
+from pylattica.core.runner.common import merge_updates
+
+from .array_state import ArraySimulationState
+from .interaction_kernel import compiled_phase_ids
+from .liquid_swap_controller import LiquidSwapController
+from .reaction_result import ReactionResult
+from .rng import RandomStream
+
+
+class EnsembleRunner():
+    """Runs several realizations of a simulation side by side in one process.
+
+    The lattices of all realizations are stored as the rows of a single pair of
+    occupancy and volume arrays. Each realization is advanced one color of sites at
+    a time, as in the ColoredBatchRunner, and the interactions for the sites of every
+    realization are selected together from a single score matrix, so the NumPy work
+    for a color is done once for all of the realizations rather than once for each.
+    The controller, reaction set and neighborhood are shared between realizations.
+
+    Each realization draws only from its own RandomStream, in the same order as the
+    ColoredBatchRunner would, so every realization is identical to the result of
+    running the ColoredBatchRunner with its stream alone.
+
+    This runner is experimental. Only the selection of interactions is shared between
+    realizations: the chosen updates are still applied one site at a time in Python,
+    which dominates the run time, so it is only about 15% faster than running the
+    realizations one after another. It is not used by run_sim_parallel, which runs the
+    realizations of ENSEMBLE recipes in separate processes instead.
+    """
+
+    def run(self,
+            initial_states: List[SimulationState],
+            controller: LiquidSwapController,
+            rngs: List[RandomStream],
+            num_steps: int,
+            verbose: bool = False) -> List[ReactionResult]:
+        """Runs every realization for the prescribed number of steps
+
+        Args:
+            initial_states (List[SimulationState]): The starting state of each realization
+            controller (LiquidSwapController): The controller shared by the realizations
+            rngs (List[RandomStream]): The source of randomness for each realization. The
+            controller is left using the last of these.
+            num_steps (int): The number of steps to run each realization for
+            verbose (bool, optional): Defaults to False.
+
+        Raises:
+            ValueError: If the neighborhood is too large to batch (see can_batch)
+
+        Returns:
+            List[ReactionResult]: The result of each realization
+        """
+        if len(initial_states) != len(rngs):
+            raise ValueError("One RandomStream must be supplied for each realization")
+
+        results: List[ReactionResult] = []
+        states: List[ArraySimulationState] = []
+        for initial_state in initial_states:
+            result = controller.instantiate_result(initial_state.copy())
+            controller.pre_run(initial_state)
+            results.append(result)
+            states.append(ArraySimulationState.from_simulation_state(result.live_state))
+
+        # Stack the lattices, then point each state at its row so that
+        # the updates to a realization are written into the stack
+        occupancy = np.stack([state.occupancy for state in states])
+        volume = np.stack([state.volume for state in states])
+        for idx, state in enumerate(states):
+            state.occupancy = occupancy[idx]
+            state.volume = volume[idx]
+
+        calculator = controller.reaction_calculator
+        colors = controller.get_site_colors(states[0].site_ids())
+        if len(colors) == 0:
+            raise ValueError("The neighborhood is too large to color the sites into batches of a worthwhile size")
+        kernel = calculator.get_batch_kernel(states[0].size)
+
+        color_queues = [[] for _ in states]
+        visited = [0 for _ in states]
+
+        with tqdm(total=num_steps * len(states), disable=(not verbose)) as progress:
+            while True:
+                batch = []
+                for idx, rng in enumerate(rngs):
+                    remaining = num_steps - visited[idx]
+                    if remaining <= 0:
+                        continue
+
+                    if len(color_queues[idx]) == 0:
+                        color_queues[idx] = rng.generator.permutation(len(colors)).tolist()
+
+                    site_ids = colors[color_queues[idx].pop(0)]
+                    if len(site_ids) > remaining:
+                        site_ids = rng.generator.choice(site_ids, remaining, replace=False)
+
+                    batch.append((idx, site_ids))
+
+                if len(batch) == 0:
+                    break
+
+                # Swaps are decided and applied for each realization first, since
+                # the interactions are chosen from the state after the swaps
+                reacting = []
+                for idx, site_ids in batch:
+                    controller.set_rng(rngs[idx])
+                    free_sites, swapping = controller.choose_swapping_sites(site_ids, states[idx])
+                    for site_id, state_updates in controller.get_swap_state_updates(site_ids, free_sites, swapping, states[idx]):
+                        self._apply(site_id, state_updates, states[idx], results[idx])
+                    reacting.append((idx, site_ids[~free_sites & ~swapping]))
+
+                reacting = [(idx, site_ids) for idx, site_ids in reacting if len(site_ids) > 0]
+                if len(reacting) > 0:
+                    compiled = calculator.compiled_rxns
+                    phase_ids = np.stack([compiled_phase_ids(state, compiled) for state in states])
+
+                    # Each realization draws its neighbors and then the uniforms for its
+                    # interactions, in the same order as BatchInteractionKernel.choose
+                    nb_slots = []
+                    uniforms = []
+                    for idx, site_ids in reacting:
+                        nb_slots.append(kernel.draw_neighbors(site_ids, rngs[idx]))
+                        uniforms.append(rngs[idx].uniforms(len(site_ids)))
+
+                    all_site_ids = np.concatenate([site_ids for _, site_ids in reacting])
+                    realization_idxs = np.concatenate([np.full(len(site_ids), idx) for idx, site_ids in reacting])
+                    all_nb_slots = None if kernel.every_neighbor else np.concatenate(nb_slots)
+
+                    scores = kernel.score_matrix(all_site_ids, phase_ids, compiled, calculator.inertia, all_nb_slots, realization_idxs)
+                    columns = kernel.sample_columns(scores, np.concatenate(uniforms))
+
+                    start = 0
+                    for (idx, site_ids), site_nb_slots in zip(reacting, nb_slots):
+                        stop = start + len(site_ids)
+                        choices = kernel.decode(site_ids, columns[start:stop], compiled, site_nb_slots)
+                        start = stop
+
+                        controller.set_rng(rngs[idx])
+                        for site_id, state_updates in calculator.get_chosen_state_updates(site_ids, choices, states[idx]):
+                            self._apply(site_id, state_updates, states[idx], results[idx])
+
+                for idx, site_ids in batch:
+                    visited[idx] += len(site_ids)
+                    progress.update(len(site_ids))
+
+        for result in results:
+            result.finalize()
+
+        return results
+
+    def _apply(self, site_id: int, state_updates, state: ArraySimulationState, result: ReactionResult) -> None:
+        state_updates = merge_updates(state_updates, site_id=site_id)
+        state.batch_update(state_updates)
+        result.add_step(state_updates)
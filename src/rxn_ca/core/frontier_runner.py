@@ -0,0 +1,121 @@
+from typing import Dict, List
+
+from tqdm import tqdm
+
+from pylattica.core.constants import SITES
+from pylattica.core.basic_controller import BasicController
+from pylattica.core.simulation_result import SimulationResult
+from pylattica.core.simulation_state import SimulationState
+from pylattica.core.runner.base_runner import Runner
+from pylattica.core.runner.common import merge_updates
+
+from .idle_steps import add_idle_steps
+from .rng import RandomStream
+
+
+class SiteSet():
+    """A set of site IDs which supports constant time insertion, removal
+    and uniform random selection.
+    """
+
+    def __init__(self, site_ids: List[int] = []):
+        self._sites: List[int] = []
+        self._positions: Dict[int, int] = {}
+        for site_id in site_ids:
+            self.add(site_id)
+
+    def __len__(self) -> int:
+        return len(self._sites)
+
+    def __contains__(self, site_id: int) -> bool:
+        return site_id in self._positions
+
+    def add(self, site_id: int) -> None:
+        if site_id not in self._positions:
+            self._positions[site_id] = len(self._sites)
+            self._sites.append(site_id)
+
+    def discard(self, site_id: int) -> None:
+        position = self._positions.pop(site_id, None)
+        if position is None:
+            return
+
+        last = self._sites.pop()
+        if last != site_id:
+            self._sites[position] = last
+            self._positions[last] = position
+
+    def choice(self, rng: RandomStream) -> int:
+        return self._sites[rng.randrange(len(self._sites))]
+
+
+class FrontierRunner(Runner):
+    """Runs a simulation asynchronously, but only visits sites on the reaction
+    frontier.
+
+    Late in a simulation most sites are inside large grains of a single phase,
+    where a visit cannot change anything. This runner keeps track of the set of
+    sites at which a visit could change the state (as reported by the controller's
+    is_site_active method), and updates it after each step from the sites that
+    changed and the sites that depend on them.
+
+    A visit to a site outside the frontier is a no-op, so the number of visits
+    until the next one lands on the frontier is drawn from a geometric distribution
+    and those visits are recorded as idle steps (see add_idle_steps). The frontier site is chosen
+    uniformly and visited exactly as the AsynchronousRunner would, so this samples
+    the same process. Unlike the RejectionFreeRunner, no-ops selected at frontier
+    sites are still simulated, but only a cheap activity check is needed per site.
+
+    The controller must implement is_site_active and dependent_sites, and waiting
+    times and sites are drawn from its RandomStream.
+    """
+
+    def _run(self,
+             _: SimulationState,
+             result: SimulationResult,
+             controller: BasicController,
+             num_steps: int,
+             verbose: bool = False) -> SimulationResult:
+        live_state = result.live_state
+        rng = controller.rng
+        num_sites = live_state.size
+
+        frontier = SiteSet([
+            site_id for site_id in live_state.site_ids() if controller.is_site_active(site_id, live_state)
+        ])
+
+        elapsed = 0
+        with tqdm(total=num_steps, disable=(not verbose)) as progress:
+            while elapsed < num_steps:
+                if len(frontier) == 0:
+                    wait = None
+                else:
+                    wait = int(rng.generator.geometric(len(frontier) / num_sites))
+
+                if wait is None or elapsed + wait > num_steps:
+                    add_idle_steps(result, num_steps - elapsed)
+                    progress.update(num_steps - elapsed)
+                    break
+
+                add_idle_steps(result, wait - 1)
+
+                site_id = frontier.choice(rng)
+                state_updates = controller.get_state_update(site_id, live_state)
+                state_updates = merge_updates(state_updates, site_id=site_id)
+                result.add_step(state_updates)
+
+                changed_sites = set(state_updates[SITES].keys())
+                affected_sites = set(changed_sites)
+                for changed_site in changed_sites:
+                    affected_sites.update(controller.dependent_sites(changed_site))
+
+                for affected_site in affected_sites:
+                    if controller.is_site_active(affected_site, live_state):
+                        frontier.add(affected_site)
+                    else:
+                        frontier.discard(affected_site)
+
+                elapsed += wait
+                progress.update(wait)
+
+        return result
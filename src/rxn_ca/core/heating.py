@@ -1,4 +1,6 @@
-from typing import List
+from bisect import bisect_right
+from itertools import accumulate
+from typing import List, Tuple
 
 from monty.json import MSONable
 import numpy as np
@@ -61,24 +63,51 @@ class HeatingSchedule(MSONable):
     def __init__(self, steps):
         self.steps: List[HeatingStep] = steps
 
+        # Consecutive heating steps at the same temperature are stored as a
+        # single (temperature, duration) segment, and the end of each segment
+        # is kept so that lookups by step index can bisect
+        self.segments: List[Tuple[float, float]] = []
+        for step in self.temperature_steps:
+            if len(self.segments) > 0 and self.segments[-1][0] == step.temperature:
+                self.segments[-1] = (step.temperature, self.segments[-1][1] + step.duration)
+            else:
+                self.segments.append((step.temperature, step.duration))
+
+        self._segment_ends: List[float] = list(accumulate(duration for _, duration in self.segments))
+        self._segment_temps: np.ndarray = np.array([temp for temp, _ in self.segments], dtype=float)
+        self.total_duration = self._segment_ends[-1] if len(self.segments) > 0 else 0
+
     @property
     def temperature_steps(self):
         return [s for s in self.steps if isinstance(s, HeatingStep)]
     
     @property
     def all_temps(self):
-        return list(set([s.temperature for s in self.temperature_steps]))
+        return list(set([temp for temp, _ in self.segments]))
     
     def temp_at(self, step_idx):
-        tallied = 0
-        for step in self.temperature_steps:
-            tallied += step.duration
-            if tallied > step_idx:
-                return step.temperature
+        segment_idx = bisect_right(self._segment_ends, step_idx)
+        if segment_idx < len(self.segments):
+            return self.segments[segment_idx][0]
+
+    def temps_at(self, step_idxs) -> np.ndarray:
+        """Looks up the temperature at many points in the schedule at once
+
+        Args:
+            step_idxs (array-like): Positions in the schedule, in the same units as
+            the durations of the heating steps
+
+        Returns:
+            np.ndarray: The temperature at each position, or NaN past the end of the schedule
+        """
+        segment_idxs = np.searchsorted(self._segment_ends, np.asarray(step_idxs), side="right")
+        temps = np.full(segment_idxs.shape, np.nan)
+        in_schedule = segment_idxs < len(self.segments)
+        temps[in_schedule] = self._segment_temps[segment_idxs[in_schedule]]
+        return temps
     
     def temp_at_percent_complete(self, percent_complete):
-        total_steps = sum([step.duration for step in self.steps])
-        step_idx = int(percent_complete * total_steps)
+        step_idx = int(percent_complete * self.total_duration)
         return self.temp_at(step_idx)
             
     def get_xy_for_plot(self, max_x):
@@ -86,27 +115,22 @@ class HeatingSchedule(MSONable):
         xs = []
         ys = []
 
-        total_duration = sum(step.duration for step in self.temperature_steps)
-        step_length = int(max_x) / total_duration
+        step_length = int(max_x) / self.total_duration
 
-        for step in self.temperature_steps:
+        for temperature, duration in self.segments:
             xs.append(curr_x)
-            ys.append(step.temperature)
-            curr_x += step.duration * step_length
+            ys.append(temperature)
+            curr_x += duration * step_length
             xs.append(curr_x)
-            ys.append(step.temperature)            
-
-        if len(self.temperature_steps) == 1:
-            xs.append(self.temperature_steps[0].duration * step_length)
-            ys.append(self.temperature_steps[0].temperature)
+            ys.append(temperature)
 
         return xs, ys        
     
     def plot(self):
         fig, axs = plt.subplots()
-        total_length = sum([s.duration for s in self.temperature_steps])
+        total_length = self.total_duration
 
-        xs, ys = self.get_xy_for_plot()
+        xs, ys = self.get_xy_for_plot(total_length)
 
         axs.plot(xs, ys)
         axs.hlines(298, -100, total_length + 100, color='r')
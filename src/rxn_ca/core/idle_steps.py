@@ -0,0 +1,48 @@
+from itertools import repeat
+
+from pylattica.core.constants import GENERAL, SITES
+from pylattica.core.simulation_result import SimulationResult
+
+# The diff of a step in which nothing changed. Every idle step refers to this
+# one object, which must not be modified
+IDLE_STEP = { SITES: {}, GENERAL: {} }
+
+
+def add_idle_steps(result: SimulationResult, num_steps: int) -> None:
+    """Advances a result by a number of steps in which nothing changed, as if
+    IDLE_STEP had been added that many times.
+
+    The state is not touched, and no diff is built for any of the steps. Results
+    which keep a diff per step get that many references to IDLE_STEP, and results
+    which keep frames get the frames that fall within the idle steps. Only if
+    observers are attached, which may sample any step, are the steps added one by one.
+
+    Args:
+        result (SimulationResult): The result to advance
+        num_steps (int): The number of idle steps
+    """
+    if num_steps <= 0:
+        return
+
+    if len(result.observed_results) > 0:
+        for _ in range(num_steps):
+            result.add_step(IDLE_STEP)
+        return
+
+    first_step = result._total_steps + 1
+    result._total_steps += num_steps
+
+    if not result.retain_history:
+        return
+
+    if result.live_compress:
+        freq = result.compress_freq
+        first_frame = -(-first_step // freq) * freq
+        for step_no in range(first_frame, result._total_steps + 1, freq):
+            result._frames[step_no] = result.live_state.copy()
+        return
+
+    result._diffs.extend(repeat(IDLE_STEP, num_steps))
+    # As add_step would have, though only once a checkpoint can drop any diffs
+    while result.max_history is not None and len(result._diffs) > max(result.max_history, 1):
+        result._create_checkpoint()
@@ -0,0 +1,212 @@
+from typing import List
+
+import numpy as np
+
+from .array_state import ArraySimulationState
+from .rng import RandomStream
+from .neighbor_arrays import NeighborArrays
+from ..reactions import CompiledReactionSet
+
+
+class BatchInteractionKernel():
+    """Selects an interaction for many sites at once using NumPy.
+
+    As in ReactionCalculator.possible_interactions_at_site, a visit to a site considers
+    one of its neighbors, drawn uniformly at random. The scores of the interactions
+    available to each site are laid out as the columns of a matrix, in the same way
+    that the calculator enumerates them:
+
+        [no-op, pair + atmosphere, pair, atmosphere..., decomposition]
+
+    If every neighbor reacts, the columns between the no-op and the decomposition are
+    repeated for each neighbor instead, padded to the largest neighborhood.
+
+    The no-op column carries both of the no-op interactions. Interactions that are not
+    possible at a site have a score of zero, so one interaction can be drawn per row
+    from the cumulative scores.
+    """
+
+    NO_OP = 0
+    PAIR_ATMOSPHERE = 1
+    PAIR = 2
+    ATMOSPHERE = 3
+    DECOMPOSITION = 4
+
+    def __init__(self, neighbors: NeighborArrays, every_neighbor: bool = False):
+        """Tabulates the neighbors of every site.
+
+        Args:
+            neighbors (NeighborArrays): The neighborhood used by the calculator
+            every_neighbor (bool, optional): Whether a visit considers every neighbor
+            of a site, as with ReactionCalculator.every_neighbor_reacts. Defaults to False.
+        """
+        self.every_neighbor = every_neighbor
+        self.nb_ids, self.nb_weights, self.nb_mask = neighbors.padded()
+        self.num_sites = neighbors.num_sites
+        self.max_degree = self.nb_ids.shape[1]
+        self.degrees = self.nb_mask.sum(axis=1)
+
+    def draw_neighbors(self, site_ids: np.ndarray, rng: RandomStream) -> np.ndarray:
+        """Draws the neighbor considered by a visit to each of the supplied sites
+
+        Args:
+            site_ids (np.ndarray): The sites of interest
+            rng (RandomStream): The source of randomness for this simulation
+
+        Returns:
+            np.ndarray: The position of the neighbor among those of each site, or None
+            if every neighbor is considered
+        """
+        if self.every_neighbor:
+            return None
+
+        degrees = self.degrees[site_ids]
+        slots = (rng.uniforms(len(site_ids)) * degrees).astype(np.int64)
+        return np.minimum(slots, np.maximum(degrees - 1, 0))
+
+    def score_matrix(self,
+                     site_ids: np.ndarray,
+                     phase_ids: np.ndarray,
+                     compiled: CompiledReactionSet,
+                     inertia: float,
+                     nb_slots: np.ndarray,
+                     realization_idxs: np.ndarray = None) -> np.ndarray:
+        """Returns the scores of every interaction available to each of the supplied sites.
+
+        Args:
+            site_ids (np.ndarray): The sites of interest
+            phase_ids (np.ndarray): The compiled phase ID of every site in the simulation,
+            or an array with one such row per realization
+            compiled (CompiledReactionSet): The reactions available
+            inertia (float): The score of a single no-op interaction
+            nb_slots (np.ndarray): The neighbor considered at each site, as returned
+            by draw_neighbors, or None if every neighbor is considered
+            realization_idxs (np.ndarray, optional): The realization each site belongs to,
+            which is required if phase_ids has a row per realization. Defaults to None.
+
+        Returns:
+            np.ndarray: An array of shape (len(site_ids), number of interactions)
+        """
+        nb_ids, weights, mask = self._neighbors(site_ids, nb_slots)
+        if realization_idxs is None:
+            site_phases = phase_ids[site_ids]
+            nb_phases = phase_ids[nb_ids]
+        else:
+            site_phases = phase_ids[realization_idxs, site_ids]
+            nb_phases = phase_ids[realization_idxs[:, None], nb_ids]
+
+        weights = weights * mask
+        free_nbs = (nb_phases == compiled.free_space_id) & mask
+
+        pair_atmosphere = compiled.pair_atmosphere_scores[site_phases[:, None], nb_phases] * weights
+        pair = compiled.pair_scores[site_phases[:, None], nb_phases] * weights
+        atmosphere = compiled.atmosphere_scores[site_phases][:, None, :] * free_nbs[:, :, None]
+
+        per_neighbor = np.concatenate([pair_atmosphere[:, :, None], pair[:, :, None], atmosphere], axis=2)
+
+        return np.concatenate([
+            np.full((len(site_ids), 1), 2 * inertia),
+            per_neighbor.reshape(len(site_ids), -1),
+            compiled.single_scores[site_phases][:, None],
+        ], axis=1)
+
+    def _neighbors(self, site_ids: np.ndarray, nb_slots: np.ndarray):
+        # The neighbors considered at each site, with one column per neighbor
+        if nb_slots is None:
+            return self.nb_ids[site_ids], self.nb_weights[site_ids], self.nb_mask[site_ids]
+        return (
+            self.nb_ids[site_ids, nb_slots][:, None],
+            self.nb_weights[site_ids, nb_slots][:, None],
+            self.nb_mask[site_ids, nb_slots][:, None],
+        )
+
+    def choose(self,
+               site_ids: np.ndarray,
+               state: ArraySimulationState,
+               compiled: CompiledReactionSet,
+               inertia: float,
+               rng: RandomStream) -> List:
+        """Draws one interaction for each of the supplied sites.
+
+        Args:
+            site_ids (np.ndarray): The sites of interest
+            state (ArraySimulationState): The current state of the simulation
+            compiled (CompiledReactionSet): The reactions available
+            inertia (float): The score of a single no-op interaction
+            rng (RandomStream): The source of randomness for this simulation
+
+        Returns:
+            List: A tuple of (interaction type, neighbor ID, atmospheric species index) for
+            each site. The neighbor ID and species index are None where they do not apply.
+        """
+        phase_ids = compiled_phase_ids(state, compiled)
+        nb_slots = self.draw_neighbors(site_ids, rng)
+        scores = self.score_matrix(site_ids, phase_ids, compiled, inertia, nb_slots)
+        columns = self.sample_columns(scores, rng.uniforms(len(site_ids)))
+        return self.decode(site_ids, columns, compiled, nb_slots)
+
+    @staticmethod
+    def sample_columns(scores: np.ndarray, uniforms: np.ndarray) -> np.ndarray:
+        """Draws one column from each row of a score matrix
+
+        Args:
+            scores (np.ndarray): The output of score_matrix
+            uniforms (np.ndarray): One uniform random number per row
+
+        Returns:
+            np.ndarray: The column chosen in each row
+        """
+        cumulative = np.cumsum(scores, axis=1)
+        thresholds = uniforms * cumulative[:, -1]
+        columns = (cumulative <= thresholds[:, None]).sum(axis=1)
+        return np.minimum(columns, scores.shape[1] - 1)
+
+    def decode(self, site_ids: np.ndarray, columns: np.ndarray, compiled: CompiledReactionSet, nb_slots: np.ndarray) -> List:
+        """Translates the columns chosen from a score matrix into interactions
+
+        Args:
+            site_ids (np.ndarray): The sites of interest
+            columns (np.ndarray): The column chosen for each site
+            compiled (CompiledReactionSet): The reactions available
+            nb_slots (np.ndarray): The neighbor considered at each site, or None if
+            every neighbor is considered
+
+        Returns:
+            List: The interactions, in the form returned by choose
+        """
+        nb_ids = self._neighbors(site_ids, nb_slots)[0].tolist()
+        block_size = 2 + len(compiled.atmospheric_species)
+        last_column = (len(nb_ids[0]) if len(nb_ids) > 0 else 0) * block_size + 1
+
+        choices = []
+        for site_nb_ids, column in zip(nb_ids, columns.tolist()):
+            if column == 0:
+                choices.append((self.NO_OP, None, None))
+            elif column == last_column:
+                choices.append((self.DECOMPOSITION, None, None))
+            else:
+                slot, kind = divmod(column - 1, block_size)
+                nb_id = site_nb_ids[slot]
+                if kind == 0:
+                    choices.append((self.PAIR_ATMOSPHERE, nb_id, None))
+                elif kind == 1:
+                    choices.append((self.PAIR, nb_id, None))
+                else:
+                    choices.append((self.ATMOSPHERE, nb_id, kind - 2))
+
+        return choices
+
+
+def compiled_phase_ids(state: ArraySimulationState, compiled: CompiledReactionSet) -> np.ndarray:
+    """Translates the phase IDs used by an ArraySimulationState into those of a
+    CompiledReactionSet
+
+    Args:
+        state (ArraySimulationState): The current state of the simulation
+        compiled (CompiledReactionSet): The reactions available
+
+    Returns:
+        np.ndarray: The compiled phase ID of every site
+    """
+    phase_lookup = np.array([compiled.phase_id(p) for p in state.phases], dtype=int)
+    return phase_lookup[state.occupancy]
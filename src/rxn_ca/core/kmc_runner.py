@@ -0,0 +1,118 @@
+import warnings
+
+from tqdm import tqdm
+
+from pylattica.core import AsynchronousRunner
+from pylattica.core.constants import SITES
+from pylattica.core.basic_controller import BasicController
+from pylattica.core.simulation_result import SimulationResult
+from pylattica.core.simulation_state import SimulationState
+from pylattica.core.runner.base_runner import Runner
+from pylattica.core.runner.common import merge_updates
+
+from .idle_steps import add_idle_steps
+from .sum_tree import SumTree
+
+# If a visit to a random site would change the state more often than this at the
+# start of a run, too few visits are skipped to pay for tracking the propensities,
+# and the run falls back to the AsynchronousRunner
+MAX_FIRE_PROBABILITY = 0.5
+
+
+class RejectionFreeRunner(Runner):
+    """Runs a simulation as a rejection free kinetic Monte Carlo process.
+
+    In the asynchronous mode of evolution, each step visits a random site and
+    most visits select a no-op. Instead, this runner tracks the propensity of
+    every site (the probability that a visit there changes the state) in a
+    SumTree. The number of visits until one changes the state is drawn from a
+    geometric distribution, and the site at which the change occurs is drawn in
+    proportion to its propensity, so that no time is spent on rejected visits.
+    After each change, only the propensities of the changed sites and the sites
+    that depend on them are recomputed.
+
+    Because the state does not change during the skipped visits, this samples
+    the same process as the AsynchronousRunner. The skipped visits are recorded
+    as idle steps (see add_idle_steps) so that the result has one step per visit,
+    as it would if it had been run asynchronously.
+
+    This only pays off if most visits would be rejected. With the LiquidSwapController,
+    every solid site can swap, so no site ever drops out of the SumTree, and close to
+    the melting points most visits change the state. If more than MAX_FIRE_PROBABILITY
+    of the visits would change the state at the start of a run, a warning is given and
+    the run falls back to the AsynchronousRunner.
+
+    The controller must implement get_site_propensity, get_active_state_update
+    and dependent_sites in addition to the usual BasicController methods, and
+    waiting times and sites are drawn from its RandomStream.
+    """
+
+    def _run(self,
+             initial_state: SimulationState,
+             result: SimulationResult,
+             controller: BasicController,
+             num_steps: int,
+             verbose: bool = False) -> SimulationResult:
+        live_state = result.live_state
+        rng = controller.rng
+        site_ids = list(live_state.site_ids())
+        site_idxs = { site_id: idx for idx, site_id in enumerate(site_ids) }
+        num_sites = len(site_ids)
+
+        propensities = SumTree.from_values([
+            controller.get_site_propensity(site_id, live_state) for site_id in site_ids
+        ])
+
+        if propensities.total / num_sites > MAX_FIRE_PROBABILITY:
+            warnings.warn(
+                f"More than {MAX_FIRE_PROBABILITY:.0%} of visits change the state, so few would be "
+                "skipped; running with the AsynchronousRunner instead of the RejectionFreeRunner"
+            )
+            return AsynchronousRunner()._run(initial_state, result, controller, num_steps, verbose=verbose)
+
+        elapsed = 0
+        with tqdm(total=num_steps, disable=(not verbose)) as progress:
+            while elapsed < num_steps:
+                total_propensity = propensities.total
+
+                if total_propensity <= 0:
+                    wait = None
+                else:
+                    # The probability that any one visit changes the state
+                    fire_prob = min(total_propensity / num_sites, 1.0)
+                    wait = int(rng.generator.geometric(fire_prob))
+
+                if wait is None or elapsed + wait > num_steps:
+                    add_idle_steps(result, num_steps - elapsed)
+                    progress.update(num_steps - elapsed)
+                    break
+
+                site_idx = propensities.find(rng.random() * total_propensity)
+                if propensities.get(site_idx) <= 0:
+                    # Rounding error accumulated in the partial sums can leave a
+                    # site with no propensity selectable, so rebuild and redraw
+                    propensities.rebuild()
+                    continue
+
+                add_idle_steps(result, wait - 1)
+
+                site_id = site_ids[site_idx]
+                state_updates = controller.get_active_state_update(site_id, live_state)
+                state_updates = merge_updates(state_updates, site_id=site_id)
+                result.add_step(state_updates)
+
+                changed_sites = set(state_updates[SITES].keys())
+                affected_sites = set(changed_sites)
+                for changed_site in changed_sites:
+                    affected_sites.update(controller.dependent_sites(changed_site))
+
+                for affected_site in affected_sites:
+                    propensities.update(
+                        site_idxs[affected_site],
+                        controller.get_site_propensity(affected_site, live_state)
+                    )
+
+                elapsed += wait
+                progress.update(wait)
+
+        return result
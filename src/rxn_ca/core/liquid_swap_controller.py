@@ -1,7 +1,6 @@
 import numpy as np
-import random
 import math
-from typing import Dict, List, Tuple
+from typing import Dict, List, Tuple, Union
 from pylattica.discrete.state_constants import DISCRETE_OCCUPANCY
 from pylattica.core.periodic_structure import PeriodicStructure
 from pylattica.core.constants import GENERAL, SITE_ID, SITES
@@ -15,6 +14,11 @@ from .reaction_result import ReactionResult
 from .constants import VOLUME, REACTION_CHOSEN
 from ..reactions import ScoredReactionSet
 from .reaction_calculator import ReactionCalculator
+from .array_state import ArraySimulationState
+from .rng import RandomStream
+from .neighbor_arrays import NeighborArrays
+from .neighborhood_cache import load_or_build, neighborhood_cache_key
+from .stencil_neighborhood import StencilNeighborhood, VonNeumannStencilBuilder
 
 def swap_chance(tm_frac):
     num = (20*tm_frac - 18.5)
@@ -26,6 +30,22 @@ class LiquidSwapController(BasicController):
     @classmethod
     def get_neighborhood_from_structure(cls, structure: PeriodicStructure):
         return VonNeumannNbHood3DBuilder(1).get(structure)
+
+    @classmethod
+    def get_neighbor_arrays_from_structure(cls, structure: PeriodicStructure) -> NeighborArrays:
+        num_sites = len(structure.site_ids)
+        return load_or_build(
+            neighborhood_cache_key(structure.dim, num_sites, cls.__name__, 1),
+            lambda: NeighborArrays.from_neighborhood(cls.get_neighborhood_from_structure(structure), num_sites)
+        )
+
+    @classmethod
+    def get_stencil_from_structure(cls, structure: PeriodicStructure) -> Union[StencilNeighborhood, NeighborArrays]:
+        """Returns the same neighborhood as get_neighborhood_from_structure without building
+        the neighborhood graph. Falls back to NeighborArrays if the grid is too small for the
+        neighborhood to be expressed as a stencil.
+        """
+        return VonNeumannStencilBuilder(1, structure.dim).get(structure)
     
     def __init__(self,
         structure: PeriodicStructure,
@@ -35,6 +55,13 @@ class LiquidSwapController(BasicController):
         self.reaction_calculator = rxn_calculator
         self.temperature = None
 
+    @property
+    def rng(self) -> RandomStream:
+        return self.reaction_calculator.rng
+
+    def set_rng(self, rng: RandomStream):
+        self.reaction_calculator.set_rng(rng)
+
     def set_rxn_set(self, rxn_set: ScoredReactionSet):
         self.reaction_calculator.set_rxn_set(rxn_set)
     
@@ -44,9 +71,10 @@ class LiquidSwapController(BasicController):
     def instantiate_result(self, starting_state: SimulationState):
         return ReactionResult(starting_state)
 
-    def get_state_update(self, site_id: int, prev_state: SimulationState):
-        np.random.seed(None)
+    def get_random_site(self, state: SimulationState):
+        return self.rng.randrange(state.size)
 
+    def get_state_update(self, site_id: int, prev_state: SimulationState):
         site_state = prev_state.get_site_state(site_id)
         species = site_state[DISCRETE_OCCUPANCY]
         updates = {}
@@ -57,25 +85,177 @@ class LiquidSwapController(BasicController):
         if species == SolidPhaseSet.FREE_SPACE:
             return updates
         
-        diff = self.temperature / self.reaction_calculator.rxn_set.phases.get_melting_point(species)
-
-        if species == SolidPhaseSet.FREE_SPACE or random.random() < swap_chance(diff):
-            nb_ids = self.reaction_calculator.neighborhood_graph.neighbors_of(site_id)
-
-            other_id = random.choice(nb_ids)
-            other_state = prev_state.get_site_state(other_id)
-
-            updates[SITES] = {
-                site_id: {
-                    DISCRETE_OCCUPANCY: other_state[DISCRETE_OCCUPANCY],
-                    VOLUME: other_state[VOLUME]
-                },
-                other_id: {
-                    DISCRETE_OCCUPANCY: site_state[DISCRETE_OCCUPANCY],
-                    VOLUME: site_state[VOLUME]                    
-                }
-            }
+        if species == SolidPhaseSet.FREE_SPACE or self.rng.random() < self._swap_chance(species):
+            updates[SITES] = self._swap_with_neighbor(site_id, site_state, prev_state)
         else:
             updates = self.reaction_calculator.get_state_update(site_id, prev_state)
 
         return updates
+
+    def get_site_propensity(self, site_id: int, state: SimulationState) -> float:
+        """Returns the probability that a visit to this site changes the state,
+        either by swapping with a neighbor or by selecting a reaction.
+
+        Args:
+            site_id (int): The site of interest
+            state (SimulationState): The current state of the simulation
+
+        Returns:
+            float:
+        """
+        species = state.get_site_state(site_id)[DISCRETE_OCCUPANCY]
+
+        if species == SolidPhaseSet.FREE_SPACE:
+            return 0.0
+
+        p_swap = self._swap_chance(species)
+        return p_swap + (1 - p_swap) * self.reaction_calculator.get_site_propensity(site_id, state)
+
+    def get_active_state_update(self, site_id: int, prev_state: SimulationState):
+        """Returns the updates resulting from a visit to this site, conditioned on
+        that visit changing the state.
+
+        Args:
+            site_id (int): The site being visited
+            prev_state (SimulationState): The current state of the simulation
+
+        Returns:
+            Dict: The updates
+        """
+        site_state = prev_state.get_site_state(site_id)
+        species = site_state[DISCRETE_OCCUPANCY]
+
+        if species == SolidPhaseSet.FREE_SPACE:
+            return {}
+
+        p_swap = self._swap_chance(species)
+        p_react = (1 - p_swap) * self.reaction_calculator.get_site_propensity(site_id, prev_state)
+
+        if self.rng.random() * (p_swap + p_react) < p_swap:
+            return {
+                GENERAL: { REACTION_CHOSEN: None },
+                SITES: self._swap_with_neighbor(site_id, site_state, prev_state)
+            }
+        else:
+            return self.reaction_calculator.get_active_state_update(site_id, prev_state)
+
+    def is_site_active(self, site_id: int, state: SimulationState) -> bool:
+        """Returns whether a visit to this site could change the state, either by
+        swapping it with a neighbor that differs from it or by a reaction.
+
+        Args:
+            site_id (int): The site of interest
+            state (SimulationState): The current state of the simulation
+
+        Returns:
+            bool:
+        """
+        site_state = state.get_site_state(site_id)
+        species = site_state[DISCRETE_OCCUPANCY]
+
+        if species == SolidPhaseSet.FREE_SPACE:
+            return False
+
+        volume = site_state[VOLUME]
+        for nb_id in self.reaction_calculator.get_neighbor_arrays(state.size).neighbor_ids(site_id):
+            nb_state = state.get_site_state(nb_id)
+            if nb_state[DISCRETE_OCCUPANCY] != species or nb_state[VOLUME] != volume:
+                return True
+
+        return self.reaction_calculator.is_site_active(site_id, state)
+
+    def dependent_sites(self, site_id: int):
+        return self.reaction_calculator.dependent_sites(site_id)
+
+    def get_site_colors(self, site_ids: List[int]) -> List[np.ndarray]:
+        return self.reaction_calculator.get_site_colors(site_ids)
+
+    def get_batch_state_updates(self, site_ids: np.ndarray, state: ArraySimulationState):
+        """Decides which of a group of non-interacting sites swap with a neighbor
+        at once, and then yields the updates for each site in turn. The remaining
+        sites are passed on to the reaction calculator.
+
+        Args:
+            site_ids (np.ndarray): A group of non-interacting sites
+            state (ArraySimulationState): The current state of the simulation
+
+        Yields:
+            Tuple[int, Dict]: The site visited and the resulting updates
+        """
+        free_sites, swapping = self.choose_swapping_sites(site_ids, state)
+        yield from self.get_swap_state_updates(site_ids, free_sites, swapping, state)
+
+        reacting = site_ids[~free_sites & ~swapping]
+        if len(reacting) > 0:
+            yield from self.reaction_calculator.get_batch_state_updates(reacting, state)
+
+    def choose_swapping_sites(self, site_ids: np.ndarray, state: ArraySimulationState) -> Tuple[np.ndarray, np.ndarray]:
+        """Decides which of a group of sites swap with a neighbor
+
+        Args:
+            site_ids (np.ndarray): A group of non-interacting sites
+            state (ArraySimulationState): The current state of the simulation
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Masks of the sites which are free space,
+            and of the sites which swap
+        """
+        phase_swap_chances = np.array([
+            0.0 if phase == SolidPhaseSet.FREE_SPACE else self._swap_chance(phase)
+            for phase in state.phases
+        ])
+        is_free = np.array([phase == SolidPhaseSet.FREE_SPACE for phase in state.phases])
+
+        site_phases = state.occupancy[site_ids]
+        free_sites = is_free[site_phases]
+        swapping = ~free_sites & (self.rng.uniforms(len(site_ids)) < phase_swap_chances[site_phases])
+        return free_sites, swapping
+
+    def get_swap_state_updates(self,
+                               site_ids: np.ndarray,
+                               free_sites: np.ndarray,
+                               swapping: np.ndarray,
+                               state: ArraySimulationState):
+        """Yields the updates for the sites which are free space or swap with a neighbor,
+        as decided by choose_swapping_sites.
+
+        Args:
+            site_ids (np.ndarray): A group of non-interacting sites
+            free_sites (np.ndarray): A mask of the sites which are free space
+            swapping (np.ndarray): A mask of the sites which swap
+            state (ArraySimulationState): The current state of the simulation
+
+        Yields:
+            Tuple[int, Dict]: The site visited and the resulting updates
+        """
+        for site_id in site_ids[free_sites].tolist():
+            yield site_id, { GENERAL: { REACTION_CHOSEN: None } }
+
+        for site_id in site_ids[swapping].tolist():
+            site_state = state.get_site_state(site_id)
+            yield site_id, {
+                GENERAL: { REACTION_CHOSEN: None },
+                SITES: self._swap_with_neighbor(site_id, site_state, state)
+            }
+
+    def _swap_chance(self, species: str) -> float:
+        diff = self.temperature / self.reaction_calculator.rxn_set.phases.get_melting_point(species)
+        return swap_chance(diff)
+
+    def _swap_with_neighbor(self, site_id: int, site_state: Dict, prev_state: SimulationState) -> Dict:
+        nb_ids = self.reaction_calculator.get_neighbor_arrays(prev_state.size).neighbor_ids(site_id)
+
+        other_id = self.rng.choice(nb_ids)
+        other_state = prev_state.get_site_state(other_id)
+        self.reaction_calculator.invalidate_sites([site_id, other_id])
+
+        return {
+            site_id: {
+                DISCRETE_OCCUPANCY: other_state[DISCRETE_OCCUPANCY],
+                VOLUME: other_state[VOLUME]
+            },
+            other_id: {
+                DISCRETE_OCCUPANCY: site_state[DISCRETE_OCCUPANCY],
+                VOLUME: site_state[VOLUME]
+            }
+        }
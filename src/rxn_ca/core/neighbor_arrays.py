@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import os
+from functools import cached_property
+from typing import Iterator, List, Tuple
+
+import numpy as np
+
+from pylattica.core.neighborhoods import Neighborhood
+
+
+def distance_weight(distance):
+    """The factor by which the score of an interaction between two sites
+    is scaled according to the distance between them.
+    """
+    return 1 / distance ** 3
+
+
+class NeighborArrays():
+    """The neighborhood of every site stored in compressed sparse row form.
+    The neighbors of site i are indices[indptr[i]:indptr[i + 1]], sorted by
+    site ID, and the distance to each neighbor and the weight that distance
+    contributes to an interaction score are stored in the same slots.
+
+    Site IDs are expected to run contiguously from zero. The numpy arrays,
+    which may be memory-mapped from a cache shared between processes, are
+    the source of truth. Copies of them as plain lists, which are faster to
+    slice and iterate over one site at a time, are only made the first time
+    a lookup for a single site is done.
+    """
+
+    ARRAY_NAMES = ("indptr", "indices", "distances")
+
+    @classmethod
+    def from_neighborhood(cls, neighborhood: Neighborhood, num_sites: int) -> NeighborArrays:
+        """Flattens a neighborhood graph into CSR arrays
+
+        Args:
+            neighborhood (Neighborhood): The neighborhood graph
+            num_sites (int): The number of sites in the structure
+
+        Returns:
+            NeighborArrays:
+        """
+        indptr = np.zeros(num_sites + 1, dtype=np.int64)
+        indices = []
+        distances = []
+
+        for site_id in range(num_sites):
+            nbs = sorted(neighborhood.neighbors_of(site_id, include_weights=True))
+            indices.extend([nb_id for nb_id, _ in nbs])
+            distances.extend([distance for _, distance in nbs])
+            indptr[site_id + 1] = len(indices)
+
+        return cls(
+            indptr,
+            np.array(indices, dtype=np.int64),
+            np.array(distances, dtype=float),
+        )
+
+    @classmethod
+    def load(cls, fpath: str, mmap_mode: str = "r") -> NeighborArrays:
+        """Loads arrays written by save. By default the arrays are memory-mapped
+        rather than read into memory.
+
+        Args:
+            fpath (str): The path the arrays were saved under
+            mmap_mode (str, optional): Passed to np.load. Defaults to "r".
+
+        Returns:
+            NeighborArrays:
+        """
+        return cls(*[np.load(f"{fpath}.{name}.npy", mmap_mode=mmap_mode) for name in cls.ARRAY_NAMES])
+
+    def __init__(self, indptr: np.ndarray, indices: np.ndarray, distances: np.ndarray):
+        """Initializes NeighborArrays
+
+        Args:
+            indptr (np.ndarray): The offset of the first neighbor of every site, followed
+            by the total number of neighbors
+            indices (np.ndarray): The IDs of the neighbors
+            distances (np.ndarray): The distance to each neighbor
+        """
+        self.indptr: np.ndarray = indptr
+        self.indices: np.ndarray = indices
+        self.distances: np.ndarray = distances
+
+    @cached_property
+    def weights(self) -> np.ndarray:
+        return distance_weight(self.distances)
+
+    # Built on first use by the lookups for single sites below
+    @cached_property
+    def _indptr(self) -> List[int]:
+        return self.indptr.tolist()
+
+    @cached_property
+    def _indices(self) -> List[int]:
+        return self.indices.tolist()
+
+    @cached_property
+    def _distances(self) -> List[float]:
+        return self.distances.tolist()
+
+    @cached_property
+    def _weights(self) -> List[float]:
+        return self.weights.tolist()
+
+    @property
+    def num_sites(self) -> int:
+        return len(self.indptr) - 1
+
+    def save(self, fpath: str) -> None:
+        """Writes the arrays to .npy files beginning with fpath. Each file is
+        written under a temporary name and then moved into place, so processes
+        loading the same arrays never see a partially written file.
+
+        Args:
+            fpath (str): The path to save the arrays under
+        """
+        for name in self.ARRAY_NAMES:
+            target = f"{fpath}.{name}.npy"
+            tmp = f"{target}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                np.save(f, getattr(self, name))
+            os.replace(tmp, target)
+
+    def neighbor_ids(self, site_id: int) -> List[int]:
+        return self._indices[self._indptr[site_id]:self._indptr[site_id + 1]]
+
+    def degree(self, site_id: int) -> int:
+        return self._indptr[site_id + 1] - self._indptr[site_id]
+
+    def weighted_neighbor(self, site_id: int, idx: int) -> Tuple[int, float]:
+        """Returns one of the neighbors of a site along with its weight
+
+        Args:
+            site_id (int): The site of interest
+            idx (int): The position of the neighbor among those of the site
+
+        Returns:
+            Tuple[int, float]:
+        """
+        slot = self._indptr[site_id] + idx
+        return self._indices[slot], self._weights[slot]
+
+    def weighted_neighbors(self, site_id: int) -> Iterator[Tuple[int, float]]:
+        """Returns the neighbors of a site along with the weight of each
+
+        Args:
+            site_id (int): The site of interest
+
+        Returns:
+            Iterator[Tuple[int, float]]:
+        """
+        start = self._indptr[site_id]
+        end = self._indptr[site_id + 1]
+        return zip(self._indices[start:end], self._weights[start:end])
+
+    def neighbors_of(self, site_id: int, include_weights: bool = False):
+        """Mirrors Neighborhood.neighbors_of, where the weight of each
+        connection is the distance to the neighbor.
+        """
+        if include_weights:
+            start = self._indptr[site_id]
+            end = self._indptr[site_id + 1]
+            return list(zip(self._indices[start:end], self._distances[start:end]))
+        return self.neighbor_ids(site_id)
+
+    def padded(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Returns the neighbor IDs and weights as dense arrays with one row per
+        site. Rows of sites with fewer neighbors than the maximum are padded with
+        entries which point at site zero and are masked out.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray]: The neighbor IDs, weights and mask
+        """
+        degrees = np.diff(self.indptr)
+        max_degree = int(degrees.max()) if len(degrees) > 0 else 0
+
+        rows = np.repeat(np.arange(self.num_sites), degrees)
+        slots = np.arange(len(self.indices)) - np.repeat(self.indptr[:-1], degrees)
+
+        nb_ids = np.zeros((self.num_sites, max_degree), dtype=np.int64)
+        weights = np.zeros((self.num_sites, max_degree), dtype=float)
+        mask = np.zeros((self.num_sites, max_degree), dtype=bool)
+
+        nb_ids[rows, slots] = self.indices
+        weights[rows, slots] = self.weights
+        mask[rows, slots] = True
+
+        return nb_ids, weights, mask
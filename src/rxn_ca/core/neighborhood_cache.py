@@ -0,0 +1,64 @@
+import os
+from typing import Callable
+
+from .neighbor_arrays import NeighborArrays
+
+CACHE_DIR_ENV_VAR = "RXN_CA_CACHE_DIR"
+
+# Part of every cache key. Bump this whenever the layout or the contents of the
+# cached arrays change, so that neighborhoods cached by older versions are rebuilt
+CACHE_FORMAT_VERSION = 1
+
+_DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "rxn_ca", "neighborhoods")
+
+
+def get_cache_dir() -> str:
+    """Returns the directory neighborhoods are cached in. This is taken from the
+    RXN_CA_CACHE_DIR environment variable if it is set, and caching is disabled
+    if it is set to an empty string.
+
+    Returns:
+        str: The cache directory, or None if caching is disabled
+    """
+    cache_dir = os.environ.get(CACHE_DIR_ENV_VAR, _DEFAULT_CACHE_DIR)
+    if cache_dir == "":
+        return None
+    return cache_dir
+
+
+def neighborhood_cache_key(dim: int, num_sites: int, builder: str, radius) -> str:
+    return f"v{CACHE_FORMAT_VERSION}_{builder}_r{radius}_{dim}d_{num_sites}"
+
+
+def load_or_build(key: str, build: Callable[[], NeighborArrays]) -> NeighborArrays:
+    """Returns the neighborhood cached under the given key, memory-mapped from
+    disk. If it has not been cached yet, it is built and then saved.
+
+    Args:
+        key (str): A key identifying the neighborhood, from neighborhood_cache_key
+        build (Callable[[], NeighborArrays]): Builds the neighborhood if it is not cached
+
+    Returns:
+        NeighborArrays:
+    """
+    cache_dir = get_cache_dir()
+    if cache_dir is None:
+        return build()
+
+    fpath = os.path.join(cache_dir, key)
+    if all(os.path.exists(f"{fpath}.{name}.npy") for name in NeighborArrays.ARRAY_NAMES):
+        try:
+            return NeighborArrays.load(fpath)
+        except (OSError, ValueError):
+            pass
+
+    arrays = build()
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        arrays.save(fpath)
+    except OSError:
+        # The cache is only an optimization, so an unwritable
+        # cache directory should not stop the simulation
+        pass
+
+    return arrays
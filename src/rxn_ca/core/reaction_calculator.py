@@ -1,7 +1,6 @@
 import math
 import numpy as np
-import random
-from typing import Dict, List, Tuple
+from typing import Dict, List, Tuple, Union
 from pylattica.discrete.state_constants import DISCRETE_OCCUPANCY
 from pylattica.core.periodic_structure import PeriodicStructure
 from pylattica.core.constants import GENERAL, SITE_ID, SITES
@@ -10,22 +9,26 @@ from pylattica.structures.square_grid.neighborhoods import VonNeumannNbHood2DBui
 from pylattica.core.basic_controller import BasicController
 
 from .normalizers import normalize
-from ..phases.solid_phase_set import SolidPhaseSet
 from .reaction_result import ReactionResult
 from .constants import VOLUME, GASES_EVOLVED, REACTION_CHOSEN
-from ..reactions import ScoredReactionSet, ScoredReaction
+from ..reactions import ScoredReactionSet, ScoredReaction, CompiledReactionSet, ReactionHull
+from .array_state import ArraySimulationState
+from .rng import RandomStream
+from .interaction_kernel import BatchInteractionKernel
+from .site_coloring import MIN_MEAN_COLOR_SIZE, can_batch, color_sites
+from .neighbor_arrays import NeighborArrays, distance_weight
+from .stencil_neighborhood import StencilNeighborhood
 
 from dataclasses import dataclass, field
 from copy import copy
 
-def choose_from_list(choices, scores):
+def choose_from_list(choices, scores, rng: RandomStream):
     scores: np.array = np.array(scores)
     normalized: np.array = normalize(scores)
-    idxs: np.array = np.array(range(0,len(choices)))
 
-    chosen_idx = np.random.choice(idxs, p=normalized)
+    chosen_idx = int(np.searchsorted(np.cumsum(normalized), rng.random(), side="right"))
 
-    return choices[chosen_idx]    
+    return choices[min(chosen_idx, len(choices) - 1)]
 
 
 def scale_score_by_distance(score, distance):
@@ -41,6 +44,7 @@ class SiteInteraction:
     reactions: List[ScoredReaction] = field(default_factory=list)
     atmosphere_reactant: str = None
     is_no_op: bool = False
+    hull: ReactionHull = None
 
 class ReactionCalculator():
 
@@ -49,21 +53,363 @@ class ReactionCalculator():
         scored_rxns: ScoredReactionSet = None,
         inertia = 2.0,
         atmospheric_species = [],
+        rng: RandomStream = None,
+        every_neighbor_reacts: bool = False,
     ) -> None:
-        self.rxn_set = scored_rxns
         self.inertia = inertia
         self.neighborhood_graph = neighborhood_graph
+        self.neighbor_arrays: Union[NeighborArrays, StencilNeighborhood] = None
+        if isinstance(neighborhood_graph, (NeighborArrays, StencilNeighborhood)):
+            self.neighbor_arrays = neighborhood_graph
         self.atmospheric_species = copy(atmospheric_species)
+        self.rng = rng if rng is not None else RandomStream()
+
+        # If set, a visit considers the interactions of a site with all of its neighbors
+        # at once, rather than with one of them drawn at random. This changes the results
+        # of a simulation: the total score of the reactions at a site then grows with the
+        # size of its neighborhood, while the score of the no-ops does not
+        self.every_neighbor_reacts = every_neighbor_reacts
+
+        self.rxn_set = None
+        self.compiled_rxns: CompiledReactionSet = None
+        self._site_colors: List[np.ndarray] = None
+        self._batch_kernel: BatchInteractionKernel = None
+
+        # The chance that a visit to a site which considers each of its neighbors selects
+        # something other than a no-op only depends on the phases at that site and its
+        # neighbors, so it is kept, along with the phase of the site, until one of those
+        # sites changes. Nothing invalidates it when a state is changed directly, so only
+        # the runners, which apply the updates produced by the controllers, may change a
+        # state whose propensities have been requested
+        self._active_probs: Dict[int, Tuple[int, List[float]]] = {}
+        self._active_probs_state: SimulationState = None
+
+        if scored_rxns is not None:
+            self.set_rxn_set(scored_rxns)
+
+    def get_neighbor_arrays(self, num_sites: int) -> Union[NeighborArrays, StencilNeighborhood]:
+        """Returns the neighborhood in CSR form, flattening the neighborhood graph the
+        first time it is needed if the calculator was not given NeighborArrays or a
+        StencilNeighborhood. Neighbors are sorted by site ID, since the order in which a
+        neighborhood graph reports them depends on how it was built, and seeded runs must
+        be reproducible.
+
+        Args:
+            num_sites (int): The number of sites in the simulation
+
+        Returns:
+            Union[NeighborArrays, StencilNeighborhood]:
+        """
+        if self.neighbor_arrays is None:
+            self.neighbor_arrays = NeighborArrays.from_neighborhood(self.neighborhood_graph, num_sites)
+        return self.neighbor_arrays
+
+    def set_rng(self, rng: RandomStream):
+        self.rng = rng
 
     def set_rxn_set(self, rxn_set: ScoredReactionSet):
         self.rxn_set = rxn_set
+        self.compiled_rxns = rxn_set.compile(self.atmospheric_species)
+        self._active_probs = {}
+
+        # The total score of the interactions of each phase with a neighbor of each
+        # phase before weighting, and with the atmosphere, as plain lists
+        compiled = self.compiled_rxns
+        self._pair_scores: List[List[float]] = (compiled.pair_scores + compiled.pair_atmosphere_scores).tolist()
+        self._atmosphere_scores: List[float] = compiled.atmosphere_scores.sum(axis=1).tolist()
+        self._single_scores: List[float] = compiled.single_scores.tolist()
+
+    def invalidate_sites(self, site_ids: List[int]) -> None:
+        """Discards the cached propensities which depend on the given sites. Must be
+        called whenever these sites are about to change, which the calculator and
+        controllers do for every update they produce. A state whose propensities
+        are cached must not be changed in any other way, for instance by calling its
+        set_site_state or batch_update directly, or the propensities will be stale.
+
+        Args:
+            site_ids (List[int]): The sites which are changing
+        """
+        if len(self._active_probs) == 0:
+            return
+
+        for site_id in site_ids:
+            self._active_probs.pop(site_id, None)
+            for nb_id in self.dependent_sites(site_id):
+                self._active_probs.pop(nb_id, None)
 
     def get_state_update(self, site_id: int, prev_state: SimulationState):
-        updates = {}
-
         # Get the set of possible interactions - cell-cell reactions,cell-gas reactions and no-ops
         possible_interactions = self.possible_interactions_at_site(site_id, prev_state)
         selected_interaction = self.choose_interaction(possible_interactions)
+        return self.get_interaction_update(selected_interaction, prev_state)
+
+    def get_active_state_update(self, site_id: int, prev_state: SimulationState):
+        """Returns the updates resulting from a visit to this site, conditioned on
+        that visit not being a no-op. Used by the rejection free runner, which
+        accounts for the no-op visits separately.
+
+        Args:
+            site_id (int): The site being visited
+            prev_state (SimulationState): The current state of the simulation
+
+        Returns:
+            Dict: The updates
+        """
+        active_probs = self.neighbor_active_probabilities(site_id, prev_state)
+        total = sum(active_probs)
+
+        if total <= 0:
+            return {}
+
+        if self.every_neighbor_reacts:
+            interactions = self.possible_interactions_at_site(site_id, prev_state)
+        else:
+            # The neighbor considered is drawn in proportion to the chance that a visit
+            # which considers it selects something other than a no-op
+            threshold = self.rng.random() * total
+            nb_idx = len(active_probs) - 1
+            for idx, prob in enumerate(active_probs):
+                threshold -= prob
+                if threshold < 0:
+                    nb_idx = idx
+                    break
+
+            if self.get_neighbor_arrays(prev_state.size).degree(site_id) == 0:
+                nb_idx = None
+
+            interactions = self.interactions_with_neighbor(site_id, prev_state, nb_idx)
+
+        possible_interactions = [
+            interaction for interaction in interactions
+            if not interaction.is_no_op
+        ]
+
+        if len(possible_interactions) == 0:
+            return {}
+
+        selected_interaction = self.choose_interaction(possible_interactions)
+        return self.get_interaction_update(selected_interaction, prev_state)
+
+    def get_site_propensity(self, site_id: int, state: SimulationState) -> float:
+        """Returns the probability that a visit to this site selects an interaction
+        other than a no-op.
+
+        Args:
+            site_id (int): The site of interest
+            state (SimulationState): The current state of the simulation
+
+        Returns:
+            float:
+        """
+        active_probs = self.neighbor_active_probabilities(site_id, state)
+        return sum(active_probs) / len(active_probs)
+
+    def neighbor_active_probabilities(self, site_id: int, state: SimulationState) -> List[float]:
+        """Returns, for each neighbor of a site, the probability that a visit to the
+        site which considers that neighbor selects an interaction other than a no-op.
+        These are cached per site until the site or one of its neighbors changes, so
+        the returned list must not be modified. See invalidate_sites.
+
+        Args:
+            site_id (int): The site of interest
+            state (SimulationState): The current state of the simulation
+
+        Returns:
+            List[float]: One probability per neighbor, or a single probability if
+            the site has no neighbors or if every neighbor reacts
+        """
+        if state is not self._active_probs_state:
+            self._active_probs = {}
+            self._active_probs_state = state
+
+        phase_id = self.compiled_rxns.phase_id(state.get_site_state(site_id)[DISCRETE_OCCUPANCY])
+
+        cached = self._active_probs.get(site_id)
+        if cached is not None:
+            cached_phase_id, active_probs = cached
+            # Catches sites changed without invalidate_sites being called, though
+            # only if the site itself changed rather than one of its neighbors
+            assert cached_phase_id == phase_id, \
+                f"Site {site_id} changed without invalidate_sites being called"
+            return active_probs
+
+        active_probs = self._enumerate_active_probabilities(site_id, phase_id, state)
+        self._active_probs[site_id] = (phase_id, active_probs)
+        return active_probs
+
+    def _enumerate_active_probabilities(self, site_id: int, phase_id: int, state: SimulationState) -> List[float]:
+        compiled = self.compiled_rxns
+
+        no_op_score = 2 * self.inertia
+        decomp_score = self._single_scores[phase_id]
+        atmosphere_score = self._atmosphere_scores[phase_id]
+        pair_scores = self._pair_scores[phase_id]
+
+        nb_scores = []
+        for nb_id, weight in self.get_neighbor_arrays(state.size).weighted_neighbors(site_id):
+            nb_phase_id = compiled.phase_id(state.get_site_state(nb_id)[DISCRETE_OCCUPANCY])
+            nb_score = pair_scores[nb_phase_id] * weight
+            if nb_phase_id == compiled.free_space_id:
+                nb_score += atmosphere_score
+            nb_scores.append(nb_score)
+
+        if self.every_neighbor_reacts or len(nb_scores) == 0:
+            active_scores = [sum(nb_scores) + decomp_score]
+        else:
+            active_scores = [nb_score + decomp_score for nb_score in nb_scores]
+
+        return [
+            active_score / (active_score + no_op_score) if active_score > 0 else 0.0
+            for active_score in active_scores
+        ]
+
+    def is_site_active(self, site_id: int, state: SimulationState) -> bool:
+        """Returns whether any interaction other than a no-op is possible at this
+        site. This only depends on which reactions exist between the phase at the
+        site and the phases around it, so it is much cheaper to evaluate than the
+        propensity of the site.
+
+        Args:
+            site_id (int): The site of interest
+            state (SimulationState): The current state of the simulation
+
+        Returns:
+            bool:
+        """
+        compiled = self.compiled_rxns
+        phase_id = compiled.phase_id(state.get_site_state(site_id)[DISCRETE_OCCUPANCY])
+
+        if not compiled.phase_possible[phase_id]:
+            return False
+
+        if compiled.single_hulls[phase_id] is not None:
+            return True
+
+        pair_hulls = compiled.pair_hulls[phase_id]
+        pair_atmosphere_hulls = compiled.pair_atmosphere_hulls[phase_id]
+        atmosphere_possible = any(hull is not None for hull in compiled.atmosphere_hulls[phase_id])
+
+        for nb_id in self.get_neighbor_arrays(state.size).neighbor_ids(site_id):
+            nb_phase_id = compiled.phase_id(state.get_site_state(nb_id)[DISCRETE_OCCUPANCY])
+            if pair_hulls[nb_phase_id] is not None or pair_atmosphere_hulls[nb_phase_id] is not None:
+                return True
+            if atmosphere_possible and nb_phase_id == compiled.free_space_id:
+                return True
+
+        return False
+
+    def dependent_sites(self, site_id: int) -> List[int]:
+        """Returns the sites whose possible interactions depend on the
+        state of this site.
+
+        Args:
+            site_id (int): The site of interest
+
+        Returns:
+            List[int]:
+        """
+        return self.neighbor_arrays.neighbor_ids(site_id)
+
+    def get_site_colors(self, site_ids: List[int]) -> List[np.ndarray]:
+        """Returns groups of sites whose updates do not interact, so that all
+        of the sites in a group can be updated at the same time.
+
+        The neighborhood must be small enough that the groups have at least
+        MIN_MEAN_COLOR_SIZE sites on average (see can_batch). In a large neighborhood,
+        such as the radius 5 neighborhood of the ReactionController, almost every
+        group holds a single site, so no groups are returned.
+
+        Args:
+            site_ids (List[int]): The sites in the simulation
+
+        Returns:
+            List[np.ndarray]: The groups, or an empty list if the groups would be too small
+        """
+        if self._site_colors is None:
+            neighbors = self.get_neighbor_arrays(len(site_ids))
+            colors = []
+            if can_batch(neighbors, len(site_ids)):
+                colors = color_sites(neighbors, site_ids)
+            if len(colors) > 0 and len(site_ids) / len(colors) < MIN_MEAN_COLOR_SIZE:
+                colors = []
+            self._site_colors = colors
+        return self._site_colors
+
+    def get_batch_state_updates(self, site_ids: np.ndarray, state: ArraySimulationState):
+        """Selects interactions for a group of non-interacting sites at once, and
+        then yields the updates for each site in turn. Each update must be applied
+        to the state before the next one is requested so that the evolved gases
+        are accounted for correctly.
+
+        Args:
+            site_ids (np.ndarray): A group of non-interacting sites
+            state (ArraySimulationState): The current state of the simulation
+
+        Yields:
+            Tuple[int, Dict]: The site visited and the resulting updates
+        """
+        choices = self.get_batch_kernel(state.size).choose(site_ids, state, self.compiled_rxns, self.inertia, self.rng)
+        yield from self.get_chosen_state_updates(site_ids, choices, state)
+
+    def get_batch_kernel(self, num_sites: int) -> BatchInteractionKernel:
+        if self._batch_kernel is None or self._batch_kernel.num_sites != num_sites:
+            self._batch_kernel = BatchInteractionKernel(self.get_neighbor_arrays(num_sites), self.every_neighbor_reacts)
+        return self._batch_kernel
+
+    def get_chosen_state_updates(self, site_ids: np.ndarray, choices: List, state: ArraySimulationState):
+        """Yields the updates for interactions which have already been chosen by a
+        BatchInteractionKernel, in the same way as get_batch_state_updates.
+
+        Args:
+            site_ids (np.ndarray): A group of non-interacting sites
+            choices (List): The interaction chosen for each site
+            state (ArraySimulationState): The current state of the simulation
+
+        Yields:
+            Tuple[int, Dict]: The site visited and the resulting updates
+        """
+        for site_id, choice in zip(site_ids.tolist(), choices):
+            interaction = self._interaction_from_choice(site_id, choice, state)
+            yield site_id, self.get_interaction_update(interaction, state)
+
+    def _interaction_from_choice(self, site_id: int, choice: Tuple, state: ArraySimulationState) -> SiteInteraction:
+        kind, nb_id, species_idx = choice
+
+        if kind == BatchInteractionKernel.NO_OP:
+            return SiteInteraction(is_no_op=True, score=self.inertia)
+
+        compiled = self.compiled_rxns
+        site_state = state.get_site_state(site_id)
+        site_phase_id = compiled.phase_id(site_state[DISCRETE_OCCUPANCY])
+
+        if kind == BatchInteractionKernel.DECOMPOSITION:
+            hull = compiled.single_hulls[site_phase_id]
+            site_states = [site_state]
+            atmosphere_reactant = None
+        elif kind == BatchInteractionKernel.ATMOSPHERE:
+            hull = compiled.atmosphere_hulls[site_phase_id][species_idx]
+            site_states = [site_state]
+            atmosphere_reactant = compiled.atmospheric_species[species_idx]
+        else:
+            nb_state = state.get_site_state(nb_id)
+            nb_phase_id = compiled.phase_id(nb_state[DISCRETE_OCCUPANCY])
+            if kind == BatchInteractionKernel.PAIR_ATMOSPHERE:
+                hull = compiled.pair_atmosphere_hulls[site_phase_id][nb_phase_id]
+            else:
+                hull = compiled.pair_hulls[site_phase_id][nb_phase_id]
+            site_states = [site_state, nb_state]
+            atmosphere_reactant = None
+
+        return SiteInteraction(
+            site_states=site_states,
+            reactions=hull.reactions,
+            hull=hull,
+            atmosphere_reactant=atmosphere_reactant,
+            score=hull.score
+        )
+
+    def get_interaction_update(self, selected_interaction: SiteInteraction, prev_state: SimulationState):
+        updates = {}
 
         if selected_interaction.is_no_op:
             return updates
@@ -73,9 +419,12 @@ class ReactionCalculator():
 
         # Select a reaction - recall the convex reaction hull: there are often
         # many possible reactions between two precursors
-        rxns: List[ScoredReaction] = selected_interaction.reactions
-        selected_reaction: ScoredReaction = choose_from_list(rxns, [rxn.competitiveness for rxn in rxns])
-        selected_reaction_id: int = self.rxn_set.get_rxn_id(selected_reaction)
+        if selected_interaction.hull is not None:
+            selected_reaction, selected_reaction_id = selected_interaction.hull.sample(self.rng.random())
+        else:
+            rxns: List[ScoredReaction] = selected_interaction.reactions
+            selected_reaction: ScoredReaction = choose_from_list(rxns, [rxn.competitiveness for rxn in rxns], self.rng)
+            selected_reaction_id: int = self.rxn_set.get_rxn_id(selected_reaction)
         updates[GENERAL][REACTION_CHOSEN] = selected_reaction_id
 
         # Proceed this reaction at all relevant site states
@@ -87,7 +436,7 @@ class ReactionCalculator():
             if not self.should_reaction_proceed(selected_reaction, site_species, site_vol):
                 continue
 
-            product_phase  = self.get_product_from_reaction(selected_reaction)
+            product_phase  = self.get_product_from_reaction(selected_reaction, selected_reaction_id)
             product_volume = selected_reaction.convert_reactant_amt_to_product_amt(site_species, site_vol, product_phase)
 
             # If it's a gaseous product, do some accounting to maintain mass balance
@@ -108,78 +457,121 @@ class ReactionCalculator():
                     DISCRETE_OCCUPANCY: product_phase,
                     VOLUME: product_volume
                 }
-            
+
+        self.invalidate_sites(updates[SITES].keys())
         return updates
 
-    def possible_interactions_at_site(self, site_one_id: int, state: SimulationState):
+    def possible_interactions_at_site(self, site_one_id: int, state: SimulationState) -> List[SiteInteraction]:
+        """Returns the interactions which a visit to this site could select. A visit
+        considers the interactions of the site with one of its neighbors, drawn uniformly
+        at random, as well as its decomposition and the no-ops. If every_neighbor_reacts
+        is set, the interactions with all of its neighbors are considered instead.
+
+        Considering one neighbor is how the original implementation behaved: the
+        interactions found with each neighbor replaced those of the one before, so only
+        those of the last neighbor reported by the neighborhood graph were candidates,
+        and the graph reports the neighbors of a site in a different order every time
+        they are requested.
+
+        Args:
+            site_one_id (int): The site of interest
+            state (SimulationState): The current state of the simulation
+
+        Returns:
+            List[SiteInteraction]:
+        """
+        neighbors = self.get_neighbor_arrays(state.size)
+        if self.every_neighbor_reacts:
+            return self._visit_interactions(site_one_id, state, neighbors.weighted_neighbors(site_one_id))
+
+        degree = neighbors.degree(site_one_id)
+        nb_idx = self.rng.randrange(degree) if degree > 0 else None
+        return self.interactions_with_neighbor(site_one_id, state, nb_idx)
+
+    def interactions_with_neighbor(self, site_one_id: int, state: SimulationState, nb_idx: int) -> List[SiteInteraction]:
+        """Returns the interactions which a visit to this site could select if it
+        considers the given neighbor.
+
+        Args:
+            site_one_id (int): The site of interest
+            state (SimulationState): The current state of the simulation
+            nb_idx (int): The position of the neighbor among those of the site, or
+            None if the site has no neighbors
+
+        Returns:
+            List[SiteInteraction]:
+        """
+        if nb_idx is None:
+            neighbors = []
+        else:
+            neighbors = [self.get_neighbor_arrays(state.size).weighted_neighbor(site_one_id, nb_idx)]
+        return self._visit_interactions(site_one_id, state, neighbors)
+
+    def _visit_interactions(self, site_one_id: int, state: SimulationState, neighbors) -> List[SiteInteraction]:
+        compiled = self.compiled_rxns
         site_one_state = state.get_site_state(site_one_id)
-        site_one_phase = site_one_state[DISCRETE_OCCUPANCY]
+        site_one_phase_id = compiled.phase_id(site_one_state[DISCRETE_OCCUPANCY])
 
-        # Look through neighborhood, enumerate possible reactions
-        possible_interactions = []
+        pair_hulls = compiled.pair_hulls[site_one_phase_id]
+        pair_atmosphere_hulls = compiled.pair_atmosphere_hulls[site_one_phase_id]
 
-        any_neighboring_free_space = False
-        for nb_id in self.neighborhood_graph.neighbors_of(site_one_id, include_weights=False):
-            site_two_state = state.get_site_state(nb_id)
-            site_two_phase = site_two_state[DISCRETE_OCCUPANCY]
-            if site_two_phase is SolidPhaseSet.FREE_SPACE:
-                any_neighboring_free_space = True
+        # Enumerate the possible reactions with the neighbors considered
+        possible_interactions = []
 
+        interactions = []
 
-        for nb_id, distance in self.neighborhood_graph.neighbors_of(site_one_id, include_weights=True):
+        for nb_id, weight in neighbors:
             site_two_state = state.get_site_state(nb_id)
-            site_two_phase = site_two_state[DISCRETE_OCCUPANCY]
-            interactions = []
+            site_two_phase_id = compiled.phase_id(site_two_state[DISCRETE_OCCUPANCY])
 
-            possible_solid_solid_gas_rxns = []
-            for spec in self.atmospheric_species:
-                possible_solid_solid_gas_rxns.extend(self.rxn_set.get_reactions([site_one_phase, site_two_phase, spec]))
+            solid_solid_gas_hull = pair_atmosphere_hulls[site_two_phase_id]
 
-            if len(possible_solid_solid_gas_rxns) > 0:
-                interaction_score = self.adjust_score_for_distance(possible_solid_solid_gas_rxns[0].competitiveness, distance)
-                interactions.extend([SiteInteraction(
+            if solid_solid_gas_hull is not None:
+                interaction_score = solid_solid_gas_hull.score * weight
+                interactions.append(SiteInteraction(
                     site_states=[site_one_state, site_two_state],
-                    reactions=possible_solid_solid_gas_rxns,
+                    reactions=solid_solid_gas_hull.reactions,
+                    hull=solid_solid_gas_hull,
                     atmosphere_reactant=None,
                     score=interaction_score
-                )])            
-                
+                ))
 
             # Case 1) A neighboring empty site - if there are any gaseous phases present, now is the time to REACT!
 
-            if site_two_phase == SolidPhaseSet.FREE_SPACE:
+            if site_two_phase_id == compiled.free_space_id:
                 interactions.extend(self.atmospheric_interactions(site_one_state))
+
             # Case 2) There are stoichiometrically plausible reactions between these two phases
 
-            possible_ss_reactions = self.rxn_set.get_reactions([site_two_phase, site_one_phase])
+            solid_solid_hull = pair_hulls[site_two_phase_id]
 
-            if len(possible_ss_reactions) > 0:
-                interaction_score = self.adjust_score_for_distance(possible_ss_reactions[0].competitiveness, distance)
-                interactions.extend([SiteInteraction(
+            if solid_solid_hull is not None:
+                interaction_score = solid_solid_hull.score * weight
+                interactions.append(SiteInteraction(
                     site_states=[site_one_state, site_two_state],
-                    reactions=possible_ss_reactions,
+                    reactions=solid_solid_hull.reactions,
+                    hull=solid_solid_hull,
                     atmosphere_reactant=None,
                     score=interaction_score
-                )])
-             # Case 3) No reactions of any kind are plausible
-            # else:
+                ))
+            # Case 3) No reactions of any kind are plausible
+
         possible_interactions.append(SiteInteraction(
             is_no_op=True,
             score=self.inertia
         ))
 
-        # print([i.score for i in interactions])
-        
         possible_interactions.extend(interactions)
 
         # It's possible that a square might just dissolve as well
-        decomp_rxns = self.rxn_set.get_reactions([site_one_phase])
+        decomp_hull = compiled.single_hulls[site_one_phase_id]
 
-        if len(decomp_rxns) > 0:
-            interaction_score = self.adjust_score_for_distance(decomp_rxns[0].competitiveness, 1)
+        if decomp_hull is not None:
+            interaction_score = decomp_hull.score
             decomp_interaction = SiteInteraction(
                 site_states=[site_one_state],
-                reactions=decomp_rxns,
+                reactions=decomp_hull.reactions,
+                hull=decomp_hull,
                 atmosphere_reactant=None,
                 score=interaction_score
             )
@@ -194,16 +586,17 @@ class ReactionCalculator():
         return possible_interactions
 
     def atmospheric_interactions(self, site_state: Dict):
-        site_phase = site_state[DISCRETE_OCCUPANCY]
+        compiled = self.compiled_rxns
+        site_phase_id = compiled.phase_id(site_state[DISCRETE_OCCUPANCY])
         interactions = []
 
-        for specie in self.atmospheric_species:
-            rxns = self.rxn_set.get_reactions([site_phase, specie])
-            if len(rxns) > 0:
-                interaction_score = self.adjust_score_for_distance(rxns[0].competitiveness, 1)
+        for specie, hull in zip(compiled.atmospheric_species, compiled.atmosphere_hulls[site_phase_id]):
+            if hull is not None:
+                interaction_score = hull.score
                 interactions.append(SiteInteraction(
                     site_states=[site_state],
-                    reactions=rxns,
+                    reactions=hull.reactions,
+                    hull=hull,
                     atmosphere_reactant=specie,
                     score=interaction_score
                 ))
@@ -211,10 +604,19 @@ class ReactionCalculator():
         return interactions
 
     def choose_interaction(self, interactions: List[SiteInteraction]) -> SiteInteraction:
-        scores: list[float] = [
-            interaction.score for interaction in interactions
-        ]
-        return choose_from_list(interactions, scores)
+        # The list only holds the interactions considered by a single visit, so it
+        # is short and a linear scan is cheaper than building arrays to sample from
+        total_score = 0.0
+        for interaction in interactions:
+            total_score += interaction.score
+
+        threshold = self.rng.random() * total_score
+        for interaction in interactions:
+            threshold -= interaction.score
+            if threshold < 0:
+                return interaction
+
+        return interactions[-1]
     
     def should_reaction_proceed(self, rxn: ScoredReaction, reactant_phase: str, reactant_vol: float) -> Dict:
         stoich_fraction = rxn.solid_reactant_stoich_fraction(reactant_phase)
@@ -222,14 +624,12 @@ class ReactionCalculator():
         # the size of that cell - it should take twice as many "tries" to consume twice as much
         # volume
         adjusted = stoich_fraction / reactant_vol
-        return random.random() < adjusted
+        return self.rng.random() < adjusted
     
-    def get_product_from_reaction(self, rxn: ScoredReaction) -> Dict:
-        products = list(rxn.products)
-        product_stoich_coeffs = np.array([rxn.product_stoich(p) for p in products])
-        likelihoods: np.array = product_stoich_coeffs / product_stoich_coeffs.sum()
-        new_phase_name = str(np.random.choice(products, p=likelihoods))
-        return new_phase_name
+    def get_product_from_reaction(self, rxn: ScoredReaction, rxn_id: int = None) -> str:
+        if rxn_id is None:
+            rxn_id = self.rxn_set.get_rxn_id(rxn)
+        return self.compiled_rxns.sample_product(rxn_id, self.rng.random())
 
     def adjust_score_for_distance(self, score, distance):
-        return score * 1 / distance ** 3
+        return score * distance_weight(distance)
@@ -1,3 +1,5 @@
+from typing import Union
+
 from pylattica.core.periodic_structure import PeriodicStructure
 from pylattica.core.simulation_state import SimulationState
 from pylattica.structures.square_grid.neighborhoods import VonNeumannNbHood2DBuilder, VonNeumannNbHood3DBuilder
@@ -6,6 +8,10 @@ from pylattica.core.basic_controller import BasicController
 from .reaction_result import ReactionResult
 from ..reactions import ScoredReactionSet
 from .reaction_calculator import ReactionCalculator
+from .rng import RandomStream
+from .neighbor_arrays import NeighborArrays
+from .neighborhood_cache import load_or_build, neighborhood_cache_key
+from .stencil_neighborhood import StencilNeighborhood, VonNeumannStencilBuilder
 
 NB_HOOD_RADIUS = 5
 
@@ -30,6 +36,22 @@ class ReactionController(BasicController):
     def get_neighborhood_from_structure(cls, structure: PeriodicStructure):
         return cls.get_neighborhood_builder_from_structure(structure).get(structure)
 
+    @classmethod
+    def get_neighbor_arrays_from_structure(cls, structure: PeriodicStructure) -> NeighborArrays:
+        num_sites = len(structure.site_ids)
+        return load_or_build(
+            neighborhood_cache_key(structure.dim, num_sites, cls.__name__, NB_HOOD_RADIUS),
+            lambda: NeighborArrays.from_neighborhood(cls.get_neighborhood_from_structure(structure), num_sites)
+        )
+
+    @classmethod
+    def get_stencil_from_structure(cls, structure: PeriodicStructure) -> Union[StencilNeighborhood, NeighborArrays]:
+        """Returns the same neighborhood as get_neighborhood_from_structure without building
+        the neighborhood graph. Falls back to NeighborArrays if the grid is too small for the
+        neighborhood to be expressed as a stencil.
+        """
+        return VonNeumannStencilBuilder(NB_HOOD_RADIUS, structure.dim).get(structure)
+
     def __init__(self,
         structure: PeriodicStructure,
         rxn_calculator: ReactionCalculator,
@@ -37,11 +59,39 @@ class ReactionController(BasicController):
         self.reaction_calculator = rxn_calculator
         self.structure = structure
 
+    @property
+    def rng(self) -> RandomStream:
+        return self.reaction_calculator.rng
+
+    def set_rng(self, rng: RandomStream):
+        self.reaction_calculator.set_rng(rng)
+
     def set_rxn_set(self, rxn_set: ScoredReactionSet):
         self.reaction_calculator.set_rxn_set(rxn_set)
 
     def instantiate_result(self, starting_state: SimulationState):
         return ReactionResult(starting_state)
 
+    def get_random_site(self, state: SimulationState):
+        return self.rng.randrange(state.size)
+
     def get_state_update(self, site_id: int, prev_state: SimulationState):
-        return self.reaction_calculator.get_state_update(site_id, prev_state)
\ No newline at end of file
+        return self.reaction_calculator.get_state_update(site_id, prev_state)
+
+    def get_site_propensity(self, site_id: int, state: SimulationState) -> float:
+        return self.reaction_calculator.get_site_propensity(site_id, state)
+
+    def get_active_state_update(self, site_id: int, prev_state: SimulationState):
+        return self.reaction_calculator.get_active_state_update(site_id, prev_state)
+
+    def is_site_active(self, site_id: int, state: SimulationState) -> bool:
+        return self.reaction_calculator.is_site_active(site_id, state)
+
+    def dependent_sites(self, site_id: int):
+        return self.reaction_calculator.dependent_sites(site_id)
+
+    def get_site_colors(self, site_ids):
+        return self.reaction_calculator.get_site_colors(site_ids)
+
+    def get_batch_state_updates(self, site_ids, state):
+        return self.reaction_calculator.get_batch_state_updates(site_ids, state)
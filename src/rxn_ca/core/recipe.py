@@ -5,6 +5,12 @@ from typing import Dict, List
 from ..utilities.helpers import format_chem_sys
 from ..reactions.scorers import TammanHuttigScoreErf, TammanHuttigScoreExponential, TammanHuttigScoreSoftplus
 from ..phases.solid_phase_set import process_composition_dict, process_composition_list
+from .kmc_runner import RejectionFreeRunner
+from .batch_runner import ColoredBatchRunner
+from .frontier_runner import FrontierRunner
+from .domain_runner import DomainDecompositionRunner
+
+from pylattica.core import AsynchronousRunner
 
 import json
 
@@ -25,6 +31,33 @@ _SCORE_TYPE_MAP = {
 }
 
 
+class EngineTypes(str, Enum):
+
+    ASYNCHRONOUS = "ASYNCHRONOUS"
+    REJECTION_FREE = "REJECTION_FREE"
+    COLORED_BATCH = "COLORED_BATCH"
+    FRONTIER = "FRONTIER"
+    ENSEMBLE = "ENSEMBLE"
+    DOMAIN_DECOMPOSITION = "DOMAIN_DECOMPOSITION"
+
+
+_ENGINE_TYPE_MAP = {
+    EngineTypes.ASYNCHRONOUS: AsynchronousRunner,
+    EngineTypes.REJECTION_FREE: RejectionFreeRunner,
+    # Only batches small neighborhoods, like that of the LiquidSwapController, and
+    # runs larger ones asynchronously (see site_coloring.can_batch)
+    EngineTypes.COLORED_BATCH: ColoredBatchRunner,
+    EngineTypes.FRONTIER: FrontierRunner,
+    # Each realization matches the colored batch engine run on its own, so
+    # run_sim_parallel runs them in its worker pool like any other engine.
+    # Running them together in one process with run_ensemble is experimental
+    EngineTypes.ENSEMBLE: ColoredBatchRunner,
+    # Needs a grid at least 8 sites on a side with the LiquidSwapController (40 with
+    # the radius 5 ReactionController), and runs smaller grids asynchronously
+    EngineTypes.DOMAIN_DECOMPOSITION: DomainDecompositionRunner,
+}
+
+
 @dataclass
 class ReactionRecipe(MSONable):
 
@@ -41,6 +74,13 @@ class ReactionRecipe(MSONable):
     atmospheric_phases: List[str] = field(default_factory=list)
     packing_fraction: float = 1.0
     name: str = None
+    engine: str = EngineTypes.ASYNCHRONOUS
+    seed: int = None
+    equilibrium_window: int = None
+    equilibrium_tolerance: float = None
+    # Lets every neighbor of a site react during a visit, rather than one drawn at
+    # random. Changes the results of a recipe, so it is off unless asked for
+    every_neighbor_reacts: bool = False
     
     def __post_init__(self):
         self.reactant_amounts = process_composition_dict(self.reactant_amounts)
@@ -54,6 +94,9 @@ class ReactionRecipe(MSONable):
     def get_score_class(self):
         return _SCORE_TYPE_MAP[self.score_type]
 
+    def get_runner(self):
+        return _ENGINE_TYPE_MAP[self.engine]()
+
     @classmethod
     def from_file(self, fname: str):
         with open(fname, 'rb') as f:
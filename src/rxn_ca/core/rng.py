@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+from typing import Dict, List, Sequence, Union
+
+import numpy as np
+
+
+class RandomStream():
+    """The source of randomness for one realization of a simulation.
+
+    Wraps a numpy Generator and hands out scalar uniforms from blocks that are
+    drawn ahead of time, which is much cheaper than a call into numpy (or a
+    reseed) per draw. Vectorized draws go directly to the generator. Independent
+    streams for parallel realizations are derived from the seed sequence of a
+    parent stream.
+    """
+
+    BLOCK_SIZE = 4096
+
+    @classmethod
+    def from_seed_info(cls, seed_info: Dict) -> RandomStream:
+        """Recreates a stream from the output of seed_info
+
+        Args:
+            seed_info (Dict): The entropy and spawn key of the stream
+
+        Returns:
+            RandomStream:
+        """
+        return cls(np.random.SeedSequence(
+            seed_info["entropy"],
+            spawn_key=tuple(seed_info["spawn_key"])
+        ))
+
+    def __init__(self, seed: Union[int, np.random.SeedSequence] = None, block_size: int = BLOCK_SIZE):
+        """Initializes a RandomStream
+
+        Args:
+            seed (Union[int, np.random.SeedSequence], optional): The seed for this stream.
+            If None, fresh entropy is drawn from the operating system.
+            block_size (int, optional): The number of uniforms to draw at a time.
+        """
+        if not isinstance(seed, np.random.SeedSequence):
+            seed = np.random.SeedSequence(seed)
+
+        self.seed_sequence: np.random.SeedSequence = seed
+        self.generator: np.random.Generator = np.random.default_rng(seed)
+        self.block_size = block_size
+        self._uniforms = iter(())
+
+    def random(self) -> float:
+        """Returns a uniform random number in [0, 1)
+
+        Returns:
+            float:
+        """
+        try:
+            return next(self._uniforms)
+        except StopIteration:
+            self._uniforms = iter(self.generator.random(self.block_size).tolist())
+            return next(self._uniforms)
+
+    def randrange(self, stop: int) -> int:
+        """Returns a random integer in [0, stop)
+
+        Args:
+            stop (int): The exclusive upper bound
+
+        Returns:
+            int:
+        """
+        return min(int(self.random() * stop), stop - 1)
+
+    def choice(self, seq: Sequence):
+        return seq[self.randrange(len(seq))]
+
+    def shuffle(self, seq: List) -> None:
+        """Shuffles the supplied list in place
+
+        Args:
+            seq (List): The list to shuffle
+        """
+        for i in range(len(seq) - 1, 0, -1):
+            j = self.randrange(i + 1)
+            seq[i], seq[j] = seq[j], seq[i]
+
+    def uniforms(self, size: int) -> np.ndarray:
+        return self.generator.random(size)
+
+    @property
+    def seed_info(self) -> Dict:
+        """A JSON serializable description of the seed of this stream, from
+        which the stream can be recreated exactly, even if it was seeded from
+        fresh entropy.
+
+        Returns:
+            Dict:
+        """
+        return {
+            "entropy": self.seed_sequence.entropy,
+            "spawn_key": list(self.seed_sequence.spawn_key),
+        }
+
+    def spawn(self, num_streams: int) -> List[RandomStream]:
+        """Creates independent child streams, for instance one per realization
+
+        Args:
+            num_streams (int): The number of streams to create
+
+        Returns:
+            List[RandomStream]:
+        """
+        return [RandomStream(seq, block_size=self.block_size) for seq in self.seed_sequence.spawn(num_streams)]
@@ -0,0 +1,75 @@
+from typing import Dict, List, Set
+
+import numpy as np
+
+from .neighbor_arrays import NeighborArrays
+
+# Coloring takes time proportional to the square of the number of neighbors of
+# a site, so it is only done for small neighborhoods, like that of the
+# LiquidSwapController, and not for the radius 5 neighborhood of the ReactionController
+MAX_COLORING_DEGREE = 32
+
+# Colors with fewer sites than this on average do not pay for selecting the
+# interactions of all of their sites at once with NumPy
+MIN_MEAN_COLOR_SIZE = 8
+
+
+def can_batch(neighborhood: NeighborArrays, num_sites: int) -> bool:
+    """Returns whether the sites can be colored into groups that are large
+    enough to be worth updating together. A site and its neighbors must all have
+    different colors, so there are more colors than any site has neighbors, and
+    the mean size of a color can be bounded before the sites are colored.
+
+    Args:
+        neighborhood (NeighborArrays): The neighborhood used by the update rule
+        num_sites (int): The number of sites
+
+    Returns:
+        bool:
+    """
+    max_degree = max((neighborhood.degree(site_id) for site_id in range(num_sites)), default=0)
+    if max_degree > MAX_COLORING_DEGREE:
+        return False
+    return num_sites / (max_degree + 1) >= MIN_MEAN_COLOR_SIZE
+
+
+def color_sites(neighborhood: NeighborArrays, site_ids: List[int]) -> List[np.ndarray]:
+    """Partitions the sites into groups which can be updated at the same time.
+
+    An update at a site reads the state of that site and its neighbors, and may
+    write to any of them, so two sites can only be updated together if their
+    neighborhoods (including the sites themselves) do not overlap. This is a
+    distance-2 coloring of the neighborhood graph, which is computed greedily.
+    It takes time proportional to the number of sites times the square of the
+    number of neighbors of each, so check can_batch first.
+
+    Args:
+        neighborhood (NeighborArrays): The neighborhood used by the update rule
+        site_ids (List[int]): The sites to color
+
+    Returns:
+        List[np.ndarray]: The site IDs of each color
+    """
+    neighbors: Dict[int, Set[int]] = {
+        site_id: set(neighborhood.neighbor_ids(site_id)) for site_id in site_ids
+    }
+
+    site_colors: Dict[int, int] = {}
+    for site_id in site_ids:
+        conflicts = set(neighbors[site_id])
+        for nb_id in neighbors[site_id]:
+            conflicts.update(neighbors.get(nb_id, ()))
+        conflicts.discard(site_id)
+
+        taken = { site_colors[other] for other in conflicts if other in site_colors }
+        color = 0
+        while color in taken:
+            color += 1
+        site_colors[site_id] = color
+
+    num_colors = max(site_colors.values()) + 1 if len(site_colors) > 0 else 0
+    groups = [[] for _ in range(num_colors)]
+    for site_id, color in site_colors.items():
+        groups[color].append(site_id)
+
+    return [np.array(group, dtype=int) for group in groups]
@@ -0,0 +1,291 @@
+from __future__ import annotations
+
+import hashlib
+from typing import Iterator, List, Sequence, Tuple, Union
+
+import numpy as np
+
+from pylattica.core.periodic_structure import PeriodicStructure
+from pylattica.core.neighborhood_builders import MotifNeighborhoodBuilder
+
+from .neighbor_arrays import NeighborArrays, distance_weight
+from .neighborhood_cache import load_or_build, neighborhood_cache_key
+from .rng import RandomStream
+
+
+def von_neumann_offsets(size: int, dim: int) -> List[Tuple[int, ...]]:
+    """Returns the offsets within the given Manhattan distance of a site,
+    excluding the site itself.
+
+    Args:
+        size (int): The radius of the neighborhood
+        dim (int): The dimension of the grid
+
+    Returns:
+        List[Tuple[int, ...]]:
+    """
+    axis = np.arange(-size, size + 1)
+    points = np.stack(np.meshgrid(*[axis] * dim, indexing="ij"), axis=-1).reshape(-1, dim)
+    manhattan = np.abs(points).sum(axis=1)
+    return [tuple(p) for p in points[(manhattan <= size) & (manhattan > 0)].tolist()]
+
+
+def moore_offsets(size: int, dim: int) -> List[Tuple[int, ...]]:
+    """Returns the offsets within a cube of the given half-width around a
+    site, excluding the site itself.
+
+    Args:
+        size (int): The radius of the neighborhood
+        dim (int): The dimension of the grid
+
+    Returns:
+        List[Tuple[int, ...]]:
+    """
+    axis = np.arange(-size, size + 1)
+    points = np.stack(np.meshgrid(*[axis] * dim, indexing="ij"), axis=-1).reshape(-1, dim)
+    return [tuple(p) for p in points[np.any(points != 0, axis=1)].tolist()]
+
+
+_PSEUDO_HEXAGONAL_2D = [
+    [(1, 0), (0, 1), (-1, 0), (0, -1), (1, 1), (-1, -1)],
+    [(1, 0), (0, 1), (-1, 0), (0, -1), (-1, 1), (1, -1)],
+]
+
+_CUBIC_3D = [(1, 0, 0), (-1, 0, 0), (0, 1, 0), (0, -1, 0), (0, 0, 1), (0, 0, -1)]
+
+_PSEUDO_HEXAGONAL_3D = [
+    [*_CUBIC_3D, (-1, -1, 1), (1, 1, -1)],
+    [*_CUBIC_3D, (-1, 1, 1), (1, -1, -1)],
+    [*_CUBIC_3D, (1, 1, 1), (-1, -1, -1)],
+    [*_CUBIC_3D, (1, -1, 1), (-1, 1, -1)],
+]
+
+
+class StencilNeighborhood():
+    """The neighborhood of a periodic square or cubic grid, stored as a fixed set
+    of offsets rather than as a list of neighbors for every site. The neighbors
+    of a site are resolved from its grid coordinates with modular arithmetic when
+    they are requested, so the memory used does not grow with the number of sites.
+
+    Provides the same interface as NeighborArrays. Neighbors are reported in the
+    order of the offsets.
+    """
+
+    @classmethod
+    def from_structure(cls, structure: PeriodicStructure, offsets: Sequence[Sequence[int]]) -> StencilNeighborhood:
+        """Lays the stencil over a periodic grid structure
+
+        Args:
+            structure (PeriodicStructure): A square or cubic grid structure
+            offsets (Sequence[Sequence[int]]): The offsets from a site to its neighbors
+
+        Raises:
+            ValueError: If the structure is not a square or cubic grid, or if it is
+            too small for every offset to reach a distinct site
+
+        Returns:
+            StencilNeighborhood:
+        """
+        dim = structure.dim
+        num_sites = len(structure.site_ids)
+        size = int(round(num_sites ** (1 / dim)))
+        if size ** dim != num_sites:
+            raise ValueError(f"A structure with {num_sites} sites is not a {dim}D grid")
+
+        strides = []
+        for axis in range(dim):
+            unit = [0] * dim
+            unit[axis] = 1
+            strides.append(structure.id_at(tuple(unit)))
+
+        if sorted(strides) != [size ** axis for axis in range(dim)]:
+            raise ValueError("Site IDs in this structure are not laid out along the grid axes")
+
+        return cls(offsets, size, strides)
+
+    def __init__(self, offsets: Sequence[Sequence[int]], size: int, strides: Sequence[int]):
+        """Initializes a StencilNeighborhood
+
+        Args:
+            offsets (Sequence[Sequence[int]]): The offsets from a site to its neighbors
+            size (int): The number of sites along each side of the grid
+            strides (Sequence[int]): The difference in site ID between neighboring
+            sites along each axis of the grid
+
+        Raises:
+            ValueError: If the grid is too small for every offset to reach a distinct site
+        """
+        self.offsets: np.ndarray = np.array(offsets, dtype=np.int64).reshape(len(offsets), len(strides))
+        self.size: int = size
+        self.strides: np.ndarray = np.array(strides, dtype=np.int64)
+        self._strides: List[int] = [int(s) for s in strides]
+
+        spans = self.offsets.max(axis=0) - self.offsets.min(axis=0) if len(offsets) > 0 else 0
+        if np.any(spans >= size) or np.any(np.all(self.offsets == 0, axis=1)):
+            raise ValueError(f"A grid of size {size} is too small for this stencil")
+
+        self.distances: np.ndarray = np.sqrt((self.offsets ** 2).sum(axis=1))
+        self.weights: np.ndarray = distance_weight(self.distances)
+
+        self._distances: List[float] = self.distances.tolist()
+        self._weights: List[float] = self.weights.tolist()
+
+        # The contribution of each axis to the neighbor IDs, for every
+        # coordinate along that axis. The neighbor IDs of a site are
+        # the sum of one row from each table.
+        coords = np.arange(size)[:, None]
+        self._axis_tables: List[np.ndarray] = [
+            ((coords + self.offsets[:, axis]) % size) * stride for axis, stride in enumerate(strides)
+        ]
+
+    @property
+    def num_sites(self) -> int:
+        return self.size ** len(self.strides)
+
+    def _coords(self, site_ids: Union[int, np.ndarray]):
+        return [(site_ids // stride) % self.size for stride in self._strides]
+
+    def neighbor_id_array(self, site_ids: np.ndarray) -> np.ndarray:
+        """Resolves the neighbors of many sites at once
+
+        Args:
+            site_ids (np.ndarray): The sites of interest
+
+        Returns:
+            np.ndarray: The neighbor IDs, with one row per site
+        """
+        site_ids = np.asarray(site_ids, dtype=np.int64)
+        nb_ids = np.zeros((len(site_ids), len(self.offsets)), dtype=np.int64)
+        for table, coords in zip(self._axis_tables, self._coords(site_ids)):
+            nb_ids += table[coords]
+        return nb_ids
+
+    def neighbor_ids(self, site_id: int) -> List[int]:
+        coords = self._coords(site_id)
+        nb_ids = self._axis_tables[0][coords[0]]
+        for table, coord in zip(self._axis_tables[1:], coords[1:]):
+            nb_ids = nb_ids + table[coord]
+        return nb_ids.tolist()
+
+    def degree(self, site_id: int) -> int:
+        return len(self._weights)
+
+    def weighted_neighbor(self, site_id: int, idx: int) -> Tuple[int, float]:
+        """Returns one of the neighbors of a site along with its weight
+
+        Args:
+            site_id (int): The site of interest
+            idx (int): The position of the neighbor among those of the site
+
+        Returns:
+            Tuple[int, float]:
+        """
+        nb_id = 0
+        for table, coord in zip(self._axis_tables, self._coords(site_id)):
+            nb_id += int(table[coord, idx])
+        return nb_id, self._weights[idx]
+
+    def weighted_neighbors(self, site_id: int) -> Iterator[Tuple[int, float]]:
+        """Returns the neighbors of a site along with the weight of each
+
+        Args:
+            site_id (int): The site of interest
+
+        Returns:
+            Iterator[Tuple[int, float]]:
+        """
+        return zip(self.neighbor_ids(site_id), self._weights)
+
+    def neighbors_of(self, site_id: int, include_weights: bool = False):
+        """Mirrors Neighborhood.neighbors_of, where the weight of each
+        connection is the distance to the neighbor.
+        """
+        if include_weights:
+            return list(zip(self.neighbor_ids(site_id), self._distances))
+        return self.neighbor_ids(site_id)
+
+    def padded(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Returns the neighbor IDs and weights as dense arrays with one row per
+        site, in the same form as NeighborArrays.padded. Every site has the same
+        number of neighbors, so no entries are masked out.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray]: The neighbor IDs, weights and mask
+        """
+        nb_ids = self.neighbor_id_array(np.arange(self.num_sites))
+        weights = np.broadcast_to(self.weights, nb_ids.shape).copy()
+        mask = np.ones(nb_ids.shape, dtype=bool)
+        return nb_ids, weights, mask
+
+
+class StochasticStencilNeighborhood():
+    """The implicit counterpart of pylattica's StochasticNeighborhood. One of
+    several stencils is chosen at random each time the neighbors of a site
+    are requested.
+    """
+
+    def __init__(self, neighborhoods: List[StencilNeighborhood], rng: RandomStream = None):
+        self.neighborhoods = neighborhoods
+        self.rng = rng if rng is not None else RandomStream()
+
+    def set_rng(self, rng: RandomStream):
+        self.rng = rng
+
+    def neighbors_of(self, site_id: int, include_weights: bool = False):
+        return self.rng.choice(self.neighborhoods).neighbors_of(site_id, include_weights=include_weights)
+
+
+class StencilNeighborhoodBuilder():
+    """Builds StencilNeighborhoods for grid structures. Takes the place of a
+    pylattica NeighborhoodBuilder: if a structure is too small for the stencil,
+    the equivalent neighborhood graph is built and flattened into NeighborArrays
+    instead, which are cached on disk under the name and radius of the builder.
+    """
+
+    def __init__(self, offsets: Sequence[Sequence[int]], name: str = None, radius: int = 1):
+        self.offsets = [tuple(o) for o in offsets]
+        if name is None:
+            name = "motif_" + hashlib.sha1(repr(self.offsets).encode()).hexdigest()[:12]
+        self.name = name
+        self.radius = radius
+
+    def get(self, structure: PeriodicStructure) -> Union[StencilNeighborhood, NeighborArrays]:
+        try:
+            return StencilNeighborhood.from_structure(structure, self.offsets)
+        except ValueError:
+            num_sites = len(structure.site_ids)
+            return load_or_build(
+                neighborhood_cache_key(structure.dim, num_sites, self.name, self.radius),
+                lambda: NeighborArrays.from_neighborhood(
+                    MotifNeighborhoodBuilder(self.offsets).get(structure),
+                    num_sites
+                )
+            )
+
+
+class VonNeumannStencilBuilder(StencilNeighborhoodBuilder):
+
+    def __init__(self, size: int, dim: int):
+        super().__init__(von_neumann_offsets(size, dim), name="von_neumann", radius=size)
+
+
+class MooreStencilBuilder(StencilNeighborhoodBuilder):
+
+    def __init__(self, size: int, dim: int):
+        super().__init__(moore_offsets(size, dim), name="moore", radius=size)
+
+
+class PseudoHexagonalStencilBuilder():
+    """Builds the implicit counterpart of the pseudo-hexagonal neighborhoods
+    provided by pylattica.
+    """
+
+    def __init__(self, dim: int):
+        if dim == 2:
+            motifs = _PSEUDO_HEXAGONAL_2D
+        else:
+            motifs = _PSEUDO_HEXAGONAL_3D
+        self.builders = [StencilNeighborhoodBuilder(m, name=f"pseudo_hexagonal_{i}") for i, m in enumerate(motifs)]
+
+    def get(self, structure: PeriodicStructure) -> StochasticStencilNeighborhood:
+        return StochasticStencilNeighborhood([b.get(structure) for b in self.builders])
@@ -0,0 +1,96 @@
+from typing import List
+
+
+class SumTree():
+    """A Fenwick (binary indexed) tree over a fixed number of non-negative weights.
+    Supports O(log N) updates of individual weights and O(log N) selection of the
+    index at which the running sum of the weights passes a target value, which
+    is what is needed to draw an index with probability proportional to its weight.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self._values: List[float] = [0.0] * size
+        self._tree: List[float] = [0.0] * (size + 1)
+        self._top_bit = 1 << (size.bit_length() - 1) if size > 0 else 0
+        self._updates_since_rebuild = 0
+
+    @classmethod
+    def from_values(cls, values: List[float]):
+        tree = cls(len(values))
+        tree._values = [float(v) for v in values]
+        tree.rebuild()
+        return tree
+
+    def rebuild(self) -> None:
+        """Recomputes the partial sums from the stored weights in O(N),
+        discarding any floating point drift accumulated by updates.
+        """
+        tree = [0.0] * (self.size + 1)
+        for idx, value in enumerate(self._values):
+            node = idx + 1
+            tree[node] += value
+            parent = node + (node & -node)
+            if parent <= self.size:
+                tree[parent] += tree[node]
+        self._tree = tree
+        self._updates_since_rebuild = 0
+
+    def get(self, idx: int) -> float:
+        return self._values[idx]
+
+    def update(self, idx: int, value: float) -> None:
+        """Sets the weight at idx to value.
+
+        Args:
+            idx (int): The index to update
+            value (float): The new weight
+        """
+        delta = value - self._values[idx]
+        if delta == 0:
+            return
+
+        self._values[idx] = value
+        node = idx + 1
+        tree = self._tree
+        while node <= self.size:
+            tree[node] += delta
+            node += node & -node
+
+        self._updates_since_rebuild += 1
+        if self._updates_since_rebuild > self.size:
+            self.rebuild()
+
+    @property
+    def total(self) -> float:
+        total = 0.0
+        node = self.size
+        tree = self._tree
+        while node > 0:
+            total += tree[node]
+            node -= node & -node
+        return total
+
+    def find(self, target: float) -> int:
+        """Returns the smallest index whose cumulative weight exceeds target.
+
+        Args:
+            target (float): A value between 0 and the total weight
+
+        Returns:
+            int:
+        """
+        node = 0
+        bit = self._top_bit
+        tree = self._tree
+        while bit > 0:
+            next_node = node + bit
+            if next_node <= self.size and tree[next_node] <= target:
+                node = next_node
+                target -= tree[next_node]
+            bit >>= 1
+
+        return min(node, self.size - 1)
+
+    def __len__(self):
+        return self.size
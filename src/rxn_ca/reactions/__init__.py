@@ -1,4 +1,8 @@
 from .scored_reaction import ScoredReaction
 from .scored_reaction_set import ScoredReactionSet
+from .compiled_reaction_set import CompiledReactionSet, ReactionHull
+from .samplers import AliasSampler
 from .scorers import TammanHuttigScoreSoftplus, TammanHuttigScoreExponential, score_rxns
-from .reaction_library import ReactionLibrary
\ No newline at end of file
+from .reaction_library import ReactionLibrary
+from .score_matrix_library import ScoreMatrixLibrary
+from .flat_reaction_library import FlatReactionLibrary
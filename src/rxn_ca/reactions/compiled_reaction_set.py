@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from .scored_reaction import ScoredReaction
+from .samplers import AliasSampler
+from ..phases.solid_phase_set import SolidPhaseSet
+
+
+class ReactionHull():
+    """The reactions that can occur for one particular combination of reactants.
+    The reaction with the highest competitiveness leads the hull, and its score
+    is the score of the interaction as a whole. Reactions are drawn from the hull
+    in proportion to their competitiveness.
+    """
+
+    __slots__ = ("reactions", "rxn_ids", "score", "sampler")
+
+    def __init__(self, reactions: List[ScoredReaction], rxn_ids: List[int]):
+        self.reactions: List[ScoredReaction] = reactions
+        self.rxn_ids: List[int] = rxn_ids
+        self.score: float = reactions[0].competitiveness
+        self.sampler: AliasSampler = AliasSampler([rxn.competitiveness for rxn in reactions])
+
+    def sample(self, u: float) -> Tuple[ScoredReaction, int]:
+        """Draws a reaction from this hull
+
+        Args:
+            u (float): A uniform random number to draw with
+
+        Returns:
+            Tuple[ScoredReaction, int]: The reaction and its ID in the reaction set
+        """
+        idx = self.sampler.draw(u)
+        return self.reactions[idx], self.rxn_ids[idx]
+
+
+class CompiledReactionSet():
+    """A dense, integer indexed form of a ScoredReactionSet. Every phase that can
+    occupy a site is assigned an ID, and the reaction hulls available to each single
+    phase, each pair of phases, each pair of phases in the presence of the atmosphere,
+    and each phase in contact with an atmospheric species are tabulated ahead of time.
+
+    Hulls are stored in nested lists (hull or None) for fast scalar access, and their
+    leading scores and a flag indicating whether any reaction is possible are stored
+    in numpy arrays for vectorized access. Phases not known to the table resolve to
+    an inert ID which has no reactions.
+    """
+
+    def __init__(self, rxn_set, atmospheric_species: List[str] = []):
+        """Compiles the supplied ScoredReactionSet.
+
+        Args:
+            rxn_set (ScoredReactionSet): The reaction set to compile
+            atmospheric_species (List[str], optional): The species present in the atmosphere
+            of the simulation, in the order in which they should be considered.
+        """
+        self.rxn_set = rxn_set
+        self.atmospheric_species: List[str] = list(atmospheric_species)
+
+        reaction_phases = set()
+        for rxn in rxn_set.reactions:
+            reaction_phases.update(rxn.all_phases)
+
+        other_phases = set(rxn_set.phases.phases) | reaction_phases | set(self.atmospheric_species)
+        other_phases.discard(SolidPhaseSet.FREE_SPACE)
+
+        self.phases: List[str] = [SolidPhaseSet.FREE_SPACE, *sorted(other_phases)]
+        self.phase_ids: Dict[str, int] = { p: idx for idx, p in enumerate(self.phases) }
+        self.free_space_id: int = self.phase_ids[SolidPhaseSet.FREE_SPACE]
+        self.inert_id: int = len(self.phases)
+
+        num_ids = len(self.phases) + 1
+        num_species = len(self.atmospheric_species)
+
+        self.single_hulls: List[ReactionHull] = [None] * num_ids
+        self.pair_hulls: List[List[ReactionHull]] = [[None] * num_ids for _ in range(num_ids)]
+        self.pair_atmosphere_hulls: List[List[ReactionHull]] = [[None] * num_ids for _ in range(num_ids)]
+        self.atmosphere_hulls: List[List[ReactionHull]] = [[None] * num_species for _ in range(num_ids)]
+
+        # Only phases which appear as reactants somewhere can participate in a reaction,
+        # so the remaining rows of the table stay empty
+        reactant_ids = sorted(set([
+            self.phase_ids[p] for reactants in rxn_set.reactant_map.keys() for p in reactants
+        ]))
+
+        for i in reactant_ids:
+            p1 = self.phases[i]
+            self.single_hulls[i] = self._hull(rxn_set.get_reactions([p1]))
+
+            for k, specie in enumerate(self.atmospheric_species):
+                self.atmosphere_hulls[i][k] = self._hull(rxn_set.get_reactions([p1, specie]))
+
+            for j in reactant_ids:
+                p2 = self.phases[j]
+                self.pair_hulls[i][j] = self._hull(rxn_set.get_reactions([p1, p2]))
+
+                pair_atmosphere_rxns = []
+                for specie in self.atmospheric_species:
+                    pair_atmosphere_rxns.extend(rxn_set.get_reactions([p1, p2, specie]))
+                self.pair_atmosphere_hulls[i][j] = self._hull(pair_atmosphere_rxns)
+
+        # The products of each reaction are drawn in proportion to their stoichiometry
+        self.product_samplers: Dict[int, Tuple[List[str], AliasSampler]] = {}
+        for rxn in rxn_set.reactions:
+            products = sorted(rxn.products)
+            self.product_samplers[rxn_set.get_rxn_id(rxn)] = (
+                products,
+                AliasSampler([rxn.product_stoich(p) for p in products])
+            )
+
+        self.single_scores, self.single_possible = self._scores(self.single_hulls)
+        self.pair_scores, self.pair_possible = self._scores(self.pair_hulls)
+        self.pair_atmosphere_scores, self.pair_atmosphere_possible = self._scores(self.pair_atmosphere_hulls)
+        self.atmosphere_scores, self.atmosphere_possible = self._scores(self.atmosphere_hulls)
+
+        # Whether a phase can take part in any reaction at all, regardless of its neighbors
+        self.phase_possible: np.ndarray = (
+            self.single_possible
+            | self.pair_possible.any(axis=1)
+            | self.pair_atmosphere_possible.any(axis=1)
+            | self.atmosphere_possible.any(axis=1)
+        )
+
+    def _hull(self, rxns: List[ScoredReaction]) -> ReactionHull:
+        if len(rxns) == 0:
+            return None
+        return ReactionHull(rxns, [self.rxn_set.get_rxn_id(rxn) for rxn in rxns])
+
+    @staticmethod
+    def _scores(hulls: List) -> Tuple[np.ndarray, np.ndarray]:
+        hulls = np.array(hulls, dtype=object)
+        scores = np.zeros(hulls.shape, dtype=float)
+        possible = np.zeros(hulls.shape, dtype=bool)
+        for idx, hull in np.ndenumerate(hulls):
+            if hull is not None:
+                scores[idx] = hull.score
+                possible[idx] = True
+        return scores, possible
+
+    def sample_product(self, rxn_id: int, u: float) -> str:
+        """Draws one of the products of a reaction in proportion to its stoichiometry
+
+        Args:
+            rxn_id (int): The ID of the reaction in the reaction set
+            u (float): A uniform random number to draw with
+
+        Returns:
+            str: The product phase
+        """
+        products, sampler = self.product_samplers[rxn_id]
+        return products[sampler.draw(u)]
+
+    def phase_id(self, phase: str) -> int:
+        """Returns the integer ID of the supplied phase, or the inert ID
+        if the phase is unknown to this table.
+
+        Args:
+            phase (str): The phase of interest
+
+        Returns:
+            int:
+        """
+        return self.phase_ids.get(phase, self.inert_id)
+
+    def phase_name(self, phase_id: int) -> str:
+        """Returns the phase associated with the supplied ID
+
+        Args:
+            phase_id (int): The ID of the phase
+
+        Returns:
+            str: The phase, or None for the inert ID
+        """
+        if phase_id == self.inert_id:
+            return None
+        return self.phases[phase_id]
+
+    @property
+    def num_ids(self) -> int:
+        return len(self.phases) + 1
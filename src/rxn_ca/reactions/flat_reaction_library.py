@@ -0,0 +1,433 @@
+from __future__ import annotations
+
+import json
+import os
+from multiprocessing import shared_memory
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from pymatgen.core.composition import Composition
+
+from .scored_reaction import ScoredReaction
+from .scored_reaction_set import ScoredReactionSet
+from .reaction_library import ReactionLibrary
+from .score_matrix_library import ScoreMatrixLibrary
+from ..phases.solid_phase_set import SolidPhaseSet
+
+MAGIC = b"RXNCAFLB"
+VERSION = 3
+
+# The extension used for libraries saved in this format
+FLAT_LIBRARY_EXTENSION = ".rxnlib"
+
+# The magic bytes are followed by the length of the JSON header
+_PREAMBLE_SIZE = len(MAGIC) + 8
+_ALIGNMENT = 8
+
+SHARED_MEMORY = "shared_memory"
+FILE = "file"
+
+
+def _align(offset: int) -> int:
+    return -(-offset // _ALIGNMENT) * _ALIGNMENT
+
+
+class FlatReactionLibrary():
+    """A ReactionLibrary stored as a handful of flat arrays in a single buffer, so
+    that it can be placed in shared memory or a memory-mapped file and read by many
+    processes without each of them parsing it or holding its own copy.
+
+    The arrays follow the layout of a ScoreMatrixLibrary:
+
+    - A table of the names of every phase appearing in a reaction, stored as
+      UTF-8 bytes in phase_names, with the name of phase i found between
+      phase_name_offsets[i] and phase_name_offsets[i + 1]
+    - A table of every distinct reaction in the library. The reactants of reaction
+      j are reactant_phases[reactant_indptr[j]:reactant_indptr[j + 1]], with their
+      stoichiometry in the same slots of reactant_stoich, and likewise for products.
+      The ID of reaction j is rxn_ids[j].
+    - The temperatures, and the scores and energies per atom of every reaction at
+      every temperature in matrices with one row per reaction. A reaction which is
+      not scored at a temperature has NaN in its column. The rows of the reactions
+      at temperature i, in the order they were added, are
+      order_rows[order_indptr[i]:order_indptr[i + 1]].
+
+    The phase set and fingerprint of the library are stored in a JSON header at the
+    start of the buffer. A ScoredReaction is only built for a reaction the first time
+    it is requested, and ScoredReactionSets are built from these as they are requested.
+    Only the most recently requested set is kept, so a process running a simulation
+    only ever holds the reactions for its current temperature.
+
+    Pickling a library in shared memory or a file pickles only its location, and
+    unpickling it attaches to the same buffer read-only.
+    """
+
+    ARRAY_NAMES = (
+        "phase_names",
+        "phase_name_offsets",
+        "reactant_indptr",
+        "reactant_phases",
+        "reactant_stoich",
+        "reactant_is_int",
+        "product_indptr",
+        "product_phases",
+        "product_stoich",
+        "product_is_int",
+        "temperatures",
+        "rxn_ids",
+        "scores",
+        "energies",
+        "order_indptr",
+        "order_rows",
+    )
+
+    @classmethod
+    def from_library(cls, library: ReactionLibrary, temps: Iterable[int] = None) -> FlatReactionLibrary:
+        """Flattens a ReactionLibrary into a buffer in this process' memory
+
+        Args:
+            library (ReactionLibrary): The library to flatten
+            temps (Iterable[int], optional): If given, only the reactions at these of the
+            library's temperatures are flattened. The fingerprint is still that of the
+            whole library. Defaults to None.
+
+        Returns:
+            FlatReactionLibrary:
+        """
+        if isinstance(library, FlatReactionLibrary) and temps is None:
+            return library
+
+        fingerprint = library.fingerprint()
+        if temps is not None or not isinstance(library, ScoreMatrixLibrary):
+            library = ScoreMatrixLibrary.from_library(library, temps=temps)
+
+        return cls._from_matrix_library(library, fingerprint)
+
+    @classmethod
+    def _from_matrix_library(cls, library: ScoreMatrixLibrary, fingerprint: str) -> FlatReactionLibrary:
+        phase_idxs: Dict[str, int] = {}
+        arrays = {
+            "temperatures": np.array(library.temps, dtype=np.int64),
+            "rxn_ids": library.rxn_ids.astype(np.int64),
+            "scores": library.scores.astype(np.float64),
+            "energies": library.energies.astype(np.float64),
+            "order_indptr": np.cumsum([0] + [len(order) for order in library.orders], dtype=np.int64),
+            "order_rows": np.concatenate([np.zeros(0, dtype=np.int64)] + list(library.orders)).astype(np.int64),
+        }
+
+        for side in ["reactant", "product"]:
+            indptr = [0]
+            phases = []
+            stoich = []
+            is_int = []
+            for rxn in library.reactions:
+                stoich_map = rxn._reactants if side == "reactant" else rxn._products
+                for phase, amt in stoich_map.items():
+                    phases.append(phase_idxs.setdefault(phase, len(phase_idxs)))
+                    stoich.append(amt)
+                    is_int.append(isinstance(amt, (int, np.integer)))
+                indptr.append(len(phases))
+
+            arrays[f"{side}_indptr"] = np.array(indptr, dtype=np.int64)
+            arrays[f"{side}_phases"] = np.array(phases, dtype=np.int64)
+            arrays[f"{side}_stoich"] = np.array(stoich, dtype=np.float64)
+            arrays[f"{side}_is_int"] = np.array(is_int, dtype=np.bool_)
+
+        encoded_names = [name.encode("utf-8") for name in phase_idxs]
+        arrays["phase_names"] = np.frombuffer(b"".join(encoded_names), dtype=np.uint8)
+        arrays["phase_name_offsets"] = np.cumsum([0] + [len(name) for name in encoded_names], dtype=np.int64)
+
+        header = {
+            "version": VERSION,
+            "phases": library.phases.as_dict(),
+            "fingerprint": fingerprint,
+            "arrays": {},
+        }
+
+        offset = 0
+        for name in cls.ARRAY_NAMES:
+            arr = arrays[name]
+            header["arrays"][name] = {
+                "dtype": arr.dtype.str,
+                "shape": list(arr.shape),
+                "offset": offset,
+            }
+            offset = _align(offset + arr.nbytes)
+
+        header_bytes = json.dumps(header).encode("utf-8")
+        data_start = _align(_PREAMBLE_SIZE + len(header_bytes))
+
+        buffer = bytearray(data_start + offset)
+        buffer[:len(MAGIC)] = MAGIC
+        buffer[len(MAGIC):_PREAMBLE_SIZE] = len(header_bytes).to_bytes(8, "little")
+        buffer[_PREAMBLE_SIZE:_PREAMBLE_SIZE + len(header_bytes)] = header_bytes
+
+        for name in cls.ARRAY_NAMES:
+            start = data_start + header["arrays"][name]["offset"]
+            data = np.ascontiguousarray(arrays[name]).tobytes()
+            buffer[start:start + len(data)] = data
+
+        return cls(buffer)
+
+    @classmethod
+    def load(cls, fpath: str) -> FlatReactionLibrary:
+        """Memory-maps a library written by save, read-only
+
+        Args:
+            fpath (str): The path the library was saved to
+
+        Returns:
+            FlatReactionLibrary:
+        """
+        buffer = np.memmap(fpath, dtype=np.uint8, mode="r")
+        return cls(buffer, location=(FILE, os.path.abspath(fpath)))
+
+    @classmethod
+    def from_json_file(cls, fpath: str) -> FlatReactionLibrary:
+        """Converts a library saved as JSON by ReactionLibrary.to_file
+
+        Args:
+            fpath (str): The path of the JSON library
+
+        Returns:
+            FlatReactionLibrary:
+        """
+        with open(fpath, "r") as f:
+            lib_dict = json.load(f)
+
+        # The fingerprint is taken from the library as it is read by ReactionLibrary,
+        # so that results from either file can be replayed against the other
+        fingerprint = ReactionLibrary.from_dict(lib_dict).fingerprint()
+        return cls._from_matrix_library(ScoreMatrixLibrary.from_dict(lib_dict), fingerprint)
+
+    @staticmethod
+    def is_flat_library_file(fpath: str) -> bool:
+        """Returns whether the file at fpath was written by FlatReactionLibrary.save
+
+        Args:
+            fpath (str): The path of a library file
+
+        Returns:
+            bool:
+        """
+        with open(fpath, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+
+    @classmethod
+    def attach(cls, name: str) -> FlatReactionLibrary:
+        """Attaches read-only to a library placed in shared memory by another process
+
+        Args:
+            name (str): The name of the shared memory block
+
+        Returns:
+            FlatReactionLibrary:
+        """
+        shm = shared_memory.SharedMemory(name=name)
+        return cls(shm.buf, location=(SHARED_MEMORY, name), shm=shm)
+
+    @classmethod
+    def _reattach(cls, kind: str, location: str) -> FlatReactionLibrary:
+        if kind == SHARED_MEMORY:
+            return cls.attach(location)
+        return cls.load(location)
+
+    def __init__(self, buffer, location: Tuple[str, str] = None, shm: shared_memory.SharedMemory = None):
+        """Initializes a FlatReactionLibrary. Use from_library, load or attach
+        rather than calling this directly.
+
+        Args:
+            buffer: A buffer laid out by from_library
+            location (Tuple[str, str], optional): Whether the buffer is in shared memory
+            or a file, and its name or path. None if the buffer is private to this process.
+            shm (shared_memory.SharedMemory, optional): The shared memory block holding the buffer
+        """
+        if bytes(buffer[:len(MAGIC)]) != MAGIC:
+            raise ValueError("Buffer does not contain a flattened reaction library")
+
+        header_len = int.from_bytes(bytes(buffer[len(MAGIC):_PREAMBLE_SIZE]), "little")
+        header = json.loads(bytes(buffer[_PREAMBLE_SIZE:_PREAMBLE_SIZE + header_len]).decode("utf-8"))
+        if header["version"] != VERSION:
+            raise ValueError(f"Unsupported flattened reaction library version {header['version']}")
+
+        self._buffer = buffer
+        self._location = location
+        self._shm = shm
+        self._fingerprint: str = header["fingerprint"]
+        self.phases: SolidPhaseSet = SolidPhaseSet.from_dict(header["phases"])
+
+        data_start = _align(_PREAMBLE_SIZE + header_len)
+        for name in self.ARRAY_NAMES:
+            spec = header["arrays"][name]
+            count = int(np.prod(spec["shape"]))
+            arr = np.frombuffer(buffer, dtype=np.dtype(spec["dtype"]), count=count, offset=data_start + spec["offset"])
+            arr = arr.reshape(spec["shape"])
+            arr.flags.writeable = False
+            setattr(self, name, arr)
+
+        offsets = self.phase_name_offsets.tolist()
+        names = bytes(self.phase_names)
+        self.phase_table: List[str] = [names[start:stop].decode("utf-8") for start, stop in zip(offsets[:-1], offsets[1:])]
+
+        self._temp_idxs: Dict[int, int] = { int(temp): idx for idx, temp in enumerate(self.temperatures.tolist()) }
+        self._reactions: Dict[int, ScoredReaction] = {}
+        self._cached_temp = None
+        self._cached_rxns = None
+
+    def __reduce__(self):
+        if self._location is None:
+            return (self.__class__, (bytes(self._buffer),))
+        return (self.__class__._reattach, self._location)
+
+    @property
+    def nbytes(self) -> int:
+        return len(self._buffer)
+
+    @property
+    def temps(self) -> List[int]:
+        return list(self._temp_idxs.keys())
+
+    def to_shared_memory(self) -> FlatReactionLibrary:
+        """Copies this library into a new block of shared memory. The block must be
+        released with unlink by the process that created it once every process using
+        it is finished.
+
+        Returns:
+            FlatReactionLibrary: The library in shared memory
+        """
+        shm = shared_memory.SharedMemory(create=True, size=self.nbytes)
+        shm.buf[:self.nbytes] = self._buffer[:self.nbytes]
+        return self.__class__(shm.buf, location=(SHARED_MEMORY, shm.name), shm=shm)
+
+    def save(self, fpath: str) -> None:
+        """Writes this library to a file which can be memory-mapped with load. The file
+        is written under a temporary name and then moved into place.
+
+        Args:
+            fpath (str): The path to save the library to
+        """
+        tmp = f"{fpath}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(self._buffer[:self.nbytes])
+        os.replace(tmp, fpath)
+
+    def close(self) -> None:
+        """Releases this process' view of the buffer. The library cannot be used afterwards."""
+        for name in self.ARRAY_NAMES:
+            setattr(self, name, None)
+        self._buffer = None
+        if self._shm is not None:
+            self._shm.close()
+            self._shm = None
+
+    def unlink(self) -> None:
+        """Closes this library and frees the shared memory holding it"""
+        shm = self._shm
+        self.close()
+        if shm is not None:
+            shm.unlink()
+
+    def fingerprint(self) -> str:
+        """Returns the fingerprint of the library this was flattened from
+
+        Returns:
+            str:
+        """
+        return self._fingerprint
+
+    def get_rxns_at_temp(self, temp: int) -> ScoredReactionSet:
+        if temp != self._cached_temp:
+            self._cached_rxns = self._build_rxn_set(self._temp_idxs[int(temp)])
+            self._cached_temp = temp
+        return self._cached_rxns
+
+    def get_rxn(self, row: int) -> ScoredReaction:
+        """Returns the reaction in a row of the reaction table. Its score is that of
+        the first temperature it was scored at, and ScoredReaction.with_score gives
+        its score at others.
+
+        Args:
+            row (int): The row of the reaction
+
+        Returns:
+            ScoredReaction:
+        """
+        rxn = self._reactions.get(row)
+        if rxn is None:
+            col = int(np.flatnonzero(~np.isnan(self.scores[row]))[0])
+            energy = float(self.energies[row, col])
+            rxn = ScoredReaction(
+                self._stoich_map("reactant", row),
+                self._stoich_map("product", row),
+                float(self.scores[row, col]),
+                energy_per_atom=None if np.isnan(energy) else energy,
+            )
+            self._reactions[row] = rxn
+        return rxn
+
+    def to_library(self) -> ScoreMatrixLibrary:
+        """Builds an ordinary library holding every reaction and temperature
+
+        Returns:
+            ScoreMatrixLibrary:
+        """
+        library = ScoreMatrixLibrary(self.phases)
+        library._temps = self.temps
+        library.reactions = [self.get_rxn(row) for row in range(len(self.rxn_ids))]
+        library._rows = {
+            (rxn._as_str, rxn_id): row
+            for row, (rxn, rxn_id) in enumerate(zip(library.reactions, self.rxn_ids.tolist()))
+        }
+        library.rxn_ids = np.array(self.rxn_ids)
+        library.scores = np.array(self.scores)
+        library.energies = np.array(self.energies)
+        library.orders = [np.array(self._order(col)) for col in range(len(library._temps))]
+        return library
+
+    def as_dict(self):
+        return self.to_library().as_dict()
+
+    def prefetch(self, temps: Iterable[int]) -> None:
+        # Reactions are read from the arrays as they are needed
+        pass
+
+    def exclude_phases(self, phases) -> ReactionLibrary:
+        if not any(phase in phases for phase in self.phase_table):
+            return self
+        return self.to_library().exclude_phases(phases)
+
+    def limit_phase_set(self, phases) -> ReactionLibrary:
+        comps = [Composition(p) for p in phases]
+        if all(Composition(p) in comps for p in self.phase_table):
+            return self
+        return self.to_library().limit_phase_set(phases)
+
+    def _order(self, temp_idx: int) -> np.ndarray:
+        return self.order_rows[self.order_indptr[temp_idx]:self.order_indptr[temp_idx + 1]]
+
+    def _build_rxn_set(self, temp_idx: int) -> ScoredReactionSet:
+        rxn_set = ScoredReactionSet([], self.phases)
+
+        rows = self._order(temp_idx)
+        for row, score, energy, rxn_id in zip(
+            rows.tolist(),
+            self.scores[rows, temp_idx].tolist(),
+            self.energies[rows, temp_idx].tolist(),
+            self.rxn_ids[rows].tolist(),
+        ):
+            rxn = self.get_rxn(row).with_score(score, None if np.isnan(energy) else energy)
+            rxn_set.add_rxn(rxn, rxn_id)
+
+        return rxn_set
+
+    def _stoich_map(self, side: str, row: int) -> Dict[str, float]:
+        indptr = getattr(self, f"{side}_indptr")
+        start, stop = indptr[row:row + 2].tolist()
+        phases = getattr(self, f"{side}_phases")[start:stop].tolist()
+        stoich = getattr(self, f"{side}_stoich")[start:stop].tolist()
+        is_int = getattr(self, f"{side}_is_int")[start:stop].tolist()
+        return {
+            self.phase_table[phase]: int(amt) if as_int else amt
+            for phase, amt, as_int in zip(phases, stoich, is_int)
+        }
@@ -6,8 +6,71 @@ from ..phases.solid_phase_set import SolidPhaseSet
 
 from monty.json import MSONable
 
+import hashlib
 import json
-from typing import List, Dict
+from collections.abc import MutableMapping
+from typing import Iterable, List, Dict, Union
+
+
+class LazyReactionSets(MutableMapping):
+    """Maps temperatures to ScoredReactionSets. Sets may be added in their serialized
+    form, in which case each is only built the first time it is accessed.
+    """
+
+    def __init__(self, phases: SolidPhaseSet):
+        self.phases = phases
+        self._entries: Dict[int, Union[ScoredReactionSet, Dict]] = {}
+
+    def add_serialized(self, temp: int, rxn_set_dict: Dict) -> None:
+        self._entries[int(temp)] = rxn_set_dict
+
+    def is_loaded(self, temp: int) -> bool:
+        return isinstance(self._entries[temp], ScoredReactionSet)
+
+    def serialized(self, temp: int) -> Dict:
+        """Returns the set at a temperature as ScoredReactionSet.as_dict would,
+        without building it if it has not been loaded.
+        """
+        entry = self._entries[temp]
+        if isinstance(entry, ScoredReactionSet):
+            return entry.as_dict()
+
+        return {
+            "reactions": [{
+                "reactants": r["reactants"],
+                "products": r["products"],
+                "competitiveness": r["competitiveness"],
+                "energy_per_atom": r.get("energy_per_atom"),
+                "@module": ScoredReaction.__module__,
+                "@class": ScoredReaction.__name__,
+            } for r in entry["reactions"]],
+            "phase_set": self.phases.as_dict(),
+            "@module": ScoredReactionSet.__module__,
+            "@class": ScoredReactionSet.__name__,
+        }
+
+    def __getitem__(self, temp: int) -> ScoredReactionSet:
+        entry = self._entries[temp]
+        if not isinstance(entry, ScoredReactionSet):
+            rxns = [ScoredReaction.from_dict(r) for r in entry["reactions"]]
+            entry = ScoredReactionSet(rxns, phase_set=self.phases)
+            self._entries[temp] = entry
+        return entry
+
+    def __setitem__(self, temp: int, rxns: ScoredReactionSet) -> None:
+        self._entries[temp] = rxns
+
+    def __delitem__(self, temp: int) -> None:
+        del self._entries[temp]
+
+    def __iter__(self):
+        return iter(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, temp) -> bool:
+        return temp in self._entries
 
 
 class ReactionLibrary(MSONable):
@@ -15,6 +78,11 @@ class ReactionLibrary(MSONable):
     which contain reactions scored at the given temperature. Used in multi-stage
     reaction simulations where different stages in the reaction are run at
     different temperatures.
+
+    The reactions at each temperature of a library loaded with from_dict or from_file
+    are only built the first time that temperature is accessed, so a run which uses a
+    few temperatures of a large library only pays for those. Serializing the library
+    or taking its fingerprint does not build the temperatures which were not accessed.
     """
 
     @classmethod
@@ -24,16 +92,16 @@ class ReactionLibrary(MSONable):
         )
 
         for t, scored_rxns in d.get('lib').items():
-            rxns = [ScoredReaction.from_dict(r) for r in scored_rxns["reactions"]]
-            library.add_rxns_at_temp(
-                ScoredReactionSet(rxns, phase_set=library.phases),
-                t
-            )
+            library.lib.add_serialized(t, scored_rxns)
 
         return library
     
     @classmethod
     def from_file(cls, fpath):
+        # Libraries saved in the binary format are memory-mapped rather than parsed
+        from .flat_reaction_library import FlatReactionLibrary
+        if FlatReactionLibrary.is_flat_library_file(fpath):
+            return FlatReactionLibrary.load(fpath)
 
         with open(fpath, 'r+') as f:
             d = json.load(f)
@@ -41,7 +109,7 @@ class ReactionLibrary(MSONable):
 
 
     def __init__(self, phases: SolidPhaseSet):
-        self.lib: Dict[int, ScoredReactionSet] = {}
+        self.lib: LazyReactionSets = LazyReactionSets(phases)
         self.phases = phases
         self.metadata = {}
 
@@ -58,6 +126,16 @@ class ReactionLibrary(MSONable):
     
     def get_rxns_at_temp(self, temp: int) -> ScoredReactionSet:
         return self.lib[temp]
+
+    def prefetch(self, temps: Iterable[int]) -> None:
+        """Builds the reactions at each of the supplied temperatures ahead of time,
+        for instance before forking worker processes which will share them.
+
+        Args:
+            temps (Iterable[int]): The temperatures to build
+        """
+        for temp in temps:
+            self.get_rxns_at_temp(int(temp))
     
     def get_lib_from_ids(self, rxn_ids: List[int]) -> ReactionLibrary:
         deduped_ids = list(set(rxn_ids))
@@ -83,6 +161,18 @@ class ReactionLibrary(MSONable):
             lib.add_rxns_at_temp(rxns.limit_phases(phases), t)
         return lib
     
+    def fingerprint(self) -> str:
+        """Returns a hash of the phases and scored reactions in this library, which
+        can be used to check that a library is the one a simulation was run with.
+
+        Returns:
+            str:
+        """
+        lib_dict = self.as_dict()
+        lib_dict["lib"] = { str(temp): rset for temp, rset in lib_dict["lib"].items() }
+        serialized = json.dumps(lib_dict, sort_keys=True, default=str)
+        return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
     @property
     def temps(self):
         return list(self.lib.keys())
@@ -92,8 +182,8 @@ class ReactionLibrary(MSONable):
         sup = {"@module": self.__class__.__module__, "@class": self.__class__.__name__}
 
         lib = {
-            temp: rset.as_dict()
-            for temp, rset in self.lib.items()
+            temp: self.lib.serialized(temp)
+            for temp in self.lib.keys()
         }
 
         return {
@@ -0,0 +1,81 @@
+from typing import List
+
+
+class AliasSampler():
+    """Draws indices in proportion to a fixed list of weights in constant time,
+    using Vose's alias method. The tables are built once in O(n), after which
+    each draw costs one uniform random number and no allocation.
+    """
+
+    __slots__ = ("size", "_prob", "_alias")
+
+    def __init__(self, weights: List[float]):
+        """Builds the alias tables for the supplied weights
+
+        Args:
+            weights (List[float]): Non-negative weights
+        """
+        size = len(weights)
+        if size == 0:
+            raise ValueError("AliasSampler requires at least one weight")
+
+        # If every weight is zero, fall back to drawing uniformly
+        total = float(sum(weights))
+        if total <= 0:
+            weights = [1.0] * size
+            total = float(size)
+
+        scaled = [w * size / total for w in weights]
+        prob = [1.0] * size
+        alias = list(range(size))
+
+        small = [idx for idx, p in enumerate(scaled) if p < 1.0]
+        large = [idx for idx, p in enumerate(scaled) if p >= 1.0]
+
+        while len(small) > 0 and len(large) > 0:
+            less = small.pop()
+            more = large.pop()
+
+            prob[less] = scaled[less]
+            alias[less] = more
+
+            scaled[more] = scaled[more] + scaled[less] - 1.0
+            if scaled[more] < 1.0:
+                small.append(more)
+            else:
+                large.append(more)
+
+        # Anything left over is only short of 1 through rounding error,
+        # so it keeps its default probability of 1
+        self.size = size
+        self._prob = prob
+        self._alias = alias
+
+    def draw(self, u: float) -> int:
+        """Maps a uniform random number in [0, 1) to an index
+
+        Args:
+            u (float): A uniform random number
+
+        Returns:
+            int:
+        """
+        scaled = u * self.size
+        idx = min(int(scaled), self.size - 1)
+        if scaled - idx < self._prob[idx]:
+            return idx
+        return self._alias[idx]
+
+    def sample(self, rng) -> int:
+        """Draws an index using the next uniform random number of a stream
+
+        Args:
+            rng (RandomStream): The stream to draw from
+
+        Returns:
+            int:
+        """
+        return self.draw(rng.random())
+
+    def __len__(self):
+        return self.size
@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from pymatgen.core.composition import Composition
+
+from .scored_reaction import ScoredReaction, stoich_map_to_str
+from .scored_reaction_set import ScoredReactionSet
+from .reaction_library import ReactionLibrary
+from ..phases.solid_phase_set import SolidPhaseSet
+
+
+class ScoreMatrixLibrary(ReactionLibrary):
+    """A ReactionLibrary which stores each reaction once, however many temperatures
+    it is scored at. The reactions form a single table, and their scores and energies
+    per atom are stored in matrices with one row per reaction and one column per
+    temperature. A reaction which is not scored at a temperature has NaN in its column.
+    The rows holding the reactions at each temperature are also kept in the order those
+    reactions were added, since temperatures may hold different reactions in different
+    orders.
+
+    A row of the table is a distinct stoichiometry and reaction ID, and holds a single
+    ScoredReaction. The ScoredReactionSet for a temperature is built on request from
+    copies of these which share their stoichiometry, in the order the reactions were
+    added at that temperature, and only the most recently requested one is kept.
+
+    This library serializes to the same document as the equivalent ReactionLibrary,
+    so the two are interchangeable in files and share fingerprints.
+    """
+
+    @classmethod
+    def from_library(cls, library: ReactionLibrary, temps: Iterable[int] = None) -> ScoreMatrixLibrary:
+        """Builds a ScoreMatrixLibrary holding the same reactions as another library
+
+        Args:
+            library (ReactionLibrary): The library to convert
+            temps (Iterable[int], optional): If given, only the reactions at these of the
+            library's temperatures are kept. Defaults to None.
+
+        Returns:
+            ScoreMatrixLibrary:
+        """
+        matrix_lib = cls(library.phases)
+        for temp in _select_temps(library, temps):
+            matrix_lib.add_rxns_at_temp(library.get_rxns_at_temp(temp), temp)
+        return matrix_lib
+
+    @classmethod
+    def from_dict(cls, d):
+        library = cls(
+            phases = SolidPhaseSet.from_dict(d['phases'])
+        )
+
+        for t, scored_rxns in d.get('lib').items():
+            # ScoredReactions are only built for reactions which have not been seen
+            # at another temperature, and IDs are assigned as by ScoredReactionSet
+            entries = []
+            ids: Dict[str, int] = {}
+            for r in scored_rxns["reactions"]:
+                key = f"{stoich_map_to_str(r['reactants'])}->{stoich_map_to_str(r['products'])}"
+                rxn_id = len(ids)
+                ids[f"{key}, Score: {r['competitiveness']}, E/atom: {r.get('energy_per_atom')}"] = rxn_id
+                entries.append((key, rxn_id, lambda r=r: ScoredReaction.from_dict(r), r["competitiveness"], r.get("energy_per_atom")))
+            library._add_column(t, entries)
+
+        return library
+
+    def __init__(self, phases: SolidPhaseSet):
+        self.phases = phases
+        self.metadata = {}
+
+        self._temps: List[int] = []
+        self._rows: Dict[Tuple[str, int], int] = {}
+        self.reactions: List[ScoredReaction] = []
+        self.rxn_ids: np.ndarray = np.zeros(0, dtype=np.int64)
+        self.scores: np.ndarray = np.zeros((0, 0), dtype=float)
+        self.energies: np.ndarray = np.zeros((0, 0), dtype=float)
+        self.orders: List[np.ndarray] = []
+
+        self._view_temp = None
+        self._view: ScoredReactionSet = None
+
+    @property
+    def temps(self):
+        return list(self._temps)
+
+    @property
+    def lib(self) -> Dict[int, ScoredReactionSet]:
+        """The ScoredReactionSet for every temperature. Each is built anew, so
+        prefer get_rxns_at_temp where only some temperatures are needed.
+        """
+        return { temp: self._build_view(idx) for idx, temp in enumerate(self._temps) }
+
+    def add_rxns_at_temp(self, rxns: ScoredReactionSet, temp: int) -> int:
+        ids = { id(rxn): rxn_id for rxn_id, rxn in rxns.id_to_rxn.items() }
+        self._add_column(temp, [
+            (rxn._as_str, ids[id(rxn)], lambda rxn=rxn: rxn, rxn.competitiveness, rxn.energy_per_atom)
+            for rxn in rxns.reactions
+        ])
+        return temp
+
+    def get_rxns_at_temp(self, temp: int) -> ScoredReactionSet:
+        if temp != self._view_temp:
+            self._view = self._build_view(self._temps.index(int(temp)))
+            self._view_temp = temp
+        return self._view
+
+    def prefetch(self, temps: Iterable[int]) -> None:
+        # Every temperature is held in the score matrices already
+        pass
+
+    def exclude_phases(self, phases) -> ScoreMatrixLibrary:
+        return self._subset([
+            not any(p in phases for p in rxn.all_phases) for rxn in self.reactions
+        ])
+
+    def limit_phase_set(self, phases) -> ScoreMatrixLibrary:
+        comps = [Composition(p) for p in phases]
+        return self._subset([
+            all(Composition(p) in comps for p in rxn.all_phases) for rxn in self.reactions
+        ])
+
+    def get_lib_from_ids(self, rxn_ids: List[int]) -> ScoreMatrixLibrary:
+        return self._subset(np.isin(self.rxn_ids, list(set(rxn_ids))))
+
+    def as_dict(self):
+        # Written as a ReactionLibrary, so that the two produce identical documents
+        return {
+            "@module": ReactionLibrary.__module__,
+            "@class": ReactionLibrary.__name__,
+            "phases": self.phases.as_dict(),
+            "lib": {
+                temp: self._build_view(idx).as_dict()
+                for idx, temp in enumerate(self._temps)
+            },
+        }
+
+    def _add_column(self, temp: int, entries: Iterable[Tuple]) -> None:
+        """Adds the scores at a new temperature
+
+        Args:
+            temp (int): The temperature
+            entries (Iterable[Tuple]): For each reaction, the stoichiometry string, reaction ID,
+            a function returning the ScoredReaction, and its score and energy per atom
+        """
+        temp = int(temp)
+        if temp in self._temps:
+            # As in ReactionLibrary, the new reactions replace those already at this temperature
+            idx = self._temps.index(temp)
+            self._temps.pop(idx)
+            self.scores = np.delete(self.scores, idx, axis=1)
+            self.energies = np.delete(self.energies, idx, axis=1)
+            self.orders.pop(idx)
+
+        rows = []
+        scores = []
+        energies = []
+        for key, rxn_id, get_rxn, score, energy in entries:
+            row = self._rows.get((key, rxn_id))
+            if row is None:
+                row = len(self.reactions)
+                self._rows[(key, rxn_id)] = row
+                self.reactions.append(get_rxn())
+            rows.append(row)
+            scores.append(score)
+            energies.append(np.nan if energy is None else energy)
+
+        num_rows = len(self.reactions)
+        self.rxn_ids = np.array([rxn_id for _, rxn_id in self._rows.keys()], dtype=np.int64)
+
+        column = np.full((num_rows, 1), np.nan)
+        self.scores = np.hstack([self._pad(self.scores, num_rows), column])
+        self.energies = np.hstack([self._pad(self.energies, num_rows), column])
+        self.scores[rows, -1] = scores
+        self.energies[rows, -1] = energies
+
+        self._temps.append(temp)
+        self.orders.append(np.array(rows, dtype=np.int64))
+        self._view_temp = None
+
+    @staticmethod
+    def _pad(matrix: np.ndarray, num_rows: int) -> np.ndarray:
+        extra = np.full((num_rows - matrix.shape[0], matrix.shape[1]), np.nan)
+        return np.vstack([matrix, extra])
+
+    def _subset(self, keep) -> ScoreMatrixLibrary:
+        keep = np.flatnonzero(keep)
+
+        lib = self.__class__(self.phases)
+        lib._temps = list(self._temps)
+        lib.reactions = [self.reactions[row] for row in keep]
+        keys = list(self._rows.keys())
+        lib._rows = { keys[row]: idx for idx, row in enumerate(keep.tolist()) }
+        lib.rxn_ids = self.rxn_ids[keep]
+        lib.scores = self.scores[keep]
+        lib.energies = self.energies[keep]
+
+        new_rows = np.full(len(self.reactions), -1, dtype=np.int64)
+        new_rows[keep] = np.arange(len(keep))
+        lib.orders = [new_rows[order][new_rows[order] >= 0] for order in self.orders]
+        return lib
+
+    def _build_view(self, temp_idx: int) -> ScoredReactionSet:
+        rxn_set = ScoredReactionSet([], self.phases)
+
+        rows = self.orders[temp_idx]
+        for row, score, energy, rxn_id in zip(
+            rows.tolist(),
+            self.scores[rows, temp_idx].tolist(),
+            self.energies[rows, temp_idx].tolist(),
+            self.rxn_ids[rows].tolist(),
+        ):
+            rxn = self.reactions[row].with_score(score, None if np.isnan(energy) else energy)
+            rxn_set.add_rxn(rxn, rxn_id)
+
+        return rxn_set
+
+
+def _select_temps(library: ReactionLibrary, temps: Iterable[int] = None) -> List[int]:
+    if temps is None:
+        return library.temps
+    temps = set(int(t) for t in temps)
+    return [temp for temp in library.temps if int(temp) in temps]
@@ -1,4 +1,5 @@
 from __future__ import annotations
+import copy
 import typing
 from numbers import Number
 
@@ -98,6 +99,22 @@ class ScoredReaction:
         new_score = scorer.score(self)
         return ScoredReaction(self._reactants, self._products, new_score)
 
+    def with_score(self, competitiveness: Number, energy_per_atom: Number = None) -> ScoredReaction:
+        """Returns a copy of this reaction with a different score. The copy shares the
+        stoichiometry of this reaction rather than building its own.
+
+        Args:
+            competitiveness (Number): The score of the copy
+            energy_per_atom (Number, optional): The energy per atom of the copy
+
+        Returns:
+            ScoredReaction:
+        """
+        rxn = copy.copy(self)
+        rxn.competitiveness = competitiveness
+        rxn.energy_per_atom = energy_per_atom
+        return rxn
+
     def can_proceed_with(self, reactants: list[str]) -> bool:
         """Helper method that, given a list of reactants, returns true if it is the same
         as the list of reactants for this reaction. Note that this is an exact match.
@@ -5,6 +5,7 @@ import json
 from monty.json import MontyDecoder, MontyEncoder, MSONable
 
 from .scored_reaction import ScoredReaction
+from .compiled_reaction_set import CompiledReactionSet
 from ..phases.solid_phase_set import SolidPhaseSet
 from ..phases.gasses import DEFAULT_GASES
 
@@ -48,6 +49,7 @@ class ScoredReactionSet():
         self.rxn_map = {}
         self.rxn_to_id = {}
         self.id_to_rxn = {}
+        self._compiled = {}
         
         # Replace strength of identity reaction with the depth of the hull its in
         for r in reactions:
@@ -75,6 +77,23 @@ class ScoredReactionSet():
         self.id_to_rxn[rxn_id] = rxn
         self.rxn_map[rxn_str] = rxn
         self.reactions.append(rxn)
+        self._compiled = {}
+
+    def compile(self, atmospheric_species: List[str] = []) -> CompiledReactionSet:
+        """Returns the dense, phase ID indexed form of this reaction set for the
+        supplied atmosphere. The compiled form is cached until another reaction
+        is added to this set.
+
+        Args:
+            atmospheric_species (List[str], optional): The species present in the atmosphere.
+
+        Returns:
+            CompiledReactionSet:
+        """
+        key = tuple(atmospheric_species)
+        if key not in self._compiled:
+            self._compiled[key] = CompiledReactionSet(self, atmospheric_species)
+        return self._compiled[key]
 
     def get_rxn_id(self, rxn: ScoredReaction) -> int:
         r_str = str(rxn)
@@ -1,163 +1,260 @@
-import math
-from tqdm import tqdm
-from abc import ABC, abstractmethod
+import numpy as np
+from abc import ABC
+from scipy.special import erf as _erf
 from .scored_reaction import ScoredReaction
 
 from ..phases.solid_phase_set import SolidPhaseSet
-from typing import List
+from typing import Dict, List, Tuple
 
 from rxn_network.reactions.reaction_set import ReactionSet
 from rxn_network.reactions.computed import ComputedReaction
 
-from ..phases.gasses import DEFAULT_GASES
+# The functions below accept either numbers or arrays of them
 
 def softplus(x):
-    return 1/3 * math.log(1 + math.exp(3*x))
+    return 1/3 * np.log(1 + np.exp(3*x))
 
 def tamman_score_exp(t_tm_ratio):
-    return math.exp(4.82*(t_tm_ratio) - 3.21)
+    return np.exp(4.82*(t_tm_ratio) - 3.21)
 
 def tamman_score_softplus(t_tm_ratio):
-    return math.log(1 + math.exp(14 * (t_tm_ratio - 0.8)))
+    return np.log(1 + np.exp(14 * (t_tm_ratio - 0.8)))
 
 def huttig_score_exp(t_tm_ratio):
-    return math.exp(2.41*(t_tm_ratio) - 0.8)
+    return np.exp(2.41*(t_tm_ratio) - 0.8)
 
 def huttig_score_softplus(t_tm_ratio):
-    return 0.25 * math.log(1 + math.exp(30 * (t_tm_ratio - 0.33)))
+    return 0.25 * np.log(1 + np.exp(30 * (t_tm_ratio - 0.33)))
 
 def erf(x):
-    return 0.5 * (1 + math.erf(-35 * (x + 0.03)))
+    return 0.5 * (1 + _erf(-35 * (x + 0.03)))
 
 def tamman_erf_score(tm_ratio, delta_g):
     return tamman_score_softplus(tm_ratio) * erf(delta_g)
 
 def huttig_erf_score(tm_ratio, delta_g):
     return huttig_score_softplus(tm_ratio) * erf(delta_g)
-         
+
+
+def reactant_features(rxns: List[ComputedReaction], phase_set: SolidPhaseSet) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Collects the properties of the reactants of each reaction which the scorers use.
+    The melting point of each phase is looked up only once.
+
+    Args:
+        rxns (List[ComputedReaction]): The reactions
+        phase_set (SolidPhaseSet): The phases, which provide melting points and gases
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: For each reaction, the lowest melting
+        point among its solid reactants (NaN if it has none), whether any of its reactants
+        is a gas, and how many of its reactants are solids
+    """
+    melting_points: Dict[str, float] = {}
+    min_mps = np.full(len(rxns), np.nan)
+    gas_reactants = np.zeros(len(rxns), dtype=bool)
+    solid_reactants = np.zeros(len(rxns), dtype=np.int64)
+
+    for idx, rxn in enumerate(rxns):
+        phases = [c.reduced_formula for c in rxn.reactants]
+        non_gasses = [p for p in phases if p not in phase_set.gas_phases]
+        for p in non_gasses:
+            if p not in melting_points:
+                mp = phase_set.get_melting_point(p)
+                melting_points[p] = np.nan if mp is None else mp
+
+        if len(non_gasses) > 0:
+            min_mps[idx] = min(melting_points[p] for p in non_gasses)
+        gas_reactants[idx] = len(non_gasses) < len(phases)
+        solid_reactants[idx] = len(non_gasses)
+
+    return min_mps, gas_reactants, solid_reactants
+
+
 class BasicScore(ABC):
+    """Scores reactions at a temperature. Each scorer implements score_matrix, which
+    scores many reactions at many temperatures at once from arrays describing their
+    reactants, and score, which scores a single reaction, is built on it.
+
+    A scorer may instead implement only score, in which case score_matrix scores
+    each reaction at each temperature in turn with it.
+    """
 
     def __init__(self, phase_set: SolidPhaseSet, temp: int):
         self.phases = phase_set
         self.temp = temp
 
-    @abstractmethod
     def score(self, rxn: ComputedReaction):
-        pass
+        if type(self).score_matrix.__func__ is BasicScore.score_matrix.__func__:
+            raise NotImplementedError(f"{type(self).__name__} must implement score or score_matrix")
+
+        min_mps, gas_reactants, solid_reactants = reactant_features([rxn], self.phases)
+        scores = self.score_matrix(
+            np.array([self.temp]),
+            min_mps,
+            gas_reactants,
+            solid_reactants,
+            np.array([[rxn.energy_per_atom]])
+        )
+        return float(scores[0, 0])
+
+    @classmethod
+    def score_matrix(cls,
+                     temps: np.ndarray,
+                     min_melting_points: np.ndarray,
+                     gas_reactants: np.ndarray,
+                     solid_reactants: np.ndarray,
+                     delta_g: np.ndarray,
+                     rxns: List[ComputedReaction] = None,
+                     phase_set: SolidPhaseSet = None) -> np.ndarray:
+        """Scores R reactions at T temperatures at once. The reactant arrays are those
+        returned by reactant_features. This default scores each reaction with score,
+        so it needs the reactions themselves, and is replaced by scorers which can
+        work from the arrays alone. A reaction carries its energy at one temperature
+        only, so this default can only score one temperature at a time.
+
+        Args:
+            temps (np.ndarray): The T temperatures
+            min_melting_points (np.ndarray): The lowest melting point among the solid
+            reactants of each reaction, of length R
+            gas_reactants (np.ndarray): Whether each reaction has a gaseous reactant
+            solid_reactants (np.ndarray): The number of solid reactants of each reaction
+            delta_g (np.ndarray): The energy per atom of each reaction at each temperature,
+            of shape R x T
+            rxns (List[ComputedReaction], optional): The R reactions at the single
+            temperature in temps. Only used by scorers implementing score.
+            phase_set (SolidPhaseSet, optional): The phases, used to build a scorer for
+            each temperature. Only used by scorers implementing score.
+
+        Returns:
+            np.ndarray: The score of each reaction at each temperature, of shape R x T
+        """
+        if rxns is None or phase_set is None:
+            raise ValueError(f"{cls.__name__} only implements score, so score_matrix requires rxns and phase_set")
+        if len(temps) != 1:
+            raise ValueError(f"{cls.__name__} only implements score, so score_matrix can only score one temperature at a time")
+
+        scores = np.zeros((len(rxns), len(temps)))
+        for col, temp in enumerate(np.asarray(temps).tolist()):
+            scorer = cls(phase_set=phase_set, temp=temp)
+            for row, rxn in enumerate(rxns):
+                scores[row, col] = scorer.score(rxn)
+        return scores
+
+def _tm_ratios(temps: np.ndarray, min_melting_points: np.ndarray) -> np.ndarray:
+    return np.asarray(temps, dtype=float)[None, :] / np.asarray(min_melting_points, dtype=float)[:, None]
 
 class TammanHuttigScoreExponential(BasicScore):
     # https://en.wikipedia.org/wiki/Tammann_and_H%C3%BCttig_temperatures
 
-
-    def score(self, rxn: ComputedReaction):
-        phases = [c.reduced_formula for c in rxn.reactants]
-        non_gasses = [p for p in phases if p not in DEFAULT_GASES]
-        mps = [self.phases.get_melting_point(p) for p in non_gasses]
-        min_mp = min(mps)
+    @classmethod
+    def score_matrix(cls, temps, min_melting_points, gas_reactants, solid_reactants, delta_g, rxns=None, phase_set=None):
+        ratios = _tm_ratios(temps, min_melting_points)
 
         # Softplus adjustment
-        # delta_g_adjustment = softplus(-rxn.energy_per_atom)
-        delta_g_adjustment = softplus(-(2*rxn.energy_per_atom + 0.8))
-        
+        # delta_g_adjustment = softplus(-delta_g)
+        delta_g_adjustment = softplus(-(2*delta_g + 0.8))
 
-        if len(non_gasses) < len(phases):
-            # Huttig
-            return huttig_score_exp(self.temp / min_mp) * delta_g_adjustment
-        else:
-            # Tamman
-            return tamman_score_exp(self.temp / min_mp) * delta_g_adjustment
+        # Huttig where a gas takes part, otherwise Tamman
+        huttig = np.asarray(gas_reactants, dtype=bool)[:, None]
+        return np.where(huttig, huttig_score_exp(ratios), tamman_score_exp(ratios)) * delta_g_adjustment
 
 class TammanHuttigScoreSoftplus(BasicScore):
     # https://en.wikipedia.org/wiki/Tammann_and_H%C3%BCttig_temperatures
 
-
-    def score(self, rxn: ComputedReaction):
-        phases = [c.reduced_formula for c in rxn.reactants]
-        non_gasses = [p for p in phases if p not in DEFAULT_GASES]
-        mps = [self.phases.get_melting_point(p) for p in non_gasses]
-        min_mp = min(mps)
+    @classmethod
+    def score_matrix(cls, temps, min_melting_points, gas_reactants, solid_reactants, delta_g, rxns=None, phase_set=None):
+        ratios = _tm_ratios(temps, min_melting_points)
 
         # Softplus adjustment
-        delta_g_adjustment = softplus(-rxn.energy_per_atom)
-        delta_g_adjustment = softplus(-(2*rxn.energy_per_atom + 0.8))
+        delta_g_adjustment = softplus(-(2*delta_g + 0.8))
 
-        if len(non_gasses) < len(phases):
-            # Huttig
-            return huttig_score_softplus(self.temp / min_mp) * delta_g_adjustment
-        else:
-            # Tamman
-            return tamman_score_softplus(self.temp / min_mp) * delta_g_adjustment
+        # Huttig where a gas takes part, otherwise Tamman
+        huttig = np.asarray(gas_reactants, dtype=bool)[:, None]
+        return np.where(huttig, huttig_score_softplus(ratios), tamman_score_softplus(ratios)) * delta_g_adjustment
 
 
 class TammanHuttigScoreErf(BasicScore):
     # https://en.wikipedia.org/wiki/Tammann_and_H%C3%BCttig_temperatures
 
-    def score(self, rxn: ComputedReaction):
-        phases = [c.reduced_formula for c in rxn.reactants]
-        non_gasses = [p for p in phases if p not in self.phases.gas_phases]
-        mps = [self.phases.get_melting_point(p) for p in non_gasses]
-        min_mp = min(mps)
+    @classmethod
+    def score_matrix(cls, temps, min_melting_points, gas_reactants, solid_reactants, delta_g, rxns=None, phase_set=None):
+        ratios = _tm_ratios(temps, min_melting_points)
 
         # Softplus adjustment
-        delta_g_adjustment = erf(rxn.energy_per_atom)
+        delta_g_adjustment = erf(delta_g)
 
-        if len(non_gasses) == 1:
-            # Huttig
-            return huttig_score_softplus(self.temp / min_mp) * delta_g_adjustment
-        else:
-            # Tamman
-            return tamman_score_softplus(self.temp / min_mp) * delta_g_adjustment
+        # Huttig where a single solid takes part, otherwise Tamman
+        huttig = (np.asarray(solid_reactants) == 1)[:, None]
+        return np.where(huttig, huttig_score_softplus(ratios), tamman_score_softplus(ratios)) * delta_g_adjustment
 
 class TammanScore(BasicScore):
     # https://en.wikipedia.org/wiki/Tammann_and_H%C3%BCttig_temperatures
 
-    def score(self, rxn: ComputedReaction):
-        phases = [c.reduced_formula for c in rxn.reactants]
-        non_gasses = [p for p in phases if p not in self.phases.gas_phases]
-        mps = [self.phases.get_melting_point(p) for p in non_gasses]
-        min_mp = min(mps)
+    @classmethod
+    def score_matrix(cls, temps, min_melting_points, gas_reactants, solid_reactants, delta_g, rxns=None, phase_set=None):
+        ratios = _tm_ratios(temps, min_melting_points)
 
         # Softplus adjustment
-        delta_g_adjustment = erf(rxn.energy_per_atom)
-        return tamman_score_softplus(self.temp / min_mp) * delta_g_adjustment  
+        delta_g_adjustment = erf(delta_g)
+        return tamman_score_softplus(ratios) * delta_g_adjustment
 
 class ConstantScore(BasicScore):
 
-    def score(self, _):
-        return 1.0
+    @classmethod
+    def score_matrix(cls, temps, min_melting_points, gas_reactants, solid_reactants, delta_g, rxns=None, phase_set=None):
+        return np.ones(np.shape(delta_g))
 
 class GibbsErfScore(BasicScore):
-        
-    def score(self, rxn: ComputedReaction):
-        return erf(rxn.energy_per_atom)
-    
+
+    @classmethod
+    def score_matrix(cls, temps, min_melting_points, gas_reactants, solid_reactants, delta_g, rxns=None, phase_set=None):
+        return erf(np.asarray(delta_g, dtype=float))
+
 
 class TammanTightLinear(BasicScore):
 
-    def score(self, rxn: ComputedReaction):
-        phases = [c.reduced_formula for c in rxn.reactants]
-        non_gasses = [p for p in phases if p not in self.phases.gas_phases]
-        mps = [self.phases.get_melting_point(p) for p in non_gasses]
-        min_mp = min(mps)
+    @classmethod
+    def score_matrix(cls, temps, min_melting_points, gas_reactants, solid_reactants, delta_g, rxns=None, phase_set=None):
+        ratios = _tm_ratios(temps, min_melting_points)
 
         def _score(x):
-            return 1/2*(1 + math.erf(20*(x -0.6))) * (1/0.6*x)
+            return 1/2*(1 + _erf(20*(x -0.6))) * (1/0.6*x)
 
         # Softplus adjustment
-        delta_g_adjustment = erf(rxn.energy_per_atom)
-        return _score(self.temp / min_mp) * delta_g_adjustment  
-
-    
+        delta_g_adjustment = erf(delta_g)
+        return _score(ratios) * delta_g_adjustment
 
 
 def score_rxns(reactions: ReactionSet, scorer: BasicScore, phase_set: SolidPhaseSet = None):
-    scored_reactions = []
-
-    for rxn in tqdm(reactions.get_rxns(), desc=f"Scoring reactions... at temp {scorer.temp}"):
-        reactants = [r.reduced_formula for r in rxn.reactants]
-        non_gases = [r for r in reactants if r not in phase_set.gas_phases]
-        if len(non_gases) > 0:
-            scored_rxn = ScoredReaction.from_rxn_network(scorer.score(rxn), rxn, phase_set.volumes)
-            scored_reactions.append(scored_rxn)
-
-    return scored_reactions
\ No newline at end of file
+    """Scores every reaction in a set which has a solid reactant at the temperature of
+    the scorer. The scores are computed in a single call to the scorer's score_matrix.
+
+    Args:
+        reactions (ReactionSet): The reactions to score
+        scorer (BasicScore): The scorer to use
+        phase_set (SolidPhaseSet, optional): The phases, which provide melting points,
+        gases and volumes
+
+    Returns:
+        List[ScoredReaction]:
+    """
+    rxns = list(reactions.get_rxns())
+    min_mps, gas_reactants, solid_reactants = reactant_features(rxns, phase_set)
+    keep = solid_reactants > 0
+    rxns = [rxn for rxn, kept in zip(rxns, keep.tolist()) if kept]
+
+    delta_g = np.array([rxn.energy_per_atom for rxn in rxns], dtype=float)[:, None]
+    scores = scorer.score_matrix(
+        np.array([scorer.temp]),
+        min_mps[keep],
+        gas_reactants[keep],
+        solid_reactants[keep],
+        delta_g,
+        rxns=rxns,
+        phase_set=phase_set
+    )
+
+    return [
+        ScoredReaction.from_rxn_network(score, rxn, phase_set.volumes)
+        for rxn, score in zip(rxns, scores[:, 0].tolist())
+    ]
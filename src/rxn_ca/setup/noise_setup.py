@@ -6,7 +6,7 @@ from pylattica.core import Simulation
 
 from ..core.constants import VOLUME, MELTED_AMTS, VOL_MULTIPLIER, GASES_CONSUMED, GASES_EVOLVED
 from ..phases import SolidPhaseSet
-from random import shuffle
+from ..core.rng import RandomStream
 
 import copy
 class SetupRandomNoise():
@@ -18,8 +18,12 @@ class SetupRandomNoise():
     def setup(self,
             phase_mol_ratios: Dict[str, float],
             size: int = 15,
-            packing_efficiency = 0.97
+            packing_efficiency = 0.97,
+            rng: RandomStream = None,
     ):
+        if rng is None:
+            rng = RandomStream()
+
         total_vol = size ** self.dim * packing_efficiency
         volume_ratios = self.phase_set.mole_amts_to_vols(phase_mol_ratios)
         
@@ -32,10 +36,10 @@ class SetupRandomNoise():
         state = setup.setup_solid_phase(struct, self.phase_set.FREE_SPACE)
 
         cell_occs = [k for k, v in desired_phase_vols.items() for _ in range(v)]
-        shuffle(cell_occs)
+        rng.shuffle(cell_occs)
 
         site_ids = struct.site_ids
-        shuffle(site_ids)
+        rng.shuffle(site_ids)
 
         for i, occ in enumerate(cell_occs):
             state.set_site_state(site_ids[i], {
@@ -1,7 +1,8 @@
 from typing import Dict
-import random
 
 from ..analysis.reaction_step_analyzer import ReactionStepAnalyzer
+from ..core.stencil_neighborhood import MooreStencilBuilder
+from ..core.rng import RandomStream
 from pylattica.core import SimulationState
 from pylattica.core import BasicController
 from pylattica.core.neighborhood_builders import NeighborhoodBuilder
@@ -9,7 +10,6 @@ from pylattica.core.periodic_structure import PeriodicStructure
 from pylattica.core.simulation_state import SimulationState
 from pylattica.discrete import PhaseSet
 from pylattica.discrete.state_constants import DISCRETE_OCCUPANCY, VACANT
-from pylattica.structures.square_grid.neighborhoods import MooreNbHoodBuilder
 
 class PhaseGrowthController(BasicController):
 
@@ -20,6 +20,7 @@ class PhaseGrowthController(BasicController):
         desired_phase_vols: Dict,
         background_phase: str = VACANT,
         nb_builder: NeighborhoodBuilder = None,
+        rng: RandomStream = None,
     ) -> None:
         
         self.background_phase = background_phase
@@ -30,15 +31,22 @@ class PhaseGrowthController(BasicController):
         self.known_empty_ids = periodic_struct.site_ids.copy()
 
         if nb_builder is None:
-            self.nb_builder = MooreNbHoodBuilder(1, dim=periodic_struct.dim)
+            self.nb_builder = MooreStencilBuilder(1, dim=periodic_struct.dim)
         else:
             self.nb_builder = nb_builder
 
         self.nb_graph = self.nb_builder.get(periodic_struct)
+        self.set_rng(rng if rng is not None else RandomStream())
+
+    def set_rng(self, rng: RandomStream):
+        self.rng = rng
+        # Stochastic neighborhoods draw their stencils from the same stream
+        if hasattr(self.nb_graph, "set_rng"):
+            self.nb_graph.set_rng(rng)
     
     def get_random_site(self, _):
         if len(self.known_empty_ids) > 0:
-            return random.choice(self.known_empty_ids)
+            return self.rng.choice(self.known_empty_ids)
         else:
             return 1
 
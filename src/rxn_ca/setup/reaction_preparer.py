@@ -6,8 +6,10 @@ from pylattica.core.simulation import Simulation
 from ..phases.solid_phase_set import SolidPhaseSet
 from ..analysis.reaction_step_analyzer import ReactionStepAnalyzer
 from ..core.constants import VOLUME, VOL_MULTIPLIER, GASES_CONSUMED, GASES_EVOLVED, MELTED_AMTS
+from ..core.stencil_neighborhood import PseudoHexagonalStencilBuilder
+from ..core.rng import RandomStream
 from .constants import VOLUME_TOLERANCE_FRAC, VOLUME_TOLERANCE_ABS
-from pylattica.structures.square_grid import DiscreteGridSetup, PseudoHexagonalNeighborhoodBuilder2D, PseudoHexagonalNeighborhoodBuilder3D
+from pylattica.structures.square_grid import DiscreteGridSetup
 from pylattica.core import AsynchronousRunner, Simulation
 from pylattica.discrete.discrete_step_analyzer import DiscreteStepAnalyzer
 
@@ -32,6 +34,7 @@ class ReactionPreparer():
                          size: int = 15,
                          volume_multiplier: float = 1.0,
                          buffer: int = 1,
+                         rng: RandomStream = None,
         ) -> Simulation:
 
         total_vol = size ** self.dim
@@ -54,10 +57,7 @@ class ReactionPreparer():
         print("Reactant Phases: ", desired_phase_vols)
         print("Volume Ratios: ", normalized_vol_ratios)
         print("Using volume multiplier: ", volume_multiplier)
-        if self.dim == 2:
-            nb_spec = PseudoHexagonalNeighborhoodBuilder2D()
-        else:
-            nb_spec = PseudoHexagonalNeighborhoodBuilder3D()
+        nb_spec = PseudoHexagonalStencilBuilder(self.dim)
 
         setup = DiscreteGridSetup(self.phase_set, dim=self.dim)
         print(num_sites, total_vol_available)
@@ -90,6 +90,7 @@ class ReactionPreparer():
             desired_phase_vols=desired_phase_vols,
             nb_builder=nb_spec,
             background_phase=self.phase_set.FREE_SPACE,
+            rng=rng,
         )
 
         empty_count = discrete_analzyer.cell_count(simulation.state, self.phase_set.FREE_SPACE)
@@ -148,6 +149,7 @@ class ReactionPreparer():
         tuner_controller = VolumeTuningController(
             self.phase_set,
             desired_phase_vols,
+            rng=controller.rng,
         )
 
         print("\n")
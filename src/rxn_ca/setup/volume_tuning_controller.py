@@ -1,9 +1,9 @@
 from typing import Dict
 import numpy as np
-import random
 
 from ..analysis.reaction_step_analyzer import ReactionStepAnalyzer
 from ..core.constants import VOLUME
+from ..core.rng import RandomStream
 from .constants import VOLUME_TOLERANCE_ABS, VOLUME_TOLERANCE_FRAC
 from pylattica.core import SimulationState
 from pylattica.core import BasicController
@@ -21,12 +21,17 @@ class VolumeTuningController(BasicController):
         self,
         phase_set: PhaseSet,
         ideal_vol_amts: Dict,
+        rng: RandomStream = None,
     ) -> None:
         
         self.phase_set = phase_set
         self.analyzer = ReactionStepAnalyzer(self.phase_set)
         self.discrete_analyzer = DiscreteStepAnalyzer()
         self.ideal_vol_amts = ideal_vol_amts
+        self.rng = rng if rng is not None else RandomStream()
+
+    def set_rng(self, rng: RandomStream):
+        self.rng = rng
 
     def get_random_site(self, prev_state: SimulationState):
         
@@ -49,7 +54,7 @@ class VolumeTuningController(BasicController):
             state_criteria = criteria
         )
 
-        random.shuffle(valid_sites)
+        self.rng.shuffle(valid_sites)
         return valid_sites
 
     def get_state_update(self, site_id: int, prev_state: SimulationState):
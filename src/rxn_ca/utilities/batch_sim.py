@@ -0,0 +1,138 @@
+from typing import Dict, Iterator, List, Tuple, Union
+
+import multiprocessing as mp
+import os
+
+import numpy as np
+
+from pylattica.core import Simulation
+
+from ..core.recipe import ReactionRecipe
+from ..core.rng import RandomStream
+from ..computing.schemas.ca_result_schema import RxnCAResultDoc, RxnCAResultManifest
+from ..reactions import ReactionLibrary, FlatReactionLibrary
+
+from .parallel_sim import build_result_doc, shard_label, shard_or_result
+from .single_sim import run_single_sim, prepare_library
+
+_recipes = "recipes"
+_reaction_libs = "reaction_libs"
+_initial_simulation = "initial_simulation"
+_seeds = "seeds"
+_shard_dir = "shard_dir"
+
+def _init_worker(recipes, reaction_libs, initial_simulation, seeds, shard_dir=None):
+    global mp_globals
+
+    mp_globals = {
+        _recipes: recipes,
+        _reaction_libs: reaction_libs,
+        _initial_simulation: initial_simulation,
+        _seeds: seeds,
+        _shard_dir: shard_dir
+    }
+
+def _label(recipe_idx, recipe):
+    # Recipes need not have distinct names, so shards are prefixed with the recipe's index
+    return f"{recipe_idx}_{shard_label(recipe)}"
+
+def _run_task(task):
+    recipe_idx, realization_idx = task
+    recipe = mp_globals[_recipes][recipe_idx]
+    reaction_lib = mp_globals[_reaction_libs][recipe_idx]
+    seeds = mp_globals[_seeds][recipe_idx]
+    shard_dir = mp_globals[_shard_dir]
+
+    result: RxnCAResultDoc = run_single_sim(
+        recipe,
+        reaction_lib=reaction_lib,
+        initial_simulation=mp_globals[_initial_simulation],
+        rng=RandomStream(seeds[realization_idx])
+    )
+    return recipe_idx, realization_idx, shard_or_result(result.results[0], _label(recipe_idx, recipe), realization_idx, shard_dir)
+
+
+def run_recipes_parallel(recipes: List[ReactionRecipe],
+                         reaction_lib: ReactionLibrary,
+                         initial_simulation: Simulation = None,
+                         num_workers: int = None,
+                         shard_dir: str = None) -> Iterator[Tuple[int, Union[RxnCAResultDoc, RxnCAResultManifest]]]:
+    """Runs every realization of several recipes over a single pool of worker processes.
+
+    Each (recipe, realization) pair is a separate task, and the tasks of every recipe are
+    placed in one queue, so workers move on to the next recipe as soon as they finish with
+    the last one and the pool is never larger than the machine. Realizations draw from the
+    same seeds as they would in run_sim_parallel, so their results are identical.
+
+    The library is placed in shared memory once for each distinct set of phase exclusions
+    among the recipes, and workers attach to it read-only.
+
+    Args:
+        recipes (List[ReactionRecipe]): The recipes to run
+        reaction_lib (ReactionLibrary): The scored reactions to use
+        initial_simulation (Simulation, optional): The starting point shared by every
+        realization. If None, each realization sets up its own from its seed.
+        num_workers (int, optional): The number of worker processes. Defaults to the
+        number of CPUs.
+        shard_dir (str, optional): If given, each worker writes its realizations to files
+        in this directory and returns only handles to them, and a manifest of the shards
+        is yielded for each recipe instead of a result document. Defaults to None.
+
+    Yields:
+        Tuple[int, Union[RxnCAResultDoc, RxnCAResultManifest]]: The index of a recipe and
+        its result document, as soon as all of its realizations are done
+    """
+    if num_workers is None:
+        num_workers = os.cpu_count()
+
+    if shard_dir is not None:
+        os.makedirs(shard_dir, exist_ok=True)
+
+    seeds = [np.random.SeedSequence(recipe.seed).spawn(recipe.num_realizations) for recipe in recipes]
+    prepared_libs = [prepare_library(recipe, reaction_lib) for recipe in recipes]
+
+    tasks = []
+    results: Dict[int, List] = {}
+    remaining: Dict[int, int] = {}
+    for recipe_idx, recipe in enumerate(recipes):
+        results[recipe_idx] = [None] * recipe.num_realizations
+        tasks.extend([(recipe_idx, realization_idx) for realization_idx in range(recipe.num_realizations)])
+        remaining[recipe_idx] = recipe.num_realizations
+
+    # Libraries are shared by fingerprint, so each holds the temperatures of every
+    # recipe which uses it
+    fingerprints = [prepared_lib.fingerprint() for prepared_lib in prepared_libs]
+    lib_temps: Dict[str, set] = {}
+    for fingerprint, recipe in zip(fingerprints, recipes):
+        lib_temps.setdefault(fingerprint, set()).update(recipe.heating_schedule.all_temps)
+
+    shared_libs: Dict[str, FlatReactionLibrary] = {}
+    try:
+        recipe_libs = []
+        for fingerprint, prepared_lib in zip(fingerprints, prepared_libs):
+            if fingerprint not in shared_libs:
+                shared_libs[fingerprint] = FlatReactionLibrary.from_library(prepared_lib, temps=lib_temps[fingerprint]).to_shared_memory()
+            recipe_libs.append(shared_libs[fingerprint])
+
+        with mp.get_context("fork").Pool(
+            max(1, min(num_workers, len(tasks))),
+            initializer=_init_worker,
+            initargs=(recipes, recipe_libs, initial_simulation, seeds, shard_dir)
+        ) as pool:
+            for recipe_idx, realization_idx, result in pool.imap_unordered(_run_task, tasks):
+                results[recipe_idx][realization_idx] = result
+
+                remaining[recipe_idx] -= 1
+                if remaining[recipe_idx] == 0:
+                    yield recipe_idx, build_result_doc(
+                        recipes[recipe_idx],
+                        reaction_lib,
+                        prepared_libs[recipe_idx],
+                        results.pop(recipe_idx),
+                        seeds[recipe_idx],
+                        initial_simulation,
+                        sharded=shard_dir is not None
+                    )
+    finally:
+        for shared_lib in shared_libs.values():
+            shared_lib.unlink()
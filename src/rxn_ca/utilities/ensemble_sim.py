@@ -0,0 +1,84 @@
+from typing import List
+
+import numpy as np
+
+from pylattica.core import Simulation
+
+from ..core.recipe import ReactionRecipe
+from ..core.reaction_result import ReactionResult
+from ..core.liquid_swap_controller import LiquidSwapController
+from ..core.reaction_calculator import ReactionCalculator
+from ..core.rng import RandomStream
+from ..reactions import ReactionLibrary
+
+from .heating_schedule_runner import EnsembleScheduleRunner
+from .setup_reaction import setup_noise_reaction
+from .single_sim import prepare_library
+
+
+def run_ensemble(recipe: ReactionRecipe,
+                 reaction_lib: ReactionLibrary,
+                 seeds: List[np.random.SeedSequence],
+                 initial_simulation: Simulation = None,
+                 max_steps: int = None) -> List[ReactionResult]:
+    """Runs one realization of a recipe for each seed, all in this process. The
+    streams are derived from each seed in the same way as in run_single_sim, so each
+    realization can be replayed on its own with the colored batch engine.
+
+    This uses the EnsembleRunner, which is experimental, and is not used by
+    run_sim_parallel.
+
+    Args:
+        recipe (ReactionRecipe): The recipe to run
+        reaction_lib (ReactionLibrary): The scored reactions to use
+        seeds (List[np.random.SeedSequence]): The seed of each realization
+        initial_simulation (Simulation, optional): The starting point shared by every
+        realization. If None, each realization sets up its own from its seed.
+        max_steps (int, optional): The most simulation steps to run. Defaults to None.
+
+    Returns:
+        List[ReactionResult]: The result of each realization
+    """
+    if recipe.equilibrium_window is not None:
+        raise ValueError("Equilibrium detection is not supported by the ensemble engine")
+
+    reaction_lib = prepare_library(recipe, reaction_lib)
+
+    simulations: List[Simulation] = []
+    sim_rngs: List[RandomStream] = []
+    for seed in seeds:
+        setup_rng, sim_rng = RandomStream(seed).spawn(2)
+        sim_rngs.append(sim_rng)
+
+        if initial_simulation is None:
+            simulations.append(setup_noise_reaction(
+                reaction_lib.phases,
+                precursor_mole_ratios = recipe.reactant_amounts,
+                size = recipe.simulation_size,
+                packing_fraction = recipe.packing_fraction,
+                rng = setup_rng,
+            ))
+        else:
+            simulations.append(Simulation(initial_simulation.state.copy(), initial_simulation.structure))
+
+    structure = simulations[0].structure
+    rxn_calculator = ReactionCalculator(
+        LiquidSwapController.get_stencil_from_structure(structure),
+        atmospheric_species=recipe.atmospheric_phases,
+        every_neighbor_reacts=recipe.every_neighbor_reacts,
+        rng=sim_rngs[0],
+    )
+
+    controller = LiquidSwapController(
+        structure,
+        rxn_calculator=rxn_calculator,
+    )
+
+    return EnsembleScheduleRunner().run_ensemble(
+        simulations,
+        reaction_lib,
+        recipe.heating_schedule,
+        controller=controller,
+        rngs=sim_rngs,
+        max_steps=max_steps
+    )
@@ -3,30 +3,72 @@ from rxn_network.reactions.reaction_set import ReactionSet
 from ..core import HeatingSchedule
 from ..phases import SolidPhaseSet
 
-from ..reactions import ReactionLibrary, ScoredReaction, ScoredReactionSet, score_rxns
-from ..reactions.scorers import BasicScore, TammanHuttigScoreErf
+from ..reactions import ReactionLibrary, ScoredReaction, ScoredReactionSet
+from ..reactions.scorers import BasicScore, TammanHuttigScoreErf, reactant_features
 from tqdm import tqdm
 
-from typing import List
+from typing import Dict, List, Tuple
 
 import multiprocessing as mp
+import numpy as np
 
 _scoring_globals = {}
 
-def fn(temp):
+# The number of tasks queued for each worker, so that workers which finish
+# their chunks early can pick up more rather than sitting idle
+TASKS_PER_WORKER = 4
+
+def _chunk_rxns(rxn_set: ReactionSet, start: int, stop: int) -> List:
+    """Builds the reactions of a set whose positions in get_rxns() are in [start, stop),
+    without building any of the others.
+    """
+    idxs = {}
+    offset = 0
+    for size, size_idxs in rxn_set.indices.items():
+        lo = max(start - offset, 0)
+        hi = min(stop - offset, len(size_idxs))
+        if lo < hi:
+            idxs[size] = slice(lo, hi)
+        offset += len(size_idxs)
+
+    return list(rxn_set._get_rxns_by_indices(idxs))
+
+def fn(task):
+    """Scores one chunk of the reactions at one temperature. Returns the scores and
+    energies per atom of the reactions in the chunk which have a solid reactant, and,
+    if asked for, their stoichiometry.
+    """
+    temp, start, stop, with_stoich = task
     score_class = _scoring_globals.get('score_class')
     phase_set = _scoring_globals.get('phase_set')
-    rxn_set  = _scoring_globals.get('base_rxns')
+    rxns_at_temps = _scoring_globals.get('rxns_at_tmps')
 
-    scorer = score_class(temp=temp, phase_set=phase_set)
-    if _scoring_globals.get("rxns_at_tmps") is None:
-        rset = rxn_set.set_new_temperature(temp)
+    if rxns_at_temps is None:
+        rxns = [rxn.get_new_temperature(temp) for rxn in _chunk_rxns(_scoring_globals.get('base_rxns'), start, stop)]
     else:
-        rset = _scoring_globals.get("rxns_at_tmps").get(temp)
-
-    scored_rxns: List[ScoredReaction] = score_rxns(rset, scorer, phase_set=phase_set)
-    scored_rset = ScoredReactionSet(scored_rxns, phase_set)
-    return scored_rset
+        rxns = _chunk_rxns(rxns_at_temps.get(temp), start, stop)
+
+    min_mps, gas_reactants, solid_reactants = reactant_features(rxns, phase_set)
+    keep = solid_reactants > 0
+    rxns = [rxn for rxn, kept in zip(rxns, keep.tolist()) if kept]
+
+    energies = np.array([rxn.energy_per_atom for rxn in rxns], dtype=float)
+    scores = score_class.score_matrix(
+        np.array([temp]),
+        min_mps[keep],
+        gas_reactants[keep],
+        solid_reactants[keep],
+        energies[:, None],
+        rxns=rxns,
+        phase_set=phase_set
+    )[:, 0]
+
+    stoich = None
+    if with_stoich:
+        scored = [ScoredReaction.from_rxn_network(None, rxn, phase_set.volumes) for rxn in rxns]
+        stoich = [(rxn._reactants, rxn._products) for rxn in scored]
+
+    return temp, start, scores, energies, stoich
 
 def get_scored_rxns(rxn_set: ReactionSet,
                     heating_sched: HeatingSchedule = None,
@@ -34,41 +76,92 @@ def get_scored_rxns(rxn_set: ReactionSet,
                     scorer_class: BasicScore = TammanHuttigScoreErf,
                     phase_set: SolidPhaseSet = None,
                     rxns_at_temps = None,
-                    parallel=True):
+                    parallel=True,
+                    chunk_size: int = None):
+    """Scores a set of reactions at each of a list of temperatures.
+
+    The work is split into tasks which each score a chunk of the reactions at a single
+    temperature, so every worker is kept busy however few temperatures there are. Each
+    task returns only arrays of scores and energies, and the stoichiometry of the
+    reactions is only sent back once, after which the reactions at each temperature
+    are copies of the same ones with different scores.
+
+    Args:
+        rxn_set (ReactionSet): The reactions to score
+        heating_sched (HeatingSchedule, optional): If given, its temperatures are used
+        temps (List, optional): The temperatures to score the reactions at
+        scorer_class (BasicScore, optional): The scorer. Defaults to TammanHuttigScoreErf.
+        phase_set (SolidPhaseSet, optional): The phases, which provide melting points and volumes
+        rxns_at_temps (Dict, optional): The reactions at each temperature, if they
+        have already been computed. Otherwise they are computed from rxn_set.
+        parallel (bool, optional): Whether to score on a pool of worker processes. Defaults to True.
+        chunk_size (int, optional): The number of reactions scored by each task. Defaults
+        to a size which gives each worker several tasks.
+
+    Returns:
+        ReactionLibrary:
+    """
+    global _scoring_globals
 
     lib = ReactionLibrary(phases=phase_set)
 
     if heating_sched is not None:
         temps = heating_sched.all_temps
 
+    temps = list(dict.fromkeys(temps))
+
     if rxns_at_temps is not None:
         rxns_at_temps = {int(t): r for t, r in rxns_at_temps.items() }
-
+        num_rxns = { t: len(rxns_at_temps.get(t)) for t in temps }
+    else:
+        num_rxns = { t: len(rxn_set) for t in temps }
+
+    num_workers = mp.cpu_count() if parallel else 1
+    if chunk_size is None:
+        total = sum(num_rxns.values())
+        chunk_size = -(-total // (TASKS_PER_WORKER * num_workers))
+    chunk_size = max(1, chunk_size)
+
+    # The same reactions are scored at every temperature unless they were supplied
+    # for each one, so their stoichiometry is only needed at the first
+    tasks = []
+    for temp_idx, t in enumerate(temps):
+        with_stoich = rxns_at_temps is not None or temp_idx == 0
+        for start in range(0, num_rxns[t], chunk_size):
+            tasks.append((t, start, min(start + chunk_size, num_rxns[t]), with_stoich))
+
+    _scoring_globals = {
+        'score_class': scorer_class,
+        'phase_set': phase_set,
+        'base_rxns': rxn_set,
+        'rxns_at_tmps': rxns_at_temps,
+    }
+
+    desc = f"Scoring reactions at {len(temps)} temperatures..."
     if parallel:
-        global _scoring_globals
-
-        _scoring_globals['score_class'] = scorer_class
-        _scoring_globals['phase_set'] = phase_set
-        _scoring_globals['base_rxns'] = rxn_set
-
-        if rxns_at_temps is not None:
-            _scoring_globals['rxns_at_tmps'] = rxns_at_temps
-                
-        with mp.get_context('fork').Pool(mp.cpu_count()) as pool:
-
-            results = pool.map(fn, temps)
-            for t, r in zip(temps, results):
-                lib.add_rxns_at_temp(r, t)
+        with mp.get_context('fork').Pool(num_workers) as pool:
+            results = list(tqdm(pool.imap(fn, tasks), total=len(tasks), desc=desc))
     else:
-        if rxns_at_temps is None:
-            rxns_at_temps = rxn_set.compute_at_temperatures(temps)
-        
-        for t in temps:
-            scorer = scorer_class(temp=t, phase_set=phase_set)
-            rset = rxns_at_temps.get(t)
-
-            scored_rxns: List[ScoredReaction] = score_rxns(rset, scorer, phase_set=phase_set)
-            scored_rset = ScoredReactionSet(scored_rxns, lib.phases)
-            lib.add_rxns_at_temp(scored_rset, t)
-
-    return lib
\ No newline at end of file
+        results = [fn(task) for task in tqdm(tasks, desc=desc)]
+
+    templates: Dict[Tuple, List[ScoredReaction]] = {}
+    rxns_by_temp: Dict[int, List[ScoredReaction]] = { t: [] for t in temps }
+    for t, start, scores, energies, stoich in results:
+        key = (t if rxns_at_temps is not None else None, start)
+        if stoich is not None:
+            rxns = [
+                ScoredReaction(reactants, products, score, energy_per_atom=energy)
+                for (reactants, products), score, energy in zip(stoich, scores.tolist(), energies.tolist())
+            ]
+            templates[key] = rxns
+        else:
+            rxns = [
+                rxn.with_score(score, energy)
+                for rxn, score, energy in zip(templates[key], scores.tolist(), energies.tolist())
+            ]
+        rxns_by_temp[t].extend(rxns)
+
+    for t in temps:
+        lib.add_rxns_at_temp(ScoredReactionSet(rxns_by_temp[t], lib.phases), t)
+
+    return lib
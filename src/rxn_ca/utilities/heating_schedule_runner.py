@@ -1,30 +1,44 @@
 from ..core.reaction_result import ReactionResult
 from ..core.reaction_controller import ReactionController
 from ..core.reaction_calculator import ReactionCalculator
-from ..core.heating import HeatingSchedule, RegrindStep, HeatingStep
+from ..core.liquid_swap_controller import LiquidSwapController
+from ..core.ensemble_runner import EnsembleRunner
+from ..core.rng import RandomStream
+from ..core.idle_steps import IDLE_STEP, add_idle_steps
+from ..core.heating import HeatingSchedule, RegrindStep, HeatingStep, RecipeStep
 from ..core.constants import GASES_EVOLVED, GASES_CONSUMED, MELTED_AMTS, TEMPERATURE
 from ..reactions.reaction_library import ReactionLibrary
 from ..core.melt_and_regrind import melt_and_regrind
 from ..analysis.reaction_step_analyzer import ReactionStepAnalyzer
+from ..analysis.equilibrium_detector import EquilibriumDetector
 from .setup_reaction import setup_noise_reaction
 
-from pylattica.core import AsynchronousRunner, Simulation, BasicController
+from pylattica.core import AsynchronousRunner, Simulation, BasicController, SimulationState
+from pylattica.core.runner.base_runner import Runner
 
-from typing import List, Callable
+from typing import List, Callable, Tuple
 import numpy as np
 
 class HeatingScheduleRunner():
 
-    def __init__(self, middlewares: List[Callable] = []) -> None:
+    def __init__(self,
+                 middlewares: List[Callable] = [],
+                 runner: Runner = None,
+                 equilibrium_detector: EquilibriumDetector = None) -> None:
         self._middlewares = middlewares
+        if runner is None:
+            runner = AsynchronousRunner()
+        self._runner = runner
+        self._equilibrium_detector = equilibrium_detector
         
     def run_multi(self,
                 simulation: Simulation,
                 reaction_lib: ReactionLibrary,
                 heating_schedule: HeatingSchedule,
                 controller: BasicController,
-                verbose=True):
-        runner = AsynchronousRunner()       
+                verbose=True,
+                max_steps: int = None):
+        runner = self._runner
         results: List[ReactionResult] = []
 
         starting_state = simulation.state
@@ -41,18 +55,33 @@ class HeatingScheduleRunner():
         assert GASES_CONSUMED in starting_state.get_general_state()
 
         reground_state = None
+        steps_run = 0
+        equilibrated = False
 
-        for step_no, step in enumerate(heating_schedule.steps):
+        step_no = 0
+        for segment in self._segment_steps(heating_schedule):
+            if max_steps is not None and steps_run >= max_steps:
+                break
+
+            step = segment[0]
             if isinstance(step, HeatingStep):
-                print(f'Running step {step_no + 1} of {total_steps}.')
+                if len(segment) == 1:
+                    print(f'Running step {step_no + 1} of {total_steps}.')
+                else:
+                    print(f'Running steps {step_no + 1} to {step_no + len(segment)} of {total_steps}.')
                 if step.temperature != prev_temp:
                     print(f'Setting new temperature: {step.temperature}')
                 
+                if step.temperature != prev_temp and self._equilibrium_detector is not None:
+                    self._equilibrium_detector.reset()
+                    equilibrated = False
+
                 prev_temp = step.temperature
                 controller.set_temperature(step.temperature)
                 controller.set_rxn_set(reaction_lib.get_rxns_at_temp(step.temperature))
 
-                num_simulation_steps = int(step_size * step.duration)
+                step_lengths = self._segment_lengths(segment, step_size, steps_run, max_steps)
+                num_simulation_steps = sum(step_lengths)
 
                 if reground_state is not None:
                     starting_state = reground_state
@@ -65,33 +94,261 @@ class HeatingScheduleRunner():
                 print("Setting temperature state")
                 starting_state.set_general_state({TEMPERATURE: step.temperature })
 
-                result = runner.run(
-                    starting_state,
+                if self._equilibrium_detector is None:
+                    result = runner.run(
+                        starting_state,
+                        controller,
+                        num_simulation_steps,
+                        verbose=verbose
+                    )
+                else:
+                    result, equilibrated = self._run_until_equilibrium(
+                        starting_state,
+                        controller,
+                        num_simulation_steps,
+                        equilibrated=equilibrated,
+                        verbose=verbose
+                    )
+
+                add_step_boundaries(result, step_lengths)
+                results.append(result)
+                steps_run += num_simulation_steps
+            elif isinstance(step, RegrindStep):
+                reground_state = self._regrind(results[-1], reaction_lib, sim_size, controller.rng)
+
+                if self._equilibrium_detector is not None:
+                    self._equilibrium_detector.reset()
+                    equilibrated = False
+
+            step_no += len(segment)
+
+        result = concatenate_results(results)
+        return result
+
+    def _segment_steps(self, heating_schedule: HeatingSchedule) -> List[List[RecipeStep]]:
+        """Groups consecutive heating steps at the same temperature so that each
+        group can be simulated in a single run. Steps are only grouped if there
+        are no middlewares, since those are applied between every pair of steps.
+
+        Args:
+            heating_schedule (HeatingSchedule): The heating schedule to be run
+
+        Returns:
+            List[List[RecipeStep]]: The steps of the schedule, in order, split into segments
+        """
+        segments: List[List[RecipeStep]] = []
+        for step in heating_schedule.steps:
+            if len(self._middlewares) == 0 and len(segments) > 0 \
+                    and isinstance(step, HeatingStep) \
+                    and isinstance(segments[-1][-1], HeatingStep) \
+                    and segments[-1][-1].temperature == step.temperature:
+                segments[-1].append(step)
+            else:
+                segments.append([step])
+        return segments
+
+    def _segment_lengths(self, segment: List[HeatingStep], step_size: int, steps_run: int, max_steps: int = None) -> List[int]:
+        """Returns the number of simulation steps in each heating step of a segment,
+        leaving out the steps beyond max_steps.
+
+        Args:
+            segment (List[HeatingStep]): Consecutive heating steps at the same temperature
+            step_size (int): The number of simulation steps in one unit of duration
+            steps_run (int): The number of simulation steps run before this segment
+            max_steps (int, optional): The most simulation steps to run in total. Defaults to None.
+
+        Returns:
+            List[int]:
+        """
+        step_lengths = []
+        for step in segment:
+            if max_steps is not None and steps_run + sum(step_lengths) >= max_steps:
+                break
+            num_step_steps = int(step_size * step.duration)
+            if max_steps is not None:
+                num_step_steps = min(num_step_steps, max_steps - steps_run - sum(step_lengths))
+            step_lengths.append(num_step_steps)
+        return step_lengths
+
+    def _regrind(self, result: ReactionResult, reaction_lib: ReactionLibrary, sim_size: int, rng: RandomStream) -> Simulation:
+        analyzer = ReactionStepAnalyzer(reaction_lib.phases)
+        analyzer.set_step_group(result.output)
+        amts = analyzer.get_all_mole_fractions()
+        new_amts = { p: amt for p, amt in amts.items() if amt > 0.01}
+
+        return setup_noise_reaction(
+            reaction_lib.phases,
+            precursor_mole_ratios = new_amts,
+            size = sim_size,
+            rng = rng,
+        )
+
+    def _run_until_equilibrium(self,
+                               starting_state: SimulationState,
+                               controller: BasicController,
+                               num_steps: int,
+                               equilibrated: bool = False,
+                               verbose: bool = True) -> Tuple[ReactionResult, bool]:
+        """Runs a heating step in pieces which line up with the windows of the
+        equilibrium detector, and stops early once the detector fires. The skipped
+        steps are recorded as steps in which nothing changed, so that the result has
+        the same length it would have had if the whole step had been simulated.
+
+        Args:
+            starting_state (SimulationState): The state at the start of the step
+            controller (BasicController): The controller for the simulation
+            num_steps (int): The number of steps in the heating step
+            equilibrated (bool, optional): Whether equilibrium was already reached at
+            this temperature, in which case the whole step is skipped. Defaults to False.
+            verbose (bool, optional): Defaults to True.
+
+        Returns:
+            Tuple[ReactionResult, bool]: The result, and whether equilibrium has been reached
+        """
+        detector = self._equilibrium_detector
+
+        result: ReactionResult = None
+        steps_run = 0
+        while steps_run < num_steps and not equilibrated:
+            piece_steps = min(num_steps - steps_run, detector.steps_until_check(starting_state.size))
+            piece_start = starting_state if result is None else result.output
+            piece_result = self._runner.run(piece_start, controller, piece_steps, verbose=verbose)
+
+            if result is None:
+                result = piece_result
+            else:
+                for diff in piece_result._diffs:
+                    result.add_step(diff)
+
+            steps_run += piece_steps
+            equilibrated = detector.update(piece_result)
+
+        if result is None:
+            result = controller.instantiate_result(starting_state.copy())
+
+        if steps_run < num_steps:
+            print(f'Reached equilibrium, skipping the remaining {num_steps - steps_run} steps')
+            add_idle_steps(result, num_steps - steps_run)
+
+        return result, equilibrated
+
+class EnsembleScheduleRunner(HeatingScheduleRunner):
+    """Runs several realizations of a heating schedule side by side with an
+    EnsembleRunner. Each realization matches the result of running the schedule
+    alone with the ColoredBatchRunner and its RandomStream. Middlewares and
+    equilibrium detection are not supported.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._runner = EnsembleRunner()
+
+    def run_ensemble(self,
+                     simulations: List[Simulation],
+                     reaction_lib: ReactionLibrary,
+                     heating_schedule: HeatingSchedule,
+                     controller: LiquidSwapController,
+                     rngs: List[RandomStream],
+                     verbose=True,
+                     max_steps: int = None) -> List[ReactionResult]:
+        """Runs the heating schedule for every realization
+
+        Args:
+            simulations (List[Simulation]): The starting simulation of each realization
+            reaction_lib (ReactionLibrary): The reactions available at each temperature
+            heating_schedule (HeatingSchedule): The heating schedule to run
+            controller (LiquidSwapController): The controller shared by the realizations
+            rngs (List[RandomStream]): The source of randomness for each realization
+            verbose (bool, optional): Defaults to True.
+            max_steps (int, optional): The most simulation steps to run. Defaults to None.
+
+        Returns:
+            List[ReactionResult]: The result of each realization
+        """
+        starting_states = [simulation.state for simulation in simulations]
+
+        step_size = len(simulations[0].structure.site_ids)
+        sim_size = int(step_size ** (1 / 3))
+        total_steps = len(heating_schedule)
+
+        results: List[List[ReactionResult]] = [[] for _ in simulations]
+        reground_states = None
+        steps_run = 0
+        step_no = 0
+
+        for segment in self._segment_steps(heating_schedule):
+            if max_steps is not None and steps_run >= max_steps:
+                break
+
+            step = segment[0]
+            if isinstance(step, HeatingStep):
+                print(f'Running steps {step_no + 1} to {step_no + len(segment)} of {total_steps} for {len(rngs)} realizations.')
+
+                controller.set_temperature(step.temperature)
+                controller.set_rxn_set(reaction_lib.get_rxns_at_temp(step.temperature))
+
+                step_lengths = self._segment_lengths(segment, step_size, steps_run, max_steps)
+                num_simulation_steps = sum(step_lengths)
+
+                if reground_states is not None:
+                    starting_states = [reground.state for reground in reground_states]
+                    reground_states = None
+                if len(results[0]) > 0:
+                    starting_states = [realization_results[-1].output for realization_results in results]
+
+                for starting_state in starting_states:
+                    starting_state.set_general_state({TEMPERATURE: step.temperature })
+
+                segment_results = self._runner.run(
+                    starting_states,
                     controller,
+                    rngs,
                     num_simulation_steps,
                     verbose=verbose
                 )
 
-                results.append(result)
+                for realization_results, result in zip(results, segment_results):
+                    add_step_boundaries(result, step_lengths)
+                    realization_results.append(result)
+                steps_run += num_simulation_steps
             elif isinstance(step, RegrindStep):
-                analyzer = ReactionStepAnalyzer(reaction_lib.phases)
-                analyzer.set_step_group(results[-1].output)
-                amts = analyzer.get_all_mole_fractions()
-                new_amts = { p: amt for p, amt in amts.items() if amt > 0.01}
-
-                reground_state = setup_noise_reaction(
-                    reaction_lib.phases,
-                    precursor_mole_ratios = new_amts,
-                    size = sim_size,
-                )
+                reground_states = [
+                    self._regrind(realization_results[-1], reaction_lib, sim_size, rng)
+                    for realization_results, rng in zip(results, rngs)
+                ]
+
+            step_no += len(segment)
+
+        return [concatenate_results(realization_results) for realization_results in results]
 
-        result = concatenate_results(results)
-        return result
-    
 class MeltAndRegrindMultiRunner(HeatingScheduleRunner):
 
-    def __init__(self) -> None:
-        super().__init__([melt_and_regrind])
+    def __init__(self, runner: Runner = None) -> None:
+        super().__init__([melt_and_regrind], runner=runner)
+
+def add_step_boundaries(result: ReactionResult, step_lengths: List[int]) -> None:
+    """Inserts an empty step after each heating step in a result that covers a
+    segment of several heating steps. concatenate_results adds a step at the start
+    of every result after the first, so this keeps the steps of a segment at the
+    same indices they would have had if each heating step had been run separately.
+
+    Args:
+        result (ReactionResult): The result of running the segment
+        step_lengths (List[int]): The number of steps in each heating step of the segment
+    """
+    if len(step_lengths) < 2:
+        return
+
+    diffs = []
+    start = 0
+    for length in step_lengths[:-1]:
+        diffs.extend(result._diffs[start:start + length])
+        diffs.append(IDLE_STEP)
+        start += length
+    diffs.extend(result._diffs[start:])
+
+    result._total_steps += len(diffs) - len(result._diffs)
+    result._diffs = diffs
 
 def concatenate_results(results: List[ReactionResult]):
     starting_state = results[0].initial_state
@@ -1,36 +1,99 @@
 from ..core.recipe import ReactionRecipe
 
-from ..reactions import ReactionLibrary
+from ..reactions import ReactionLibrary, FlatReactionLibrary
 from ..phases import SolidPhaseSet
-from ..computing.schemas.ca_result_schema import RxnCAResultDoc
+from ..computing.schemas.ca_result_schema import RxnCAResultDoc, RxnCAResultManifest, ResultShard, write_shard
+from ..core.reaction_result import ReactionResult
 
 from rxn_network.reactions.reaction_set import ReactionSet
 from pylattica.core import Simulation
 
 import multiprocessing as mp
+import numpy as np
+import os
+from typing import List, Union
 
-from .single_sim import run_single_sim
+from .single_sim import run_single_sim, prepare_library
+from ..core.rng import RandomStream
 from .get_scored_rxns import get_scored_rxns
 
 _reaction_lib = "reaction_lib"
 _recipe = "recipe"
 _initial_simulation = "initial_simulation"
+_seeds = "seeds"
+_shard_dir = "shard_dir"
 
-def _get_result(_):
+def _init_worker(reaction_lib, recipe, initial_simulation, seeds, shard_dir=None):
+    global mp_globals
+
+    mp_globals = {
+        _reaction_lib: reaction_lib,
+        _recipe: recipe,
+        _initial_simulation: initial_simulation,
+        _seeds: seeds,
+        _shard_dir: shard_dir
+    }
+
+def _get_result(realization_idx):
 
     result: RxnCAResultDoc = run_single_sim(
         mp_globals[_recipe],
         reaction_lib=mp_globals.get(_reaction_lib),
-        initial_simulation=mp_globals.get(_initial_simulation)
+        initial_simulation=mp_globals.get(_initial_simulation),
+        rng=RandomStream(mp_globals[_seeds][realization_idx])
     )
-    return result.results[0]
+    return shard_or_result(result.results[0], shard_label(mp_globals[_recipe]), realization_idx, mp_globals[_shard_dir])
+
+
+def shard_label(recipe: ReactionRecipe) -> str:
+    return "realization" if recipe.name is None else recipe.name
+
+
+def shard_or_result(result: ReactionResult,
+                    label: str,
+                    realization_idx: int,
+                    shard_dir: str = None) -> Union[ReactionResult, ResultShard]:
+    """Writes a realization to its shard file if a shard directory is given, so that
+    only a handle to it is returned to the parent process.
+
+    Args:
+        result (ReactionResult): The realization
+        label (str): The name the shards of its recipe begin with
+        realization_idx (int): Its index among the realizations of the recipe
+        shard_dir (str, optional): The directory to write shards to. Defaults to None.
+
+    Returns:
+        Union[ReactionResult, ResultShard]: The handle to the shard, or the result
+        itself if no shard directory was given
+    """
+    if shard_dir is None or result is None:
+        return result
+
+    return write_shard(result, os.path.join(shard_dir, f"{label}_{realization_idx}.json"))
 
 
 def run_sim_parallel(recipe: ReactionRecipe,
                      base_reactions: ReactionSet = None,
                      reaction_lib: ReactionLibrary = None,
                      initial_simulation: Simulation = None,
-                     phase_set: SolidPhaseSet = None):
+                     phase_set: SolidPhaseSet = None,
+                     shard_dir: str = None) -> Union[RxnCAResultDoc, RxnCAResultManifest]:
+    """Runs every realization of a recipe, one per worker process.
+
+    Args:
+        recipe (ReactionRecipe): The recipe to run
+        base_reactions (ReactionSet, optional): Reactions to score, if no library is given
+        reaction_lib (ReactionLibrary, optional): The scored reactions to use
+        initial_simulation (Simulation, optional): The starting point shared by every
+        realization. If None, each realization sets up its own from its seed.
+        phase_set (SolidPhaseSet, optional): The phases used when scoring base_reactions
+        shard_dir (str, optional): If given, each worker writes its realization to a file
+        in this directory and returns only a handle to it, and a manifest of the shards
+        is returned instead of a result document. Defaults to None.
+
+    Returns:
+        Union[RxnCAResultDoc, RxnCAResultManifest]:
+    """
 
     print("================= RETRIEVING AND SCORING REACTIONS =================")
 
@@ -54,26 +117,69 @@ def run_sim_parallel(recipe: ReactionRecipe,
     print(f'================= RUNNING SIMULATION w/ {recipe.num_realizations} REALIZATIONS =================')
 
 
-    global mp_globals
-
-    mp_globals = {
-        _reaction_lib: reaction_lib,
-        _recipe: recipe,
-        _initial_simulation: initial_simulation
-    }
-
-    with mp.get_context("fork").Pool(recipe.num_realizations) as pool:
-        results = pool.map(_get_result, [_ for _ in range(recipe.num_realizations)])
-
-    good_results = [res for res in results if res is not None]
+    # Each realization draws from its own independent stream
+    seeds = np.random.SeedSequence(recipe.seed).spawn(recipe.num_realizations)
+    prepared_lib = prepare_library(recipe, reaction_lib)
+
+    if shard_dir is not None:
+        os.makedirs(shard_dir, exist_ok=True)
+
+    # The library is shared with the workers as flat arrays in shared memory,
+    # so it is held once however many workers there are. Workers receive only
+    # the name of the block, and attach to it read-only. Only the temperatures
+    # visited by the heating schedule are flattened.
+    shared_lib = FlatReactionLibrary.from_library(prepared_lib, temps=recipe.heating_schedule.all_temps).to_shared_memory()
+    try:
+        with mp.get_context("fork").Pool(
+            recipe.num_realizations,
+            initializer=_init_worker,
+            initargs=(shared_lib, recipe, initial_simulation, seeds, shard_dir)
+        ) as pool:
+            results = pool.map(_get_result, [_ for _ in range(recipe.num_realizations)])
+    finally:
+        shared_lib.unlink()
+
+    return build_result_doc(recipe, reaction_lib, prepared_lib, results, seeds, initial_simulation, sharded=shard_dir is not None)
+
+
+def build_result_doc(recipe: ReactionRecipe,
+                     reaction_lib: ReactionLibrary,
+                     prepared_lib: ReactionLibrary,
+                     results: List[Union[ReactionResult, ResultShard]],
+                     seeds: List[np.random.SeedSequence],
+                     initial_simulation: Simulation = None,
+                     sharded: bool = False) -> Union[RxnCAResultDoc, RxnCAResultManifest]:
+    """Collects the realizations of a recipe into a result document, dropping any
+    that failed.
+
+    Args:
+        recipe (ReactionRecipe): The recipe that was run
+        reaction_lib (ReactionLibrary): The library supplied to the run
+        prepared_lib (ReactionLibrary): The library after the recipe's phase exclusions
+        results (List[Union[ReactionResult, ResultShard]]): The result of each realization,
+        or the handle to its shard, or None if it failed
+        seeds (List[np.random.SeedSequence]): The seed of each realization
+        initial_simulation (Simulation, optional): The starting point shared by every realization
+        sharded (bool, optional): Whether the realizations were written to shards, in
+        which case a manifest of the shards is returned. Defaults to False.
+
+    Returns:
+        Union[RxnCAResultDoc, RxnCAResultManifest]:
+    """
+    good_results = [(res, seed) for res, seed in zip(results, seeds) if res is not None]
     print(f'{len(good_results)} results achieved out of {len(results)}')
 
-    result_doc = RxnCAResultDoc(
+    # If no initial simulation was supplied, each realization set up its own
+    # from its seed, so it can be regenerated when replaying
+    doc_kwargs = dict(
         recipe=recipe,
-        results=good_results,
         reaction_library=reaction_lib,
-        phases=reaction_lib.phases
+        phases=reaction_lib.phases,
+        library_fingerprint=prepared_lib.fingerprint(),
+        initial_simulation=initial_simulation,
+        seeds=[RandomStream(seed).seed_info for _, seed in good_results]
     )
 
-    return result_doc
-
+    if sharded:
+        return RxnCAResultManifest(shards=[res for res, _ in good_results], **doc_kwargs)
+    return RxnCAResultDoc(results=[res for res, _ in good_results], **doc_kwargs)
@@ -0,0 +1,55 @@
+from pylattica.core import Simulation
+
+from ..computing.schemas.ca_result_schema import RxnCAResultDoc
+from ..core.reaction_result import ReactionResult
+from ..core.rng import RandomStream
+from ..reactions import ReactionLibrary
+
+from .single_sim import run_single_sim, prepare_library
+
+
+def replay(result_doc: RxnCAResultDoc,
+           realization: int = 0,
+           num_steps: int = None,
+           reaction_lib: ReactionLibrary = None) -> ReactionResult:
+    """Regenerates the trajectory of one realization from the seeds recorded
+    in a result document.
+
+    Args:
+        result_doc (RxnCAResultDoc): The document describing the original run
+        realization (int, optional): The index of the realization to regenerate. Defaults to 0.
+        num_steps (int, optional): If provided, the trajectory is only regenerated up
+        to this many simulation steps. Defaults to None.
+        reaction_lib (ReactionLibrary, optional): The library the simulation was run with.
+        Required if the document does not contain a library.
+
+    Returns:
+        ReactionResult:
+    """
+    if not result_doc.is_replayable:
+        raise ValueError("This result document does not record the seeds needed to replay it")
+
+    if reaction_lib is None:
+        reaction_lib = result_doc.reaction_library
+
+    if reaction_lib is None:
+        raise ValueError("A reaction library must be supplied to replay this result document")
+
+    if result_doc.library_fingerprint is not None:
+        fingerprint = prepare_library(result_doc.recipe, reaction_lib).fingerprint()
+        if fingerprint != result_doc.library_fingerprint:
+            raise ValueError("The supplied reaction library is not the one this result was produced with")
+
+    initial_simulation = result_doc.initial_simulation
+    if initial_simulation is not None:
+        initial_simulation = Simulation.from_dict(initial_simulation.as_dict())
+
+    replayed = run_single_sim(
+        result_doc.recipe,
+        reaction_lib=reaction_lib,
+        initial_simulation=initial_simulation,
+        rng=RandomStream.from_seed_info(result_doc.seeds[realization]),
+        max_steps=num_steps,
+    )
+
+    return replayed.results[0]
@@ -1,6 +1,7 @@
 from ..phases.solid_phase_set import SolidPhaseSet
 from ..setup import ReactionPreparer
 from ..setup.noise_setup import SetupRandomNoise
+from ..core.rng import RandomStream
 
 from pylattica.core import Simulation
 from typing import Dict
@@ -10,13 +11,15 @@ def setup_reaction(
         precursor_mole_ratios: Dict,
         size: int = 15,
         vol_multiplier = 1.0,
+        rng: RandomStream = None,
     ) -> Simulation:
 
     preparer = ReactionPreparer(phases, dim=3)
     sim = preparer.prepare_reaction(
         phase_mol_ratios=precursor_mole_ratios,
         size=size,
-        volume_multiplier=vol_multiplier
+        volume_multiplier=vol_multiplier,
+        rng=rng,
     )
     
     return sim
@@ -25,6 +28,7 @@ def setup_noise_reaction(
         phases: SolidPhaseSet,
         precursor_mole_ratios: Dict,
         size: int = 15,
-        packing_fraction = 1.0
+        packing_fraction = 1.0,
+        rng: RandomStream = None,
     ):
-    return SetupRandomNoise(phases).setup(precursor_mole_ratios, size, packing_efficiency=packing_fraction)
\ No newline at end of file
+    return SetupRandomNoise(phases).setup(precursor_mole_ratios, size, packing_efficiency=packing_fraction, rng=rng)
\ No newline at end of file
@@ -11,16 +11,30 @@ from ..phases import SolidPhaseSet
 from ..core.reaction_controller import ReactionController
 from ..core.liquid_swap_controller import LiquidSwapController
 from ..core.reaction_calculator import ReactionCalculator
+from ..core.rng import RandomStream
+from ..analysis.equilibrium_detector import EquilibriumDetector
 
 from .get_scored_rxns import get_scored_rxns
 from .setup_reaction import setup_reaction, setup_noise_reaction
 
 
+def prepare_library(recipe: ReactionRecipe, reaction_lib: ReactionLibrary) -> ReactionLibrary:
+    if len(recipe.exclude_phases) > 0:
+        reaction_lib = reaction_lib.exclude_phases(recipe.exclude_phases)
+
+    if recipe.exact_phase_set is not None:
+        reaction_lib = reaction_lib.limit_phase_set(recipe.exact_phase_set)
+
+    return reaction_lib
+
+
 def run_single_sim(recipe: ReactionRecipe,
                    base_reactions: ReactionSet = None,
                    reaction_lib: ReactionLibrary = None,
                    initial_simulation: Simulation = None,
-                   phase_set: SolidPhaseSet = None) -> RxnCAResultDoc:
+                   phase_set: SolidPhaseSet = None,
+                   rng: RandomStream = None,
+                   max_steps: int = None) -> RxnCAResultDoc:
 
     if base_reactions is None and reaction_lib is None:
         raise ValueError("Must provide either base_reactions or reaction_lib")
@@ -42,11 +56,14 @@ def run_single_sim(recipe: ReactionRecipe,
     print()
     print()
 
-    if len(recipe.exclude_phases) > 0:
-        reaction_lib = reaction_lib.exclude_phases(recipe.exclude_phases)
+    reaction_lib = prepare_library(recipe, reaction_lib)
 
-    if recipe.exact_phase_set is not None:
-        reaction_lib = reaction_lib.limit_phase_set(recipe.exact_phase_set)
+    if rng is None:
+        rng = RandomStream(recipe.seed)
+
+    # Setting up and running the simulation draw from separate streams, so that a
+    # run can be replayed from its seed and stored initial state alone
+    setup_rng, sim_rng = rng.spawn(2)
 
     if initial_simulation is None:
 
@@ -56,14 +73,19 @@ def run_single_sim(recipe: ReactionRecipe,
             reaction_lib.phases,
             precursor_mole_ratios = recipe.reactant_amounts,
             size = recipe.simulation_size,
-            packing_fraction = recipe.packing_fraction
+            packing_fraction = recipe.packing_fraction,
+            rng = setup_rng,
         )
 
+    stored_simulation = Simulation.from_dict(initial_simulation.as_dict())
+
     print(f'================= RUNNING SIMULATION =================')
 
     rxn_calculator = ReactionCalculator(
-        LiquidSwapController.get_neighborhood_from_structure(initial_simulation.structure),
-        atmospheric_species=recipe.atmospheric_phases
+        LiquidSwapController.get_stencil_from_structure(initial_simulation.structure),
+        atmospheric_species=recipe.atmospheric_phases,
+        every_neighbor_reacts=recipe.every_neighbor_reacts,
+        rng=sim_rng,
     )
 
     controller = LiquidSwapController(
@@ -71,20 +93,32 @@ def run_single_sim(recipe: ReactionRecipe,
         rxn_calculator=rxn_calculator,
     )
 
-    runner = HeatingScheduleRunner()
+    equilibrium_detector = None
+    if recipe.equilibrium_window is not None:
+        equilibrium_detector = EquilibriumDetector(
+            reaction_lib.phases,
+            window=recipe.equilibrium_window,
+            volume_tolerance=recipe.equilibrium_tolerance,
+        )
+
+    runner = HeatingScheduleRunner(runner=recipe.get_runner(), equilibrium_detector=equilibrium_detector)
 
     result = runner.run_multi(
         initial_simulation,
         reaction_lib,
         recipe.heating_schedule,
-        controller=controller
+        controller=controller,
+        max_steps=max_steps
     )
 
     result_doc = RxnCAResultDoc(
         recipe=recipe,
         results=[result],
         reaction_library=reaction_lib,
-        phases=reaction_lib.phases
+        phases=reaction_lib.phases,
+        library_fingerprint=reaction_lib.fingerprint(),
+        initial_simulation=stored_simulation,
+        seeds=[rng.seed_info]
     )
 
     return result_doc
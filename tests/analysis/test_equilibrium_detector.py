@@ -0,0 +1,81 @@
+import pytest
+
+from pylattica.core import SimulationResult, SimulationState
+from pylattica.core.constants import GENERAL, SITES
+from pylattica.discrete.state_constants import DISCRETE_OCCUPANCY
+
+from rxn_ca.analysis import EquilibriumDetector
+from rxn_ca.core.constants import REACTION_CHOSEN, VOLUME
+from rxn_ca.core.recipe import ReactionRecipe
+from rxn_ca.core.heating import HeatingSchedule, HeatingStep
+from rxn_ca.phases import SolidPhaseSet
+from rxn_ca.reactions import ScoredReaction, ScoredReactionSet, ReactionLibrary
+from rxn_ca.utilities.single_sim import run_single_sim
+
+PHASES = ["BaO", "TiO2", "BaTiO3", "Ba2TiO4"]
+
+@pytest.fixture
+def phases():
+    return SolidPhaseSet(
+        PHASES,
+        volumes={ p: 1.0 for p in PHASES },
+        densities={ p: 1.0 for p in PHASES },
+        melting_points={ p: 3000 for p in PHASES },
+        experimentally_observed={ p: True for p in PHASES },
+    )
+
+def get_state(phases):
+    state = SimulationState()
+    for site_id, phase in enumerate(phases):
+        state.set_site_state(site_id, { DISCRETE_OCCUPANCY: phase, VOLUME: 1.0 })
+    return state
+
+def get_result(state, reactions):
+    result = SimulationResult(state)
+    for rxn_id in reactions:
+        updates = {} if rxn_id is None else { 0: { DISCRETE_OCCUPANCY: "BaTiO3" } }
+        result.add_step({ SITES: updates, GENERAL: { REACTION_CHOSEN: rxn_id } })
+    return result
+
+def test_detector_judges_whole_windows(phases):
+    state = get_state(["BaO", "TiO2", "BaO", "TiO2"])
+    detector = EquilibriumDetector(phases, window=1, volume_tolerance=0.3)
+
+    assert detector.steps_until_check(state.size) == 4
+    assert detector.update(get_result(state, [None] * 4))
+
+    first = get_result(state, [None, 0])
+    assert not detector.update(first)
+    assert detector.steps_until_check(state.size) == 2
+
+    # A reaction was chosen, but no volume fraction moved by more than the tolerance
+    assert detector.update(get_result(first.output, [None, None]))
+
+    strict = EquilibriumDetector(phases, window=1)
+    assert not strict.update(get_result(state, [None, 0, None, None]))
+    assert strict.update(get_result(state, [None] * 4))
+
+def test_runner_skips_to_end_of_step(phases, capsys):
+    lib = ReactionLibrary(phases)
+    # Neither of these reactions can occur between the precursors
+    lib.add_rxns_at_temp(ScoredReactionSet([
+        ScoredReaction({"BaTiO3": 1, "BaO": 1}, {"Ba2TiO4": 1}, 0.5),
+    ], phases), 1000)
+
+    recipe = ReactionRecipe(
+        heating_schedule=HeatingSchedule.build(HeatingStep.hold(1000, 6)),
+        reactant_amounts={ "TiO2": 1 },
+        simulation_size=4,
+        equilibrium_window=2,
+        seed=1,
+    )
+
+    result = run_single_sim(recipe, reaction_lib=lib).results[0]
+    # Only the first window of two sweeps is simulated, and the
+    # hold is run as a single segment
+    assert capsys.readouterr().out.count("Reached equilibrium") == 1
+
+    recipe.equilibrium_window = None
+    full_result = run_single_sim(recipe, reaction_lib=lib).results[0]
+    assert len(result) == len(full_result)
+    assert result.last_step == full_result.last_step
@@ -16,4 +16,10 @@ def ymno3_phases(get_test_file_path):
     fpath = get_test_file_path("core/ymno3_phases.json")
     with open(fpath, 'r+') as f:
         d = json.load(f)
-        return SolidPhaseSet.from_dict(d)
\ No newline at end of file
+        return SolidPhaseSet.from_dict(d)
+
+@pytest.fixture(autouse=True)
+def neighborhood_cache_dir(tmp_path, monkeypatch):
+    cache_dir = tmp_path / "neighborhoods"
+    monkeypatch.setenv("RXN_CA_CACHE_DIR", str(cache_dir))
+    return cache_dir
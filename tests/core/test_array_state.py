@@ -0,0 +1,79 @@
+import pytest
+
+import numpy as np
+
+from rxn_ca.phases import SolidPhaseSet
+from rxn_ca.core import ArraySimulationState
+from rxn_ca.core.constants import VOLUME, GASES_EVOLVED, TEMPERATURE
+from rxn_ca.analysis import ReactionStepAnalyzer
+from rxn_ca.utilities.setup_reaction import setup_noise_reaction
+
+from pylattica.core.constants import GENERAL, SITES
+from pylattica.discrete.state_constants import DISCRETE_OCCUPANCY
+
+@pytest.fixture
+def phases():
+    return SolidPhaseSet(
+        ["NaCl", "Li2O"],
+        volumes={ "NaCl": 1.0, "Li2O": 1.0 },
+        densities={ "NaCl": 1.0, "Li2O": 1.0 },
+        melting_points={ "NaCl": 800, "Li2O": 1000 },
+        experimentally_observed={ "NaCl": True, "Li2O": True },
+    )
+
+@pytest.fixture
+def simulation(phases):
+    return setup_noise_reaction(phases, { "NaCl": 1.0, "Li2O": 1.0 }, size=5, packing_fraction=0.9)
+
+def test_round_trip(simulation):
+    state = simulation.state
+    array_state = ArraySimulationState.from_simulation_state(state)
+
+    assert array_state.size == state.size
+    assert array_state.occupancy.dtype == np.int16
+    assert array_state.volume.dtype == np.float32
+    assert array_state.phases[0] == SolidPhaseSet.FREE_SPACE
+    assert array_state.to_simulation_state() == state
+
+def test_updates_mirror_simulation_state(simulation):
+    state = simulation.state
+    array_state = ArraySimulationState.from_simulation_state(state)
+
+    updates = {
+        GENERAL: {
+            GASES_EVOLVED: { "O2": 1.5 },
+            TEMPERATURE: 900,
+        },
+        SITES: {
+            3: { DISCRETE_OCCUPANCY: "LiCl", VOLUME: 0.5 },
+            7: { VOLUME: 2.0 },
+        }
+    }
+
+    state.batch_update(updates)
+    array_state.batch_update(updates)
+
+    assert array_state.get_site_state(3)[DISCRETE_OCCUPANCY] == "LiCl"
+    assert array_state.get_general_state(GASES_EVOLVED) == { "O2": 1.5 }
+    assert array_state.to_simulation_state() == state
+
+def test_general_state_is_copied(simulation):
+    array_state = ArraySimulationState.from_simulation_state(simulation.state)
+    gases = array_state.get_general_state().get(GASES_EVOLVED)
+    gases["CO2"] = 1.0
+
+    assert "CO2" not in array_state.get_general_state(GASES_EVOLVED)
+
+def test_phase_volumes_match_analyzer(phases, simulation):
+    array_state = ArraySimulationState.from_simulation_state(simulation.state)
+    analyzer = ReactionStepAnalyzer(phases)
+
+    expected = analyzer.set_step_group(simulation.state).get_all_absolute_phase_volumes()
+    actual = array_state.phase_volumes()
+
+    assert set(expected.keys()) == set(actual.keys())
+    for phase, vol in expected.items():
+        assert np.isclose(actual[phase], vol)
+
+    from_arrays = analyzer.set_step_group(array_state).get_all_absolute_phase_volumes()
+    assert from_arrays == pytest.approx(expected)
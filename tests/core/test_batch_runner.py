@@ -0,0 +1,147 @@
+import pytest
+
+import numpy as np
+
+from rxn_ca.phases import SolidPhaseSet
+from rxn_ca.reactions import ScoredReaction, ScoredReactionSet
+from rxn_ca.core import ArraySimulationState
+from rxn_ca.core.batch_runner import ColoredBatchRunner
+from rxn_ca.core.interaction_kernel import BatchInteractionKernel
+from rxn_ca.core.reaction_calculator import ReactionCalculator
+from rxn_ca.core.rng import RandomStream
+from rxn_ca.core.liquid_swap_controller import LiquidSwapController
+from rxn_ca.core.reaction_controller import ReactionController
+from rxn_ca.core.site_coloring import MIN_MEAN_COLOR_SIZE
+from rxn_ca.utilities.setup_reaction import setup_noise_reaction
+
+from pylattica.discrete.state_constants import DISCRETE_OCCUPANCY
+
+PHASES = ["BaO", "TiO2", "BaTiO3", "O2"]
+
+@pytest.fixture
+def phases():
+    return SolidPhaseSet(
+        PHASES,
+        volumes={ p: 1.0 for p in PHASES },
+        gas_phases=["O2"],
+        densities={ p: 1.0 for p in PHASES },
+        melting_points={ p: 3000 for p in PHASES },
+        experimentally_observed={ p: True for p in PHASES },
+    )
+
+@pytest.fixture
+def controller(phases):
+    simulation = setup_noise_reaction(phases, { "BaO": 1.0, "TiO2": 1.0 }, size=6, packing_fraction=0.8)
+    calculator = ReactionCalculator(
+        LiquidSwapController.get_neighborhood_from_structure(simulation.structure),
+        atmospheric_species=["O2"],
+    )
+    controller = LiquidSwapController(simulation.structure, rxn_calculator=calculator)
+    controller.set_rng(RandomStream(1))
+    controller.set_temperature(1000)
+    controller.set_rxn_set(ScoredReactionSet([
+        ScoredReaction({"BaO": 1, "TiO2": 1}, {"BaTiO3": 2}, 0.1),
+        ScoredReaction({"BaO": 1, "O2": 1}, {"BaTiO3": 1}, 0.05),
+        ScoredReaction({"TiO2": 1}, {"BaTiO3": 1}, 0.01),
+    ], phases))
+    return simulation, controller
+
+def test_colors_do_not_share_neighbors(controller):
+    simulation, controller = controller
+    nb_graph = controller.reaction_calculator.neighborhood_graph
+    site_ids = simulation.state.site_ids()
+
+    colors = controller.get_site_colors(site_ids)
+    assert sorted(np.concatenate(colors).tolist()) == sorted(site_ids)
+
+    for color in colors:
+        touched = set()
+        for site_id in color.tolist():
+            closed_nb = set(nb_graph.neighbors_of(site_id)) | { site_id }
+            assert len(touched & closed_nb) == 0
+            touched.update(closed_nb)
+
+def test_score_matrix_matches_interactions(controller):
+    simulation, controller = controller
+    calculator = controller.reaction_calculator
+    state = ArraySimulationState.from_simulation_state(simulation.state)
+    compiled = calculator.compiled_rxns
+
+    kernel = BatchInteractionKernel(calculator.get_neighbor_arrays(state.size))
+    phase_ids = np.array([compiled.phase_id(p) for p in state.phases])[state.occupancy]
+    site_ids = np.array(state.site_ids())
+    nb_slots = kernel.draw_neighbors(site_ids, RandomStream(2))
+    assert (nb_slots < kernel.degrees[site_ids]).all()
+    assert len(set(nb_slots.tolist())) > 1
+
+    scores = kernel.score_matrix(site_ids, phase_ids, compiled, calculator.inertia, nb_slots)
+
+    for site_id, nb_idx in zip(site_ids.tolist(), nb_slots.tolist()):
+        interactions = calculator.interactions_with_neighbor(site_id, simulation.state, nb_idx)
+        active = sorted([i.score for i in interactions if not i.is_no_op])
+        assert scores[site_id, 0] == 2 * calculator.inertia
+        assert sorted(s for s in scores[site_id, 1:] if s > 0) == pytest.approx(active)
+
+def test_score_matrix_matches_interactions_with_every_neighbor(controller):
+    simulation, controller = controller
+    calculator = controller.reaction_calculator
+    calculator.every_neighbor_reacts = True
+    state = ArraySimulationState.from_simulation_state(simulation.state)
+    compiled = calculator.compiled_rxns
+
+    kernel = BatchInteractionKernel(calculator.get_neighbor_arrays(state.size), every_neighbor=True)
+    phase_ids = np.array([compiled.phase_id(p) for p in state.phases])[state.occupancy]
+    site_ids = np.array(state.site_ids())
+    nb_slots = kernel.draw_neighbors(site_ids, RandomStream(2))
+    assert nb_slots is None
+
+    scores = kernel.score_matrix(site_ids, phase_ids, compiled, calculator.inertia, nb_slots)
+    columns = np.arange(scores.shape[1])
+
+    for site_id in site_ids.tolist():
+        interactions = calculator.possible_interactions_at_site(site_id, simulation.state)
+        active = sorted([i.score for i in interactions if not i.is_no_op])
+        assert sorted(s for s in scores[site_id, 1:] if s > 0) == pytest.approx(active)
+
+        # Every column with a score decodes to the neighbor it was scored against
+        choices = kernel.decode(np.full(len(columns), site_id), columns, compiled, None)
+        assert choices[0][0] == kernel.NO_OP
+        assert choices[-1][0] == kernel.DECOMPOSITION
+        for column, (kind, nb_id, _) in enumerate(choices[1:-1], start=1):
+            assert kind != kernel.NO_OP and kind != kernel.DECOMPOSITION
+            if scores[site_id, column] > 0:
+                assert nb_id in kernel.nb_ids[site_id].tolist()
+
+def test_runner_records_one_step_per_visit(controller):
+    simulation, controller = controller
+    num_steps = 500
+
+    result = ColoredBatchRunner().run(simulation.state, controller, num_steps)
+
+    assert len(result) == num_steps + 1
+
+    occupancies = [s[DISCRETE_OCCUPANCY] for s in result.last_step.all_site_states()]
+    assert "BaTiO3" in occupancies
+
+def test_colors_are_large_enough_to_batch(controller):
+    simulation, controller = controller
+    site_ids = simulation.state.site_ids()
+
+    colors = controller.get_site_colors(site_ids)
+    assert len(site_ids) / len(colors) >= MIN_MEAN_COLOR_SIZE
+
+def test_runner_falls_back_for_large_neighborhoods(controller):
+    simulation, controller = controller
+    num_steps = 50
+
+    # Sites in the radius 5 neighborhood would be colored into batches of about one site
+    calculator = controller.reaction_calculator
+    large = ReactionCalculator(ReactionController.get_neighborhood_from_structure(simulation.structure))
+    large.set_rxn_set(calculator.rxn_set)
+    controller.reaction_calculator = large
+    assert large.get_site_colors(simulation.state.site_ids()) == []
+
+    with pytest.warns(UserWarning, match="AsynchronousRunner"):
+        result = ColoredBatchRunner().run(simulation.state, controller, num_steps)
+
+    assert len(result) == num_steps + 1
@@ -0,0 +1,139 @@
+import pytest
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from pylattica.core import SimulationResult, SimulationState
+from pylattica.core.constants import GENERAL, SITES
+from pylattica.discrete.state_constants import DISCRETE_OCCUPANCY
+
+from rxn_ca.phases import SolidPhaseSet
+from rxn_ca.reactions import ScoredReaction, ScoredReactionSet
+from rxn_ca.core.constants import GASES_EVOLVED, REACTION_CHOSEN, VOLUME
+from rxn_ca.core import domain_runner
+from rxn_ca.core.domain_runner import DomainDecompositionRunner, grid_slabs
+from rxn_ca.core.idle_steps import IDLE_STEP
+from rxn_ca.core.reaction_calculator import ReactionCalculator
+from rxn_ca.core.rng import RandomStream
+from rxn_ca.core.liquid_swap_controller import LiquidSwapController
+from rxn_ca.utilities.setup_reaction import setup_noise_reaction
+
+PHASES = ["BaO", "TiO2", "BaTiO3", "BaO2", "O2"]
+
+@pytest.fixture
+def phases():
+    return SolidPhaseSet(
+        PHASES,
+        volumes={ p: 1.0 for p in PHASES },
+        gas_phases=["O2"],
+        densities={ p: 1.0 for p in PHASES },
+        melting_points={ p: 1200 for p in PHASES },
+        experimentally_observed={ p: True for p in PHASES },
+    )
+
+@pytest.fixture
+def controller(phases):
+    simulation = setup_noise_reaction(phases, { "BaO2": 1.0, "TiO2": 1.0 }, size=8, rng=RandomStream(2))
+    calculator = ReactionCalculator(
+        LiquidSwapController.get_stencil_from_structure(simulation.structure),
+        rng=RandomStream(3),
+    )
+    controller = LiquidSwapController(simulation.structure, rxn_calculator=calculator)
+    controller.set_temperature(1100)
+    controller.set_rxn_set(ScoredReactionSet([
+        ScoredReaction({"BaO2": 1, "TiO2": 1}, {"BaTiO3": 1, "O2": 0.5}, 0.5),
+    ], phases))
+    return simulation, controller
+
+def test_slabs_do_not_interact(controller):
+    simulation, controller = controller
+    neighbors = controller.reaction_calculator.get_neighbor_arrays(simulation.state.size)
+
+    slabs = grid_slabs(simulation.structure, neighbors, 8)
+    assert len(slabs) == 4
+    assert slabs[0][0] == 0 and slabs[-1][1] == simulation.state.size
+
+    for parity in [0, 1]:
+        touched = set()
+        for start, stop in slabs[parity::2]:
+            closed_nbs = set(range(start, stop))
+            for site_id in range(start, stop):
+                closed_nbs.update(neighbors.neighbor_ids(site_id))
+            assert len(touched & closed_nbs) == 0
+            touched.update(closed_nbs)
+
+    assert grid_slabs(simulation.structure, neighbors, 2) == []
+
+def test_runner_records_a_sequential_history(controller):
+    simulation, controller = controller
+    num_steps = 1500
+
+    result = DomainDecompositionRunner(num_workers=2).run(simulation.state, controller, num_steps)
+
+    assert len(result) == num_steps + 1
+
+    occupancies = [s[DISCRETE_OCCUPANCY] for s in result.last_step.all_site_states()]
+    assert occupancies.count("BaTiO3") > 0
+
+    # The gas evolved by every worker during a sub-sweep is summed,
+    # so the total never decreases
+    evolved = [
+        d[GENERAL][GASES_EVOLVED]["O2"] for d in result._diffs
+        if GASES_EVOLVED in d.get(GENERAL, {})
+    ]
+    assert len(evolved) > 0
+    assert np.all(np.diff(evolved) > 0)
+    assert result.last_step.get_general_state(GASES_EVOLVED)["O2"] == evolved[-1]
+
+def test_record_sums_keys_added_by_workers():
+    runner = DomainDecompositionRunner(num_workers=2)
+    result = SimulationResult(SimulationState())
+
+    # Neither worker starts with any evolved gas recorded
+    replies = [
+        (7, { GASES_EVOLVED: { "O2": 1.0 } }),
+        (None, { GASES_EVOLVED: { "O2": 2.0 } }),
+    ]
+    site_updates = { 3: { DISCRETE_OCCUPANCY: "BaTiO3", VOLUME: 1.0 } }
+    merged = runner._record(result, {}, replies, site_updates, 5)
+
+    assert merged[GASES_EVOLVED] == { "O2": 3.0 }
+    assert merged[REACTION_CHOSEN] == 7
+
+    # The sub-sweep is recorded as idle steps followed by one step with every change
+    assert len(result) == 6
+    assert all(diff is IDLE_STEP for diff in result._diffs[:-1])
+    assert result._diffs[-1] == { SITES: site_updates, GENERAL: merged }
+    assert result.live_state.get_site_state(3)[DISCRETE_OCCUPANCY] == "BaTiO3"
+
+def test_runner_warns_when_the_grid_is_too_small(controller):
+    simulation, controller = controller
+
+    with pytest.warns(UserWarning, match="AsynchronousRunner"):
+        result = DomainDecompositionRunner(num_workers=1).run(simulation.state, controller, 100)
+
+    assert len(result) == 101
+
+def test_shared_memory_is_freed_when_a_worker_dies(controller, monkeypatch):
+    simulation, controller = controller
+
+    created = []
+    original = shared_memory.SharedMemory
+
+    def tracking_shared_memory(*args, **kwargs):
+        shm = original(*args, **kwargs)
+        created.append(shm.name)
+        return shm
+
+    def dying_worker(conn, *args):
+        conn.close()
+
+    monkeypatch.setattr(domain_runner.shared_memory, "SharedMemory", tracking_shared_memory)
+    monkeypatch.setattr(domain_runner, "_serve", dying_worker)
+
+    with pytest.raises((EOFError, OSError)):
+        DomainDecompositionRunner(num_workers=2).run(simulation.state, controller, 100)
+
+    assert len(created) == 1
+    with pytest.raises(FileNotFoundError):
+        original(name=created[0])
@@ -0,0 +1,72 @@
+import pytest
+
+from rxn_ca.phases import SolidPhaseSet
+from rxn_ca.reactions import ScoredReaction, ScoredReactionSet
+from rxn_ca.core import EnsembleRunner
+from rxn_ca.core.batch_runner import ColoredBatchRunner
+from rxn_ca.core.reaction_calculator import ReactionCalculator
+from rxn_ca.core.rng import RandomStream
+from rxn_ca.core.liquid_swap_controller import LiquidSwapController
+from rxn_ca.utilities.setup_reaction import setup_noise_reaction
+
+PHASES = ["BaO", "TiO2", "BaTiO3", "O2"]
+
+@pytest.fixture
+def phases():
+    return SolidPhaseSet(
+        PHASES,
+        volumes={ p: 1.0 for p in PHASES },
+        gas_phases=["O2"],
+        densities={ p: 1.0 for p in PHASES },
+        melting_points={ p: 1200 for p in PHASES },
+        experimentally_observed={ p: True for p in PHASES },
+    )
+
+def get_controller(phases, structure):
+    calculator = ReactionCalculator(
+        LiquidSwapController.get_stencil_from_structure(structure),
+        atmospheric_species=["O2"],
+    )
+    controller = LiquidSwapController(structure, rxn_calculator=calculator)
+    controller.set_temperature(1100)
+    controller.set_rxn_set(ScoredReactionSet([
+        ScoredReaction({"BaO": 1, "TiO2": 1}, {"BaTiO3": 2}, 0.1),
+        ScoredReaction({"BaO": 1, "O2": 1}, {"BaTiO3": 1}, 0.05),
+        ScoredReaction({"TiO2": 1}, {"BaTiO3": 1}, 0.01),
+    ], phases))
+    return controller
+
+def test_realizations_match_colored_batch_runs(phases):
+    simulations = [
+        setup_noise_reaction(phases, { "BaO": 1.0, "TiO2": 1.0 }, size=6, packing_fraction=0.8, rng=RandomStream(seed))
+        for seed in range(3)
+    ]
+    structure = simulations[0].structure
+    num_steps = 500
+
+    ensemble = EnsembleRunner().run(
+        [simulation.state for simulation in simulations],
+        get_controller(phases, structure),
+        [RandomStream(10 + idx) for idx in range(3)],
+        num_steps,
+    )
+
+    assert len(ensemble) == 3
+    for idx, (simulation, result) in enumerate(zip(simulations, ensemble)):
+        controller = get_controller(phases, structure)
+        controller.set_rng(RandomStream(10 + idx))
+        expected = ColoredBatchRunner().run(simulation.state, controller, num_steps)
+
+        assert len(result) == num_steps + 1
+        assert result._diffs == expected._diffs
+        assert result.last_step == expected.last_step
+
+def test_requires_a_stream_per_realization(phases):
+    simulation = setup_noise_reaction(phases, { "BaO": 1.0, "TiO2": 1.0 }, size=6)
+    with pytest.raises(ValueError):
+        EnsembleRunner().run(
+            [simulation.state, simulation.state],
+            get_controller(phases, simulation.structure),
+            [RandomStream(1)],
+            10,
+        )
@@ -0,0 +1,75 @@
+import pytest
+
+from rxn_ca.phases import SolidPhaseSet
+from rxn_ca.reactions import ScoredReaction, ScoredReactionSet
+from rxn_ca.core.frontier_runner import FrontierRunner, SiteSet
+from rxn_ca.core.idle_steps import IDLE_STEP
+from rxn_ca.core.reaction_calculator import ReactionCalculator
+from rxn_ca.core.rng import RandomStream
+from rxn_ca.core.liquid_swap_controller import LiquidSwapController
+from rxn_ca.utilities.setup_reaction import setup_noise_reaction
+
+from pylattica.core.constants import SITES
+from pylattica.discrete.state_constants import DISCRETE_OCCUPANCY
+
+PHASES = ["BaO", "TiO2", "BaTiO3"]
+
+@pytest.fixture
+def phases():
+    return SolidPhaseSet(
+        PHASES,
+        volumes={ p: 1.0 for p in PHASES },
+        densities={ p: 1.0 for p in PHASES },
+        melting_points={ p: 3000 for p in PHASES },
+        experimentally_observed={ p: True for p in PHASES },
+    )
+
+@pytest.fixture
+def controller(phases):
+    simulation = setup_noise_reaction(phases, { "BaO": 1.0, "TiO2": 1.0 }, size=4, packing_fraction=0.8)
+    calculator = ReactionCalculator(
+        LiquidSwapController.get_neighborhood_from_structure(simulation.structure)
+    )
+    controller = LiquidSwapController(simulation.structure, rxn_calculator=calculator)
+    controller.set_rng(RandomStream(1))
+    controller.set_temperature(1000)
+    controller.set_rxn_set(ScoredReactionSet([
+        ScoredReaction({"BaO": 1, "TiO2": 1}, {"BaTiO3": 2}, 0.1),
+    ], phases))
+    return simulation, controller
+
+def test_site_set():
+    sites = SiteSet([3, 5, 7])
+    sites.add(5)
+    sites.discard(3)
+    sites.discard(11)
+
+    assert len(sites) == 2
+    assert 3 not in sites and 7 in sites
+    assert { sites.choice(RandomStream(seed)) for seed in range(20) } == { 5, 7 }
+
+def test_active_sites_have_propensity(controller):
+    simulation, controller = controller
+    calculator = controller.reaction_calculator
+    state = simulation.state
+
+    for site_id in state.site_ids():
+        has_propensity = calculator.get_site_propensity(site_id, state) > 0
+        assert calculator.is_site_active(site_id, state) == has_propensity
+
+def test_runner_records_one_step_per_visit(controller):
+    simulation, controller = controller
+    num_steps = 500
+
+    result = FrontierRunner().run(simulation.state, controller, num_steps)
+
+    assert len(result) == num_steps + 1
+
+    changed = [step for step in result._diffs if len(step[SITES]) > 0]
+    assert 0 < len(changed) < num_steps
+
+    # Visits off the frontier are recorded as idle steps
+    assert any(step is IDLE_STEP for step in result._diffs)
+
+    occupancies = [s[DISCRETE_OCCUPANCY] for s in result.last_step.all_site_states()]
+    assert "BaTiO3" in occupancies
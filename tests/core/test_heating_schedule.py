@@ -0,0 +1,36 @@
+import numpy as np
+
+from rxn_ca.core.heating import HeatingSchedule, HeatingStep, RegrindStep
+
+def get_schedule():
+    return HeatingSchedule.build(
+        HeatingStep.hold(500, 3),
+        HeatingStep.sweep(500, 700, temp_step_size=100),
+        RegrindStep(),
+        HeatingStep.hold(700, 2, stage_length=2),
+    )
+
+def test_segments():
+    schedule = get_schedule()
+    assert schedule.segments == [(500, 4), (600, 1), (700, 5)]
+    assert schedule.total_duration == 10
+    assert sorted(schedule.all_temps) == [500, 600, 700]
+
+    # The hold at 700 K on either side of the regrind is one segment
+    temps = [schedule.temp_at(idx) for idx in range(11)]
+    assert temps == [500] * 4 + [600] + [700] * 5 + [None]
+    assert schedule.temp_at_percent_complete(0.45) == 600
+
+def test_vectorized_lookup():
+    schedule = get_schedule()
+    idxs = np.array([0, 3.5, 4, 9.9, 10, 12])
+    expected = [schedule.temp_at(idx) for idx in idxs]
+    temps = schedule.temps_at(idxs)
+    assert np.all(np.isnan(temps[4:]))
+    assert temps[:4].tolist() == expected[:4]
+
+def test_serialization():
+    schedule = get_schedule()
+    loaded = HeatingSchedule.from_dict(schedule.as_dict())
+    assert len(loaded) == len(schedule)
+    assert loaded.segments == schedule.segments
@@ -0,0 +1,47 @@
+from pylattica.core import SimulationResult, SimulationState
+from pylattica.core.constants import GENERAL, SITES
+
+from rxn_ca.core.idle_steps import IDLE_STEP, add_idle_steps
+
+def starting_state():
+    state = SimulationState()
+    state.set_site_state(0, { "value": 0 })
+    return state
+
+def step(value):
+    return { SITES: { 0: { "value": value } }, GENERAL: {} }
+
+def test_idle_steps_share_one_diff():
+    result = SimulationResult(starting_state())
+    result.add_step(step(1))
+    add_idle_steps(result, 5)
+    result.add_step(step(2))
+
+    assert len(result) == 8
+    assert all(diff is IDLE_STEP for diff in result._diffs[1:6])
+    assert [s.get_site_state(0)["value"] for s in result.steps()] == [0, 1, 1, 1, 1, 1, 1, 2]
+
+def test_idle_steps_store_frames():
+    result = SimulationResult(starting_state(), compress_freq=3)
+    result.add_step(step(1))
+    add_idle_steps(result, 7)
+
+    assert len(result) == 9
+    assert sorted(result._frames) == [0, 3, 6]
+    assert result._frames[6].get_site_state(0)["value"] == 1
+
+def test_idle_steps_respect_max_history():
+    result = SimulationResult(starting_state(), max_history=4)
+    result.add_step(step(1))
+    add_idle_steps(result, 10)
+
+    assert len(result) == 12
+    assert len(result._diffs) <= 4
+    assert result.get_step(11).get_site_state(0)["value"] == 1
+
+def test_idle_steps_without_history():
+    result = SimulationResult(starting_state(), retain_history=False)
+    add_idle_steps(result, 10)
+
+    assert len(result) == 11
+    assert result._diffs == []
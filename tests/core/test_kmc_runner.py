@@ -0,0 +1,120 @@
+import pytest
+
+import numpy as np
+
+from rxn_ca.phases import SolidPhaseSet
+from rxn_ca.reactions import ScoredReaction, ScoredReactionSet
+from rxn_ca.core.sum_tree import SumTree
+from rxn_ca.core.kmc_runner import RejectionFreeRunner
+from rxn_ca.core.reaction_calculator import ReactionCalculator
+from rxn_ca.core.rng import RandomStream
+from rxn_ca.core.liquid_swap_controller import LiquidSwapController
+from rxn_ca.utilities.setup_reaction import setup_noise_reaction
+
+from pylattica.core.constants import SITES
+from pylattica.discrete.state_constants import DISCRETE_OCCUPANCY
+
+PHASES = ["BaO", "TiO2", "BaTiO3"]
+
+@pytest.fixture
+def phases():
+    return SolidPhaseSet(
+        PHASES,
+        volumes={ p: 1.0 for p in PHASES },
+        densities={ p: 1.0 for p in PHASES },
+        melting_points={ p: 3000 for p in PHASES },
+        experimentally_observed={ p: True for p in PHASES },
+    )
+
+@pytest.fixture
+def controller(phases):
+    simulation = setup_noise_reaction(phases, { "BaO": 1.0, "TiO2": 1.0 }, size=4)
+    calculator = ReactionCalculator(
+        LiquidSwapController.get_neighborhood_from_structure(simulation.structure)
+    )
+    controller = LiquidSwapController(simulation.structure, rxn_calculator=calculator)
+    controller.set_rng(RandomStream(1))
+    controller.set_temperature(1000)
+    controller.set_rxn_set(ScoredReactionSet([
+        ScoredReaction({"BaO": 1, "TiO2": 1}, {"BaTiO3": 2}, 0.1),
+    ], phases))
+    return simulation, controller
+
+def test_sum_tree_find_and_update():
+    tree = SumTree.from_values([1.0, 0.0, 2.0, 3.0, 0.0])
+
+    assert tree.total == 6.0
+    assert tree.find(0.5) == 0
+    assert tree.find(1.0) == 2
+    assert tree.find(2.9) == 2
+    assert tree.find(5.9) == 3
+
+    tree.update(1, 4.0)
+    tree.update(3, 0.0)
+
+    assert tree.total == 7.0
+    assert tree.find(1.5) == 1
+    assert tree.find(6.5) == 2
+
+def test_sum_tree_samples_proportionally():
+    weights = [0.5, 0.0, 1.5, 2.0]
+    tree = SumTree.from_values(weights)
+    rng = np.random.default_rng(0)
+
+    counts = np.bincount([tree.find(rng.random() * tree.total) for _ in range(20000)], minlength=4)
+
+    assert counts[1] == 0
+    assert counts / counts.sum() == pytest.approx(np.array(weights) / sum(weights), abs=0.02)
+
+def test_propensity_matches_interactions(controller):
+    simulation, controller = controller
+    calculator = controller.reaction_calculator
+    state = simulation.state
+
+    # Each neighbor is considered by an equal share of the visits to a site
+    for site_id in state.site_ids():
+        active_probs = []
+        for nb_idx in range(calculator.get_neighbor_arrays(state.size).degree(site_id)):
+            interactions = calculator.interactions_with_neighbor(site_id, state, nb_idx)
+            total = sum(i.score for i in interactions)
+            active = sum(i.score for i in interactions if not i.is_no_op)
+            active_probs.append(active / total)
+        assert calculator.get_site_propensity(site_id, state) == pytest.approx(np.mean(active_probs))
+
+def test_propensity_matches_interactions_with_every_neighbor(controller):
+    simulation, controller = controller
+    calculator = controller.reaction_calculator
+    calculator.every_neighbor_reacts = True
+    state = simulation.state
+
+    for site_id in state.site_ids():
+        interactions = calculator.possible_interactions_at_site(site_id, state)
+        total = sum(i.score for i in interactions)
+        active = sum(i.score for i in interactions if not i.is_no_op)
+        assert calculator.get_site_propensity(site_id, state) == pytest.approx(active / total)
+
+def test_runner_records_one_step_per_visit(controller):
+    simulation, controller = controller
+    num_steps = 500
+
+    result = RejectionFreeRunner().run(simulation.state, controller, num_steps)
+
+    assert len(result) == num_steps + 1
+
+    changed = [step for step in result._diffs if len(step[SITES]) > 0]
+    assert 0 < len(changed) < num_steps
+
+    occupancies = [s[DISCRETE_OCCUPANCY] for s in result.last_step.all_site_states()]
+    assert "BaTiO3" in occupancies
+
+def test_runner_falls_back_when_few_visits_are_skipped(controller):
+    simulation, controller = controller
+    num_steps = 50
+
+    # At the melting point, most visits swap the site with a neighbor
+    controller.set_temperature(3000)
+
+    with pytest.warns(UserWarning, match="AsynchronousRunner"):
+        result = RejectionFreeRunner().run(simulation.state, controller, num_steps)
+
+    assert len(result) == num_steps + 1
@@ -0,0 +1,55 @@
+import numpy as np
+
+from pylattica.structures.square_grid import SimpleSquare2DStructureBuilder
+
+from rxn_ca.core import NeighborArrays, ReactionController
+from rxn_ca.core.reaction_calculator import ReactionCalculator
+
+def test_arrays_match_neighborhood():
+    structure = SimpleSquare2DStructureBuilder().build(8)
+    nb_graph = ReactionController.get_neighborhood_from_structure(structure)
+    arrays = ReactionController.get_neighbor_arrays_from_structure(structure)
+
+    assert arrays.num_sites == len(structure.site_ids)
+    assert arrays.indptr[-1] == len(arrays.indices)
+
+    for site_id in structure.site_ids:
+        expected = sorted(nb_graph.neighbors_of(site_id, include_weights=True))
+        assert arrays.neighbors_of(site_id, include_weights=True) == expected
+        assert arrays.neighbor_ids(site_id) == [nb_id for nb_id, _ in expected]
+
+        weights = [w for _, w in arrays.weighted_neighbors(site_id)]
+        assert np.allclose(weights, [1 / d ** 3 for _, d in expected])
+
+def test_padded_arrays():
+    arrays = NeighborArrays(
+        np.array([0, 2, 3, 3]),
+        np.array([1, 2, 0]),
+        np.array([1.0, 2.0, 1.0]),
+    )
+    nb_ids, weights, mask = arrays.padded()
+
+    assert nb_ids.tolist() == [[1, 2], [0, 0], [0, 0]]
+    assert weights.tolist() == [[1.0, 0.125], [1.0, 0.0], [0.0, 0.0]]
+    assert mask.tolist() == [[True, True], [True, False], [False, False]]
+
+def test_lists_are_built_on_first_lookup():
+    arrays = NeighborArrays(
+        np.array([0, 2, 3, 3]),
+        np.array([1, 2, 0]),
+        np.array([1.0, 2.0, 1.0]),
+    )
+    arrays.padded()
+    assert "_indices" not in vars(arrays)
+
+    assert arrays.neighbor_ids(0) == [1, 2]
+    assert "_indices" in vars(arrays)
+    assert isinstance(arrays.indices, np.ndarray)
+
+def test_calculator_flattens_graph_once():
+    structure = SimpleSquare2DStructureBuilder().build(4)
+    calculator = ReactionCalculator(ReactionController.get_neighborhood_from_structure(structure))
+
+    arrays = calculator.get_neighbor_arrays(len(structure.site_ids))
+    assert isinstance(arrays, NeighborArrays)
+    assert calculator.get_neighbor_arrays(len(structure.site_ids)) is arrays
@@ -0,0 +1,33 @@
+import numpy as np
+
+from pylattica.structures.square_grid import SimpleSquare3DStructureBuilder
+
+from rxn_ca.core import NeighborArrays
+from rxn_ca.core.liquid_swap_controller import LiquidSwapController
+from rxn_ca.core.neighborhood_cache import CACHE_FORMAT_VERSION, load_or_build, neighborhood_cache_key
+
+def test_neighborhoods_are_cached(neighborhood_cache_dir):
+    structure = SimpleSquare3DStructureBuilder().build(4)
+
+    built = LiquidSwapController.get_neighbor_arrays_from_structure(structure)
+    assert len(list(neighborhood_cache_dir.iterdir())) == 3
+
+    loaded = LiquidSwapController.get_neighbor_arrays_from_structure(structure)
+    assert isinstance(loaded.indices, np.memmap)
+    assert np.array_equal(loaded.indptr, built.indptr)
+    assert np.array_equal(loaded.indices, built.indices)
+    assert np.array_equal(loaded.weights, built.weights)
+
+    # Loading from the cache does not copy the arrays into lists
+    assert "_indices" not in vars(loaded)
+
+def test_cache_key_includes_format_version():
+    key = neighborhood_cache_key(3, 64, "LiquidSwapController", 1)
+    assert key.startswith(f"v{CACHE_FORMAT_VERSION}_")
+
+def test_cache_can_be_disabled(neighborhood_cache_dir, monkeypatch):
+    monkeypatch.setenv("RXN_CA_CACHE_DIR", "")
+    arrays = NeighborArrays(np.array([0, 1, 2]), np.array([1, 0]), np.array([1.0, 1.0]))
+
+    assert load_or_build("pair", lambda: arrays) is arrays
+    assert not neighborhood_cache_dir.exists()
@@ -0,0 +1,219 @@
+import pytest
+
+from rxn_ca.phases import SolidPhaseSet
+from rxn_ca.reactions import ScoredReaction, ScoredReactionSet
+from rxn_ca.core.reaction_calculator import ReactionCalculator, SiteInteraction, choose_from_list
+from rxn_ca.core.rng import RandomStream
+from rxn_ca.core.liquid_swap_controller import LiquidSwapController
+from rxn_ca.utilities.setup_reaction import setup_noise_reaction
+
+from pylattica.core.runner.common import merge_updates
+from pylattica.core.constants import SITES, SITE_ID
+from pylattica.discrete.state_constants import DISCRETE_OCCUPANCY
+
+PHASES = ["BaO", "TiO2", "BaTiO3"]
+
+@pytest.fixture
+def phases():
+    return SolidPhaseSet(
+        PHASES,
+        volumes={ p: 1.0 for p in PHASES },
+        densities={ p: 1.0 for p in PHASES },
+        melting_points={ p: 3000 for p in PHASES },
+        experimentally_observed={ p: True for p in PHASES },
+    )
+
+@pytest.fixture
+def rxn_set(phases):
+    return ScoredReactionSet([
+        ScoredReaction({"BaO": 1, "TiO2": 1}, {"BaTiO3": 2}, 0.5),
+    ], phases)
+
+@pytest.fixture
+def simulation(phases):
+    return setup_noise_reaction(phases, { "BaO": 1.0, "TiO2": 1.0 }, size=4)
+
+@pytest.fixture
+def calculator(simulation, rxn_set):
+    return ReactionCalculator(
+        LiquidSwapController.get_stencil_from_structure(simulation.structure),
+        scored_rxns=rxn_set,
+        rng=RandomStream(4),
+    )
+
+def test_propensities_are_cached(simulation, calculator, rxn_set):
+    state = simulation.state
+    active_probs = calculator.neighbor_active_probabilities(0, state)
+
+    assert calculator.neighbor_active_probabilities(0, state) is active_probs
+
+    calculator.set_rxn_set(rxn_set)
+    assert calculator.neighbor_active_probabilities(0, state) is not active_probs
+
+def test_updates_invalidate_neighbors(simulation, calculator):
+    state = simulation.state
+    site_ids = state.site_ids()
+
+    for _ in range(200):
+        for site_id in site_ids:
+            calculator.neighbor_active_probabilities(site_id, state)
+
+        site_id = site_ids[calculator.rng.randrange(len(site_ids))]
+        updates = merge_updates(calculator.get_state_update(site_id, state), site_id=site_id)
+        state.batch_update(updates)
+
+        if len(updates[SITES]) > 0:
+            break
+
+    assert len(updates[SITES]) > 0
+
+    fresh = ReactionCalculator(calculator.neighbor_arrays, scored_rxns=calculator.rxn_set)
+    for site_id in site_ids:
+        cached = calculator.neighbor_active_probabilities(site_id, state)
+        expected = fresh.neighbor_active_probabilities(site_id, state)
+        assert cached == expected
+
+def test_direct_changes_to_a_cached_site_are_caught(simulation, calculator):
+    state = simulation.state
+    calculator.neighbor_active_probabilities(0, state)
+
+    phase = state.get_site_state(0)[DISCRETE_OCCUPANCY]
+    state.set_site_state(0, { DISCRETE_OCCUPANCY: "BaTiO3" if phase != "BaTiO3" else "BaO" })
+
+    with pytest.raises(AssertionError, match="invalidate_sites"):
+        calculator.neighbor_active_probabilities(0, state)
+
+    calculator.invalidate_sites([0])
+    calculator.neighbor_active_probabilities(0, state)
+
+def test_a_visit_considers_one_neighbor(simulation, calculator):
+    state = simulation.state
+    nb_ids = list(calculator.get_neighbor_arrays(state.size).neighbor_ids(0))
+
+    state.set_site_state(0, { DISCRETE_OCCUPANCY: "BaO" })
+    for nb_id in nb_ids:
+        state.set_site_state(nb_id, { DISCRETE_OCCUPANCY: "TiO2" if nb_id == nb_ids[0] else "BaTiO3" })
+
+    for nb_idx, nb_id in enumerate(nb_ids):
+        pairs = [i for i in calculator.interactions_with_neighbor(0, state, nb_idx) if not i.is_no_op]
+        if nb_idx == 0:
+            assert len(pairs) == 1 and pairs[0].site_states[1][SITE_ID] == nb_id
+        else:
+            assert len(pairs) == 0
+
+    visits = [calculator.possible_interactions_at_site(0, state) for _ in range(3000)]
+    reactive = sum(any(not i.is_no_op for i in interactions) for interactions in visits)
+    assert reactive / len(visits) == pytest.approx(1 / len(nb_ids), abs=0.03)
+
+    active_probs = calculator.neighbor_active_probabilities(0, state)
+    assert active_probs[0] == pytest.approx(0.5 / (0.5 + 2 * calculator.inertia))
+    assert active_probs[1:] == [0.0] * (len(nb_ids) - 1)
+    assert calculator.get_site_propensity(0, state) == pytest.approx(active_probs[0] / len(nb_ids))
+
+def original_possible_interactions(calculator, rxn_set, neighborhood, site_one_id, state):
+    # The enumeration of interactions as it was before reaction hulls were compiled
+    site_one_state = state.get_site_state(site_one_id)
+    site_one_phase = site_one_state[DISCRETE_OCCUPANCY]
+    possible_interactions = []
+
+    for nb_id, distance in neighborhood.neighbors_of(site_one_id, include_weights=True):
+        site_two_state = state.get_site_state(nb_id)
+        site_two_phase = site_two_state[DISCRETE_OCCUPANCY]
+        interactions = []
+
+        possible_solid_solid_gas_rxns = []
+        for spec in calculator.atmospheric_species:
+            possible_solid_solid_gas_rxns.extend(rxn_set.get_reactions([site_one_phase, site_two_phase, spec]))
+
+        if len(possible_solid_solid_gas_rxns) > 0:
+            score = possible_solid_solid_gas_rxns[0].competitiveness / distance ** 3
+            interactions.append(SiteInteraction(score, [site_one_state, site_two_state], possible_solid_solid_gas_rxns))
+
+        if site_two_phase == SolidPhaseSet.FREE_SPACE:
+            for spec in calculator.atmospheric_species:
+                rxns = rxn_set.get_reactions([site_one_phase, spec])
+                if len(rxns) > 0:
+                    interactions.append(SiteInteraction(rxns[0].competitiveness, [site_one_state], rxns, spec))
+
+        possible_ss_reactions = rxn_set.get_reactions([site_two_phase, site_one_phase])
+
+        if len(possible_ss_reactions) > 0:
+            score = possible_ss_reactions[0].competitiveness / distance ** 3
+            interactions.append(SiteInteraction(score, [site_one_state, site_two_state], possible_ss_reactions))
+
+    possible_interactions.append(SiteInteraction(calculator.inertia, is_no_op=True))
+    possible_interactions.extend(interactions)
+
+    decomp_rxns = rxn_set.get_reactions([site_one_phase])
+    if len(decomp_rxns) > 0:
+        possible_interactions.append(SiteInteraction(decomp_rxns[0].competitiveness, [site_one_state], decomp_rxns))
+
+    possible_interactions.append(SiteInteraction(calculator.inertia, is_no_op=True))
+    return possible_interactions
+
+class NeighborLast():
+    # Reports the neighbors of a site from a graph with one of them last
+
+    def __init__(self, graph, last_id):
+        self.graph = graph
+        self.last_id = last_id
+
+    def neighbors_of(self, site_id, include_weights=False):
+        nbs = self.graph.neighbors_of(site_id, include_weights=include_weights)
+        return sorted(nbs, key=lambda nb: (nb[0] if include_weights else nb) == self.last_id)
+
+def test_interactions_match_original_enumeration():
+    phases = SolidPhaseSet(
+        PHASES + ["O2"],
+        volumes={ p: 1.0 for p in PHASES + ["O2"] },
+        gas_phases=["O2"],
+        densities={ p: 1.0 for p in PHASES + ["O2"] },
+        melting_points={ p: 3000 for p in PHASES + ["O2"] },
+        experimentally_observed={ p: True for p in PHASES + ["O2"] },
+    )
+    rxn_set = ScoredReactionSet([
+        ScoredReaction({"BaO": 1, "TiO2": 1}, {"BaTiO3": 2}, 0.5),
+        ScoredReaction({"BaO": 1, "TiO2": 1}, {"BaTiO3": 1, "BaO": 1}, 0.2),
+        ScoredReaction({"BaO": 1, "O2": 1}, {"BaTiO3": 1}, 0.05),
+        ScoredReaction({"BaO": 1, "TiO2": 1, "O2": 1}, {"BaTiO3": 1}, 0.3),
+        ScoredReaction({"TiO2": 1}, {"BaTiO3": 1}, 0.01),
+    ], phases)
+    simulation = setup_noise_reaction(phases, { "BaO": 1.0, "TiO2": 1.0 }, size=5, packing_fraction=0.7, rng=RandomStream(2))
+    graph = LiquidSwapController.get_neighborhood_from_structure(simulation.structure)
+    calculator = ReactionCalculator(graph, scored_rxns=rxn_set, atmospheric_species=["O2"])
+    state = simulation.state
+
+    # The graph reports the neighbors of a site in a different order each time, so the
+    # neighbor considered by the original implementation varied from visit to visit
+    last_ids = { graph.neighbors_of(0)[-1] for _ in range(200) }
+    assert last_ids == set(graph.neighbors_of(0))
+
+    def summary(interactions):
+        return [
+            (i.is_no_op, pytest.approx(i.score), [s[SITE_ID] for s in i.site_states],
+             i.atmosphere_reactant, [rxn_set.get_rxn_id(r) for r in i.reactions])
+            for i in interactions
+        ]
+
+    num_active = 0
+    for site_id in state.site_ids():
+        nb_ids = calculator.get_neighbor_arrays(state.size).neighbor_ids(site_id)
+        for nb_idx, nb_id in enumerate(nb_ids):
+            actual = calculator.interactions_with_neighbor(site_id, state, nb_idx)
+            expected = original_possible_interactions(calculator, rxn_set, NeighborLast(graph, nb_id), site_id, state)
+            assert summary(actual) == summary(expected)
+            num_active += len(actual) > 2
+
+            total = sum(i.score for i in expected)
+            active = sum(i.score for i in expected if not i.is_no_op)
+            assert calculator.neighbor_active_probabilities(site_id, state)[nb_idx] == pytest.approx(active / total)
+
+    assert num_active > 0
+
+def test_choose_from_list_draws_from_stream():
+    choices = ["a", "b", "c"]
+    rng, other = RandomStream(11), RandomStream(11)
+
+    chosen = [choose_from_list(choices, [0.2, 0.0, 0.8], rng) for _ in range(200)]
+    assert chosen == [choose_from_list(choices, [0.2, 0.0, 0.8], other) for _ in range(200)]
+    assert set(chosen) == { "a", "c" }
@@ -0,0 +1,62 @@
+import pytest
+
+from rxn_ca.core.rng import RandomStream
+from rxn_ca.core.recipe import ReactionRecipe, EngineTypes
+from rxn_ca.core.heating import HeatingSchedule, HeatingStep
+from rxn_ca.phases import SolidPhaseSet
+from rxn_ca.reactions import ScoredReaction, ScoredReactionSet, ReactionLibrary
+from rxn_ca.utilities.single_sim import run_single_sim
+
+PHASES = ["BaO", "TiO2", "BaTiO3"]
+
+@pytest.fixture
+def reaction_lib():
+    phases = SolidPhaseSet(
+        PHASES,
+        volumes={ p: 1.0 for p in PHASES },
+        densities={ p: 1.0 for p in PHASES },
+        melting_points={ p: 1500 for p in PHASES },
+        experimentally_observed={ p: True for p in PHASES },
+    )
+    lib = ReactionLibrary(phases)
+    lib.add_rxns_at_temp(ScoredReactionSet([
+        ScoredReaction({"BaO": 1, "TiO2": 1}, {"BaTiO3": 2}, 0.5),
+    ], phases), 1000)
+    return lib
+
+def test_streams_are_reproducible():
+    first = RandomStream(12, block_size=8)
+    second = RandomStream(12, block_size=8)
+
+    draws = [first.random() for _ in range(20)]
+    assert draws == [second.random() for _ in range(20)]
+    assert all(0 <= d < 1 for d in draws)
+
+    items = list(range(10))
+    first.shuffle(items)
+    assert sorted(items) == list(range(10))
+    assert first.randrange(3) in (0, 1, 2)
+
+def test_spawned_streams_are_independent():
+    children = RandomStream(12).spawn(3)
+    draws = [tuple(c.random() for _ in range(5)) for c in children]
+    assert len(set(draws)) == 3
+
+    again = RandomStream(12).spawn(3)
+    assert draws[1] == tuple(again[1].random() for _ in range(5))
+
+@pytest.mark.parametrize("engine", list(EngineTypes))
+def test_seeded_runs_are_reproducible(reaction_lib, engine):
+    recipe = ReactionRecipe(
+        heating_schedule=HeatingSchedule.build(HeatingStep.hold(1000, 2)),
+        reactant_amounts={ "BaO": 1, "TiO2": 1 },
+        simulation_size=4,
+        engine=engine,
+        seed=7,
+    )
+
+    first = run_single_sim(recipe, reaction_lib=reaction_lib).results[0]
+    second = run_single_sim(recipe, reaction_lib=reaction_lib).results[0]
+
+    assert first.initial_state == second.initial_state
+    assert first._diffs == second._diffs
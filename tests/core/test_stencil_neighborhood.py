@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from pylattica.structures.square_grid import (
+    SimpleSquare2DStructureBuilder,
+    SimpleSquare3DStructureBuilder,
+    PseudoHexagonalNeighborhoodBuilder3D,
+)
+
+from rxn_ca.core import NeighborArrays, StencilNeighborhood, ReactionController
+from rxn_ca.core.liquid_swap_controller import LiquidSwapController
+from rxn_ca.core.rng import RandomStream
+from rxn_ca.core.stencil_neighborhood import PseudoHexagonalStencilBuilder, von_neumann_offsets
+
+@pytest.mark.parametrize("controller, structure", [
+    (ReactionController, SimpleSquare2DStructureBuilder().build(12)),
+    (ReactionController, SimpleSquare3DStructureBuilder().build(11)),
+    (LiquidSwapController, SimpleSquare3DStructureBuilder().build(5)),
+])
+def test_stencil_matches_graph(controller, structure):
+    nb_graph = controller.get_neighborhood_from_structure(structure)
+    stencil = controller.get_stencil_from_structure(structure)
+
+    assert isinstance(stencil, StencilNeighborhood)
+    assert stencil.num_sites == len(structure.site_ids)
+
+    for site_id in structure.site_ids:
+        expected = sorted(nb_graph.neighbors_of(site_id, include_weights=True))
+        actual = sorted(stencil.neighbors_of(site_id, include_weights=True))
+        assert [nb for nb, _ in actual] == [nb for nb, _ in expected]
+        # pylattica rounds the distances of motif neighborhoods to two places
+        assert np.allclose([d for _, d in actual], [d for _, d in expected], atol=1e-2)
+
+    nb_ids, weights, mask = stencil.padded()
+    assert nb_ids[7].tolist() == stencil.neighbor_ids(7)
+    assert np.allclose(weights[7], [w for _, w in stencil.weighted_neighbors(7)])
+    assert mask.all()
+
+def test_small_grids_fall_back_to_arrays():
+    structure = SimpleSquare3DStructureBuilder().build(4)
+    neighborhood = ReactionController.get_stencil_from_structure(structure)
+
+    assert isinstance(neighborhood, NeighborArrays)
+    with pytest.raises(ValueError):
+        StencilNeighborhood.from_structure(structure, von_neumann_offsets(5, 3))
+
+def test_pseudo_hexagonal_stencils():
+    structure = SimpleSquare3DStructureBuilder().build(4)
+    stencils = PseudoHexagonalStencilBuilder(3).get(structure).neighborhoods
+    graphs = PseudoHexagonalNeighborhoodBuilder3D().get(structure)._neighborhoods
+
+    for stencil, graph in zip(stencils, graphs):
+        for site_id in structure.site_ids:
+            assert sorted(stencil.neighbor_ids(site_id)) == sorted(graph.neighbors_of(site_id))
+
+def test_stochastic_stencils_draw_from_stream():
+    structure = SimpleSquare3DStructureBuilder().build(6)
+    builder = PseudoHexagonalStencilBuilder(3)
+    first, second = builder.get(structure), builder.get(structure)
+    first.set_rng(RandomStream(5))
+    second.set_rng(RandomStream(5))
+
+    draws = [sorted(first.neighbors_of(site_id)) for site_id in structure.site_ids]
+    assert draws == [sorted(second.neighbors_of(site_id)) for site_id in structure.site_ids]
+    assert len({ tuple(sorted(first.neighbors_of(0))) for _ in range(50) }) > 1
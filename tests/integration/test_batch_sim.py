@@ -0,0 +1,96 @@
+from rxn_ca.computing.schemas import RxnCAResultManifest
+from rxn_ca.core.heating import HeatingSchedule, HeatingStep
+from rxn_ca.core.recipe import ReactionRecipe, EngineTypes
+from rxn_ca.phases import SolidPhaseSet
+from rxn_ca.reactions import ScoredReaction, ScoredReactionSet, ReactionLibrary, FlatReactionLibrary
+from rxn_ca.utilities.batch_sim import run_recipes_parallel
+from rxn_ca.utilities.parallel_sim import run_sim_parallel
+
+PHASES = ["BaO", "TiO2", "BaTiO3", "Ba2TiO4"]
+
+def get_library():
+    phases = SolidPhaseSet(
+        PHASES,
+        volumes={ p: 1.0 for p in PHASES },
+        densities={ p: 1.0 for p in PHASES },
+        melting_points={ p: 1500 for p in PHASES },
+        experimentally_observed={ p: True for p in PHASES },
+    )
+    lib = ReactionLibrary(phases)
+    for temp in [900, 1000]:
+        lib.add_rxns_at_temp(ScoredReactionSet([
+            ScoredReaction({"BaO": 1, "TiO2": 1}, {"BaTiO3": 2}, 0.5),
+            ScoredReaction({"BaTiO3": 1, "BaO": 1}, {"Ba2TiO4": 2}, 0.3),
+        ], phases), temp)
+    return lib
+
+def get_recipe(**kwargs):
+    return ReactionRecipe(
+        heating_schedule=HeatingSchedule.build(HeatingStep.hold(900, 2), HeatingStep.hold(1000, 2)),
+        reactant_amounts={ "BaO": 1, "TiO2": 1 },
+        simulation_size=6,
+        **kwargs
+    )
+
+def test_recipes_match_separate_runs():
+    lib = get_library()
+    recipes = [
+        get_recipe(num_realizations=3, seed=1),
+        get_recipe(num_realizations=2, seed=2, exclude_phases=["Ba2TiO4"]),
+        get_recipe(num_realizations=2, seed=3, engine=EngineTypes.ENSEMBLE),
+    ]
+
+    docs = dict(run_recipes_parallel(recipes, lib, num_workers=2))
+    assert sorted(docs.keys()) == [0, 1, 2]
+
+    for recipe_idx, recipe in enumerate(recipes):
+        expected = run_sim_parallel(recipe, reaction_lib=lib)
+        doc = docs[recipe_idx]
+
+        assert doc.library_fingerprint == expected.library_fingerprint
+        assert doc.seeds == expected.seeds
+        assert [r.last_step for r in doc.results] == [r.last_step for r in expected.results]
+
+def test_shared_libraries_hold_only_their_recipes_temps(monkeypatch):
+    lib = get_library()
+    recipes = [
+        get_recipe(num_realizations=1, seed=1),
+        ReactionRecipe(
+            heating_schedule=HeatingSchedule.build(HeatingStep.hold(900, 2)),
+            reactant_amounts={ "BaO": 1, "TiO2": 1 },
+            simulation_size=6,
+            num_realizations=1,
+            seed=2,
+            exclude_phases=["Ba2TiO4"],
+        ),
+    ]
+
+    flattened = {}
+    from_library = FlatReactionLibrary.from_library.__func__
+    def record(cls, library, temps=None):
+        flattened[library.fingerprint()] = sorted(temps)
+        return from_library(cls, library, temps=temps)
+    monkeypatch.setattr(FlatReactionLibrary, "from_library", classmethod(record))
+
+    docs = dict(run_recipes_parallel(recipes, lib, num_workers=1))
+
+    assert sorted(flattened.values()) == [[900], [900, 1000]]
+    assert flattened[docs[1].library_fingerprint] == [900]
+
+def test_shards_match_results(tmp_path):
+    lib = get_library()
+    recipe = get_recipe(num_realizations=2, seed=4)
+
+    expected = run_sim_parallel(recipe, reaction_lib=lib)
+    manifest = run_sim_parallel(recipe, reaction_lib=lib, shard_dir=str(tmp_path / "shards"))
+
+    assert isinstance(manifest, RxnCAResultManifest)
+    assert manifest.seeds == expected.seeds
+    assert [s.num_steps for s in manifest.shards] == [len(r) for r in expected.results]
+
+    manifest_path = str(tmp_path / "manifest.json")
+    manifest.to_file(manifest_path)
+    loaded = RxnCAResultManifest.from_file(manifest_path).to_result_doc()
+
+    assert loaded.library_fingerprint == expected.library_fingerprint
+    assert [r.last_step for r in loaded.results] == [r.last_step for r in expected.results]
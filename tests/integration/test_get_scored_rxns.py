@@ -0,0 +1,71 @@
+import pytest
+
+from pymatgen.core import Composition
+from rxn_network.entries.gibbs import GibbsComputedEntry
+from rxn_network.reactions.computed import ComputedReaction
+from rxn_network.reactions.reaction_set import ReactionSet
+
+from rxn_ca.phases import SolidPhaseSet
+from rxn_ca.reactions import ScoredReactionSet, score_rxns
+from rxn_ca.reactions.scorers import TammanHuttigScoreErf
+from rxn_ca.utilities.get_scored_rxns import get_scored_rxns
+
+PHASES = ["BaO", "TiO2", "BaTiO3", "Ba2TiO4", "BaTi2O5"]
+TEMPS = [600, 900, 1200]
+
+@pytest.fixture
+def phase_set():
+    return SolidPhaseSet(
+        PHASES,
+        volumes={ p: 1.0 + 0.1 * idx for idx, p in enumerate(PHASES) },
+        densities={ p: 1.0 for p in PHASES },
+        melting_points={ p: 1800 + 100 * idx for idx, p in enumerate(PHASES) },
+        experimentally_observed={ p: True for p in PHASES },
+    )
+
+@pytest.fixture
+def rxn_set():
+    energies = { "BaO": -2.8, "TiO2": -3.2, "BaTiO3": -3.4, "Ba2TiO4": -3.3, "BaTi2O5": -3.35 }
+    entries = { f: GibbsComputedEntry(Composition(f), e, 10.0, 300, entry_id=f) for f, e in energies.items() }
+    rxns = [
+        ComputedReaction.balance([entries["BaO"], entries["TiO2"]], [entries["BaTiO3"]]),
+        ComputedReaction.balance([entries["BaO"], entries["BaTiO3"]], [entries["Ba2TiO4"]]),
+        ComputedReaction.balance([entries["TiO2"], entries["BaTiO3"]], [entries["BaTi2O5"]]),
+        ComputedReaction.balance([entries["Ba2TiO4"], entries["TiO2"]], [entries["BaTiO3"]]),
+        ComputedReaction.balance([entries["BaO"], entries["TiO2"], entries["BaTiO3"]], [entries["Ba2TiO4"], entries["BaTi2O5"]]),
+        ComputedReaction.balance([entries["BaTi2O5"], entries["BaO"]], [entries["BaTiO3"]]),
+    ]
+    return ReactionSet.from_rxns(rxns)
+
+def _score_each_temp(rxn_set, phase_set):
+    # Scores the whole set at each temperature in turn
+    rsets = {}
+    for temp in TEMPS:
+        scorer = TammanHuttigScoreErf(phase_set=phase_set, temp=temp)
+        scored = score_rxns(rxn_set.set_new_temperature(temp), scorer, phase_set=phase_set)
+        rsets[temp] = ScoredReactionSet(scored, phase_set)
+    return rsets
+
+@pytest.mark.parametrize("parallel", [False, True])
+@pytest.mark.parametrize("chunk_size", [1, 4, None])
+def test_chunks_match_scoring_each_temp(rxn_set, phase_set, parallel, chunk_size):
+    expected = _score_each_temp(rxn_set, phase_set)
+    lib = get_scored_rxns(rxn_set, temps=TEMPS, phase_set=phase_set, parallel=parallel, chunk_size=chunk_size)
+
+    assert lib.temps == TEMPS
+    for temp in TEMPS:
+        rset = lib.get_rxns_at_temp(temp)
+        assert len(rset.rxn_to_id) == len(expected[temp].rxn_to_id) == len(rxn_set)
+        for rxn_id, rxn in expected[temp].id_to_rxn.items():
+            scored = rset.get_rxn_by_id(rxn_id)
+            assert scored._as_str == rxn._as_str
+            assert scored.competitiveness == pytest.approx(rxn.competitiveness)
+            assert scored.energy_per_atom == pytest.approx(rxn.energy_per_atom)
+
+def test_rxns_at_temps(rxn_set, phase_set):
+    expected = _score_each_temp(rxn_set, phase_set)
+    rxns_at_temps = { temp: rxn_set.set_new_temperature(temp) for temp in TEMPS }
+    lib = get_scored_rxns(rxn_set, temps=TEMPS, phase_set=phase_set, rxns_at_temps=rxns_at_temps, parallel=False, chunk_size=2)
+
+    for temp in TEMPS:
+        assert str(lib.get_rxns_at_temp(temp).get_rxn_by_id(0)) == str(expected[temp].get_rxn_by_id(0))
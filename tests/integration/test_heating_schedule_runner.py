@@ -0,0 +1,94 @@
+import numpy as np
+
+from pylattica.core import Simulation
+from pylattica.core.constants import GENERAL, SITES
+
+from rxn_ca.core.constants import TEMPERATURE
+
+from rxn_ca.core.heating import HeatingSchedule, HeatingStep
+from rxn_ca.core.recipe import ReactionRecipe, EngineTypes
+from rxn_ca.core.liquid_swap_controller import LiquidSwapController
+from rxn_ca.core.reaction_calculator import ReactionCalculator
+from rxn_ca.core.rng import RandomStream
+from rxn_ca.phases import SolidPhaseSet
+from rxn_ca.reactions import ScoredReaction, ScoredReactionSet, ReactionLibrary
+from rxn_ca.utilities.heating_schedule_runner import HeatingScheduleRunner
+from rxn_ca.utilities.setup_reaction import setup_noise_reaction
+from rxn_ca.utilities.ensemble_sim import run_ensemble
+from rxn_ca.utilities.single_sim import run_single_sim
+
+PHASES = ["BaO", "TiO2", "BaTiO3"]
+
+def get_library():
+    phases = SolidPhaseSet(
+        PHASES,
+        volumes={ p: 1.0 for p in PHASES },
+        densities={ p: 1.0 for p in PHASES },
+        melting_points={ p: 1500 for p in PHASES },
+        experimentally_observed={ p: True for p in PHASES },
+    )
+    lib = ReactionLibrary(phases)
+    for temp in [900, 1000]:
+        lib.add_rxns_at_temp(ScoredReactionSet([
+            ScoredReaction({"BaO": 1, "TiO2": 1}, {"BaTiO3": 2}, 0.5),
+        ], phases), temp)
+    return lib
+
+def run(runner: HeatingScheduleRunner, lib: ReactionLibrary, schedule: HeatingSchedule):
+    setup_rng, sim_rng = RandomStream(7).spawn(2)
+    simulation: Simulation = setup_noise_reaction(
+        lib.phases,
+        precursor_mole_ratios={ "BaO": 1, "TiO2": 1 },
+        size=4,
+        rng=setup_rng,
+    )
+    calculator = ReactionCalculator(
+        LiquidSwapController.get_stencil_from_structure(simulation.structure),
+        rng=sim_rng,
+    )
+    controller = LiquidSwapController(simulation.structure, rxn_calculator=calculator)
+    return runner.run_multi(simulation, lib, schedule, controller=controller, verbose=False)
+
+def test_segments_match_separate_steps():
+    lib = get_library()
+    schedule = HeatingSchedule.build(HeatingStep.hold(900, 3), HeatingStep.hold(1000, 2))
+
+    runner = HeatingScheduleRunner()
+    assert [len(s) for s in runner._segment_steps(schedule)] == [3, 2]
+
+    # A middleware stops steps from being grouped
+    separate_runner = HeatingScheduleRunner(middlewares=[lambda state, phases, temp: state])
+    assert [len(s) for s in separate_runner._segment_steps(schedule)] == [1] * 5
+
+    coalesced = run(runner, lib, schedule)
+    separate = run(separate_runner, lib, schedule)
+
+    # The runs draw different random numbers once they cross a step boundary,
+    # so only the shape of the results can be compared
+    assert len(coalesced) == len(separate)
+    step_size = coalesced.first_step.size
+    for step_idx in range(len(separate)):
+        assert coalesced.get_step(step_idx).get_general_state(TEMPERATURE) == \
+            separate.get_step(step_idx).get_general_state(TEMPERATURE)
+
+    for boundary_idx in [step_size + 1, 2 * step_size + 2, 4 * step_size + 4]:
+        assert coalesced._diffs[boundary_idx - 1] == { SITES: {}, GENERAL: {} }
+
+def test_ensemble_matches_single_runs():
+    lib = get_library()
+    recipe = ReactionRecipe(
+        heating_schedule=HeatingSchedule.build(HeatingStep.hold(900, 2), HeatingStep.hold(1000, 1)),
+        reactant_amounts={ "BaO": 1, "TiO2": 1 },
+        simulation_size=4,
+        engine=EngineTypes.ENSEMBLE,
+    )
+    seeds = np.random.SeedSequence(5).spawn(3)
+
+    results = run_ensemble(recipe, lib, seeds)
+
+    assert len(results) == 3
+    # Spawning streams from a seed changes it, so fresh copies are used here
+    for seed, result in zip(np.random.SeedSequence(5).spawn(3), results):
+        expected = run_single_sim(recipe, reaction_lib=lib, rng=RandomStream(seed)).results[0]
+        assert result.initial_state == expected.initial_state
+        assert result._diffs == expected._diffs
@@ -0,0 +1,63 @@
+import pytest
+
+from rxn_ca.core.recipe import ReactionRecipe
+from rxn_ca.core.heating import HeatingSchedule, HeatingStep
+from rxn_ca.phases import SolidPhaseSet
+from rxn_ca.reactions import ScoredReaction, ScoredReactionSet, ReactionLibrary
+from rxn_ca.computing.schemas.ca_result_schema import RxnCAResultDoc, replayable_doc
+from rxn_ca.utilities.single_sim import run_single_sim
+from rxn_ca.utilities.replay import replay
+
+PHASES = ["BaO", "TiO2", "BaTiO3"]
+
+def get_library(score):
+    phases = SolidPhaseSet(
+        PHASES,
+        volumes={ p: 1.0 for p in PHASES },
+        densities={ p: 1.0 for p in PHASES },
+        melting_points={ p: 1500 for p in PHASES },
+        experimentally_observed={ p: True for p in PHASES },
+    )
+    lib = ReactionLibrary(phases)
+    lib.add_rxns_at_temp(ScoredReactionSet([
+        ScoredReaction({"BaO": 1, "TiO2": 1}, {"BaTiO3": 2}, score),
+    ], phases), 1000)
+    return lib
+
+@pytest.fixture
+def recipe():
+    return ReactionRecipe(
+        heating_schedule=HeatingSchedule.build(HeatingStep.hold(1000, 2)),
+        reactant_amounts={ "BaO": 1, "TiO2": 1 },
+        simulation_size=4,
+        seed=3,
+    )
+
+def test_replay_matches_original(recipe, tmp_path):
+    reaction_lib = get_library(0.5)
+    result_doc = run_single_sim(recipe, reaction_lib=reaction_lib)
+    original = result_doc.results[0]
+
+    fpath = str(tmp_path / "replayable.json")
+    replayable_doc(result_doc).to_file(fpath)
+    loaded: RxnCAResultDoc = RxnCAResultDoc.from_file(fpath)
+
+    assert loaded.results == []
+    assert loaded.reaction_library is None
+
+    replayed = replay(loaded, reaction_lib=reaction_lib)
+    assert replayed.initial_state == original.initial_state
+    assert replayed._diffs == original._diffs
+
+    partial = replay(loaded, num_steps=40, reaction_lib=reaction_lib)
+    assert len(partial) == 41
+    assert partial._diffs == original._diffs[:40]
+
+def test_replay_checks_library(recipe):
+    result_doc = run_single_sim(recipe, reaction_lib=get_library(0.5))
+
+    with pytest.raises(ValueError):
+        replay(replayable_doc(result_doc), reaction_lib=get_library(0.4))
+
+    with pytest.raises(ValueError):
+        replay(replayable_doc(result_doc))
@@ -0,0 +1,76 @@
+import pytest
+
+from rxn_ca.phases import SolidPhaseSet
+from rxn_ca.reactions import ScoredReaction, ScoredReactionSet
+
+PHASES = ["BaO", "TiO2", "BaTiO3", "Ba2TiO4", "O2"]
+
+@pytest.fixture
+def phases():
+    return SolidPhaseSet(
+        PHASES,
+        volumes={ p: 1.0 for p in PHASES },
+        gas_phases=["O2"],
+        densities={ p: 1.0 for p in PHASES },
+        melting_points={ p: 2000 for p in PHASES },
+        experimentally_observed={ p: True for p in PHASES },
+    )
+
+@pytest.fixture
+def rxn_set(phases):
+    return ScoredReactionSet([
+        ScoredReaction({"BaO": 1, "TiO2": 1}, {"BaTiO3": 2}, 0.8),
+        ScoredReaction({"BaO": 2, "TiO2": 1}, {"Ba2TiO4": 3}, 0.3),
+        ScoredReaction({"Ba2TiO4": 1}, {"BaO": 0.5, "BaTiO3": 0.5}, 0.05),
+        ScoredReaction({"BaO": 1, "O2": 1}, {"BaTiO3": 1}, 0.1),
+        ScoredReaction({"BaO": 1, "TiO2": 1, "O2": 1}, {"BaTiO3": 3}, 0.2),
+    ], phases)
+
+def test_compiled_matches_reactant_map(rxn_set):
+    compiled = rxn_set.compile(["O2"])
+
+    for p1 in compiled.phases:
+        i = compiled.phase_id(p1)
+        single = compiled.single_hulls[i]
+        assert (single.reactions if single is not None else []) == rxn_set.get_reactions([p1])
+        assert compiled.single_possible[i] == (single is not None)
+
+        atm = compiled.atmosphere_hulls[i][0]
+        assert (atm.reactions if atm is not None else []) == rxn_set.get_reactions([p1, "O2"])
+
+        for p2 in compiled.phases:
+            j = compiled.phase_id(p2)
+            pair = compiled.pair_hulls[i][j]
+            assert (pair.reactions if pair is not None else []) == rxn_set.get_reactions([p1, p2])
+
+            pair_atm = compiled.pair_atmosphere_hulls[i][j]
+            assert (pair_atm.reactions if pair_atm is not None else []) == rxn_set.get_reactions([p1, p2, "O2"])
+
+def test_compiled_scores_lead_hulls(rxn_set):
+    compiled = rxn_set.compile()
+    bao = compiled.phase_id("BaO")
+    tio2 = compiled.phase_id("TiO2")
+
+    assert compiled.pair_scores[bao, tio2] == 0.8
+    assert compiled.pair_scores[tio2, bao] == 0.8
+    assert compiled.pair_possible[bao, tio2]
+    assert not compiled.pair_possible[bao, compiled.free_space_id]
+    assert compiled.atmosphere_scores.shape == (compiled.num_ids, 0)
+
+def test_unknown_phases_are_inert(rxn_set):
+    compiled = rxn_set.compile()
+    inert = compiled.phase_id("NaCl")
+
+    assert inert == compiled.inert_id
+    assert compiled.single_hulls[inert] is None
+    assert not compiled.phase_possible[inert]
+    assert compiled.phase_possible[compiled.phase_id("BaO")]
+
+def test_compiled_is_cached_until_modified(rxn_set):
+    compiled = rxn_set.compile(["O2"])
+    assert rxn_set.compile(["O2"]) is compiled
+
+    rxn_set.add_rxn(ScoredReaction({"TiO2": 1}, {"BaTiO3": 1}, 0.01))
+    recompiled = rxn_set.compile(["O2"])
+    assert recompiled is not compiled
+    assert recompiled.single_possible[recompiled.phase_id("TiO2")]
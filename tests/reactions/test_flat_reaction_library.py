@@ -0,0 +1,116 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from rxn_ca.phases import SolidPhaseSet
+from rxn_ca.reactions import ScoredReaction, ScoredReactionSet, ReactionLibrary, FlatReactionLibrary
+
+PHASES = ["BaO", "TiO2", "BaTiO3", "Ba2TiO4"]
+
+@pytest.fixture
+def library():
+    phases = SolidPhaseSet(
+        PHASES,
+        volumes={ p: 1.0 for p in PHASES },
+        densities={ p: 1.0 for p in PHASES },
+        melting_points={ p: 3000 for p in PHASES },
+        experimentally_observed={ p: True for p in PHASES },
+    )
+    lib = ReactionLibrary(phases)
+    for temp, score in [(900, 0.2), (1000, 0.7)]:
+        rxns = ScoredReactionSet([
+            ScoredReaction({"BaO": 1, "TiO2": 1}, {"BaTiO3": 1.5}, score, energy_per_atom=-0.1),
+            ScoredReaction({"BaTiO3": 1, "BaO": 1}, {"Ba2TiO4": 2}, score / 2),
+        ], phases)
+        lib.add_rxns_at_temp(rxns, temp)
+    return lib
+
+def assert_same_rxns(flat, lib):
+    for temp in lib.temps:
+        expected = lib.get_rxns_at_temp(temp)
+        actual = flat.get_rxns_at_temp(temp)
+        assert actual.rxn_to_id == expected.rxn_to_id
+        assert actual.as_dict() == expected.as_dict()
+
+def test_round_trip(library):
+    flat = FlatReactionLibrary.from_library(library)
+
+    assert flat.temps == library.temps
+    assert flat.fingerprint() == library.fingerprint()
+    assert flat.to_library().fingerprint() == library.fingerprint()
+    assert_same_rxns(flat, library)
+
+    # Each reaction is stored once, though it is scored at two temperatures
+    assert len(flat.reactant_indptr) == 3
+    assert flat.scores.shape == (2, 2)
+    assert np.isnan(flat.energies[1]).all()
+
+def test_shared_memory_is_attached_when_unpickled(library):
+    shared = FlatReactionLibrary.from_library(library).to_shared_memory()
+    try:
+        attached = pickle.loads(pickle.dumps(shared))
+        assert len(pickle.dumps(shared)) < shared.nbytes
+        assert not attached.scores.flags.writeable
+        assert_same_rxns(attached, library)
+        attached.close()
+    finally:
+        shared.unlink()
+
+def test_save_and_load(library, tmp_path):
+    json_path = str(tmp_path / "lib.json")
+    fpath = str(tmp_path / "lib.rxnlib")
+    library.to_file(json_path)
+    FlatReactionLibrary.from_json_file(json_path).save(fpath)
+
+    assert FlatReactionLibrary.is_flat_library_file(fpath)
+    assert not FlatReactionLibrary.is_flat_library_file(json_path)
+
+    loaded = ReactionLibrary.from_file(fpath)
+    assert isinstance(loaded, FlatReactionLibrary)
+    assert loaded.fingerprint() == library.fingerprint()
+    assert_same_rxns(loaded, library)
+    assert_same_rxns(pickle.loads(pickle.dumps(loaded)), library)
+
+def test_reactions_are_built_on_request(library):
+    flat = FlatReactionLibrary.from_library(library)
+    assert len(flat._reactions) == 0
+
+    rxn = flat.get_rxn(1)
+    assert rxn.reactants == frozenset(["BaTiO3", "BaO"])
+    assert list(flat._reactions.keys()) == [1]
+
+    flat.get_rxns_at_temp(900)
+    assert sorted(flat._reactions.keys()) == [0, 1]
+
+def test_exclude_phases(library):
+    flat = FlatReactionLibrary.from_library(library)
+
+    assert flat.exclude_phases(["Na2O"]) is flat
+    assert flat.limit_phase_set(PHASES) is flat
+
+    excluded = flat.exclude_phases(["Ba2TiO4"])
+    assert excluded.fingerprint() == library.exclude_phases(["Ba2TiO4"]).fingerprint()
+
+def test_json_conversion_keeps_fingerprint(library, tmp_path):
+    # Each temperature holds a different subset of the reactions, in a different order
+    rxns = [
+        ScoredReaction({"BaO": 2, "TiO2": 1}, {"Ba2TiO4": 3}, 0.3, energy_per_atom=-0.2),
+        ScoredReaction({"Ba2TiO4": 1, "TiO2": 1}, {"BaTiO3": 2}, 0.6),
+        ScoredReaction({"BaO": 1, "TiO2": 1}, {"BaTiO3": 1.5}, 0.9, energy_per_atom=-0.1),
+    ]
+    library.add_rxns_at_temp(ScoredReactionSet(rxns[::-1], library.phases), 1100)
+    library.add_rxns_at_temp(ScoredReactionSet(rxns[:2], library.phases), 1200)
+
+    fpath = tmp_path / "library.json"
+    library.to_file(fpath)
+
+    flat = FlatReactionLibrary.from_json_file(fpath)
+    assert flat.fingerprint() == ReactionLibrary.from_file(fpath).fingerprint()
+    assert flat.to_library().fingerprint() == flat.fingerprint()
+    assert_same_rxns(flat, library)
+
+    flat.save(tmp_path / "library.rxnlib")
+    loaded = FlatReactionLibrary.load(tmp_path / "library.rxnlib")
+    assert_same_rxns(loaded, library)
+    assert loaded.exclude_phases(["Ba2TiO4"]).fingerprint() == library.exclude_phases(["Ba2TiO4"]).fingerprint()
@@ -0,0 +1,62 @@
+import json
+
+import pytest
+
+from rxn_ca.phases import SolidPhaseSet
+from rxn_ca.reactions import ScoredReaction, ScoredReactionSet, ReactionLibrary, FlatReactionLibrary
+
+PHASES = ["BaO", "TiO2", "BaTiO3", "Ba2TiO4"]
+
+@pytest.fixture
+def library():
+    phases = SolidPhaseSet(
+        PHASES,
+        volumes={ p: 1.0 for p in PHASES },
+        densities={ p: 1.0 for p in PHASES },
+        melting_points={ p: 3000 for p in PHASES },
+        experimentally_observed={ p: True for p in PHASES },
+    )
+    lib = ReactionLibrary(phases)
+    lib.add_rxns_at_temp(ScoredReactionSet([
+        ScoredReaction({"BaO": 1, "TiO2": 1}, {"BaTiO3": 2}, 0.2, energy_per_atom=-0.1),
+    ], phases), 900)
+    lib.add_rxns_at_temp(ScoredReactionSet([
+        ScoredReaction({"BaO": 1, "TiO2": 1}, {"BaTiO3": 2}, 0.7, energy_per_atom=-0.2),
+        ScoredReaction({"BaTiO3": 1, "BaO": 1}, {"Ba2TiO4": 2}, 0.4),
+    ], phases), 1000)
+    return lib
+
+def test_temperatures_load_on_access(library, tmp_path):
+    fpath = tmp_path / "library.json"
+    library.to_file(fpath)
+    loaded = ReactionLibrary.from_file(fpath)
+
+    assert loaded.temps == [900, 1000]
+    assert not loaded.lib.is_loaded(900) and not loaded.lib.is_loaded(1000)
+
+    # Neither serializing the library nor taking its fingerprint builds any reactions
+    assert loaded.fingerprint() == library.fingerprint()
+    assert json.loads(json.dumps(loaded.as_dict())) == json.loads(json.dumps(library.as_dict()))
+    assert not loaded.lib.is_loaded(900)
+
+    rxns = loaded.get_rxns_at_temp(1000)
+    assert rxns.rxn_to_id == library.get_rxns_at_temp(1000).rxn_to_id
+    assert loaded.lib.is_loaded(1000) and not loaded.lib.is_loaded(900)
+    assert loaded.get_rxns_at_temp(1000) is rxns
+    assert loaded.fingerprint() == library.fingerprint()
+
+def test_prefetch(library):
+    loaded = ReactionLibrary.from_dict(library.as_dict())
+    loaded.prefetch([900])
+
+    assert loaded.lib.is_loaded(900)
+    assert not loaded.lib.is_loaded(1000)
+
+def test_flatten_selected_temps(library):
+    loaded = ReactionLibrary.from_dict(library.as_dict())
+    flat = FlatReactionLibrary.from_library(loaded, temps=[1000])
+
+    assert flat.temps == [1000]
+    assert flat.fingerprint() == library.fingerprint()
+    assert flat.get_rxns_at_temp(1000).rxn_to_id == library.get_rxns_at_temp(1000).rxn_to_id
+    assert not loaded.lib.is_loaded(900)
@@ -0,0 +1,62 @@
+import pytest
+
+import numpy as np
+
+from rxn_ca.reactions.samplers import AliasSampler
+from rxn_ca.reactions import ScoredReaction, ScoredReactionSet
+from rxn_ca.phases import SolidPhaseSet
+from rxn_ca.core.rng import RandomStream
+
+def test_alias_sampler_matches_weights():
+    weights = [0.1, 0.0, 0.6, 0.3]
+    sampler = AliasSampler(weights)
+    rng = np.random.default_rng(0)
+
+    counts = np.bincount([sampler.draw(u) for u in rng.random(40000)], minlength=4)
+
+    assert counts[1] == 0
+    assert counts / counts.sum() == pytest.approx(np.array(weights), abs=0.01)
+
+def test_alias_sampler_edges():
+    sampler = AliasSampler([2.0])
+    assert sampler.draw(0.0) == 0
+    assert sampler.draw(0.9999999999) == 0
+
+    uniform = AliasSampler([0.0, 0.0])
+    assert { uniform.draw(u) for u in [0.1, 0.9] } == { 0, 1 }
+
+    with pytest.raises(ValueError):
+        AliasSampler([])
+
+def test_alias_sampler_draws_from_stream():
+    sampler = AliasSampler([0.1, 0.6, 0.3])
+    first = [sampler.sample(RandomStream(3)) for _ in range(5)]
+    rng, other = RandomStream(3), RandomStream(3)
+
+    assert [sampler.sample(rng) for _ in range(50)] == [sampler.sample(other) for _ in range(50)]
+    assert first == [sampler.draw(RandomStream(3).random())] * 5
+
+def test_compiled_samplers():
+    phases = ["BaO", "TiO2", "BaTiO3", "Ba2TiO4"]
+    phase_set = SolidPhaseSet(
+        phases,
+        volumes={ p: 1.0 for p in phases },
+        densities={ p: 1.0 for p in phases },
+        melting_points={ p: 2000 for p in phases },
+        experimentally_observed={ p: True for p in phases },
+    )
+    rxn_set = ScoredReactionSet([
+        ScoredReaction({"BaO": 1, "TiO2": 1}, {"BaTiO3": 2}, 0.8),
+        ScoredReaction({"BaO": 1, "TiO2": 1}, {"BaO": 0.5, "Ba2TiO4": 1.5}, 0.2),
+    ], phase_set)
+    compiled = rxn_set.compile()
+
+    rng = RandomStream(0)
+    hull = compiled.pair_hulls[compiled.phase_id("BaO")][compiled.phase_id("TiO2")]
+    for _ in range(20):
+        rxn, rxn_id = hull.sample(rng.random())
+        assert rxn_set.get_rxn_id(rxn) == rxn_id
+
+    products = [compiled.sample_product(1, rng.random()) for _ in range(2000)]
+    assert set(products) == { "BaO", "Ba2TiO4" }
+    assert products.count("Ba2TiO4") / len(products) == pytest.approx(0.75, abs=0.05)
@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+
+from rxn_ca.phases import SolidPhaseSet
+from rxn_ca.reactions import ScoredReaction, ScoredReactionSet, ReactionLibrary, ScoreMatrixLibrary
+
+PHASES = ["BaO", "TiO2", "BaTiO3", "Ba2TiO4"]
+
+@pytest.fixture
+def library():
+    phases = SolidPhaseSet(
+        PHASES,
+        volumes={ p: 1.0 for p in PHASES },
+        densities={ p: 1.0 for p in PHASES },
+        melting_points={ p: 3000 for p in PHASES },
+        experimentally_observed={ p: True for p in PHASES },
+    )
+    lib = ReactionLibrary(phases)
+    lib.add_rxns_at_temp(ScoredReactionSet([
+        ScoredReaction({"BaO": 1, "TiO2": 1}, {"BaTiO3": 2}, 0.2, energy_per_atom=-0.1),
+    ], phases), 900)
+    lib.add_rxns_at_temp(ScoredReactionSet([
+        ScoredReaction({"BaO": 1, "TiO2": 1}, {"BaTiO3": 2}, 0.7, energy_per_atom=-0.2),
+        ScoredReaction({"BaTiO3": 1, "BaO": 1}, {"Ba2TiO4": 2}, 0.4),
+    ], phases), 1000)
+    return lib
+
+def test_reactions_are_stored_once(library):
+    matrix_lib = ScoreMatrixLibrary.from_library(library)
+
+    assert len(matrix_lib.reactions) == 2
+    assert matrix_lib.scores.shape == (2, 2)
+    assert np.isnan(matrix_lib.scores[1, 0])
+    assert matrix_lib.fingerprint() == library.fingerprint()
+
+    for temp in library.temps:
+        assert matrix_lib.get_rxns_at_temp(temp).rxn_to_id == library.get_rxns_at_temp(temp).rxn_to_id
+
+    # The views at each temperature share the stoichiometry of the reaction table
+    low = matrix_lib.get_rxns_at_temp(900).get_rxn_by_id(0)
+    high = matrix_lib.get_rxns_at_temp(1000).get_rxn_by_id(0)
+    assert low._reactants is high._reactants
+    assert (low.competitiveness, high.competitiveness) == (0.2, 0.7)
+
+def test_from_dict(library):
+    matrix_lib = ScoreMatrixLibrary.from_dict(library.as_dict())
+
+    assert isinstance(matrix_lib, ScoreMatrixLibrary)
+    assert matrix_lib.fingerprint() == library.fingerprint()
+    assert matrix_lib.as_dict() == library.as_dict()
+
+def test_filters_match_reaction_library(library):
+    matrix_lib = ScoreMatrixLibrary.from_library(library)
+
+    excluded = matrix_lib.exclude_phases(["Ba2TiO4"])
+    assert isinstance(excluded, ScoreMatrixLibrary)
+    assert excluded.fingerprint() == library.exclude_phases(["Ba2TiO4"]).fingerprint()
+
+    limited = ["BaO", "TiO2", "BaTiO3"]
+    assert matrix_lib.limit_phase_set(limited).fingerprint() == library.limit_phase_set(limited).fingerprint()
+    assert len(matrix_lib.get_lib_from_ids([1]).reactions) == 1
+
+def test_temperatures_with_different_reactions():
+    phases = SolidPhaseSet(
+        PHASES,
+        volumes={ p: 1.0 for p in PHASES },
+        densities={ p: 1.0 for p in PHASES },
+        melting_points={ p: 3000 for p in PHASES },
+        experimentally_observed={ p: True for p in PHASES },
+    )
+    rxns = [
+        ({"BaO": 1, "TiO2": 1}, {"BaTiO3": 2}),
+        ({"BaTiO3": 1, "BaO": 1}, {"Ba2TiO4": 2}),
+        ({"Ba2TiO4": 1, "TiO2": 1}, {"BaTiO3": 2}),
+        ({"BaO": 2, "TiO2": 1}, {"Ba2TiO4": 3}),
+        ({"BaTiO3": 2}, {"Ba2TiO4": 1, "TiO2": 1}),
+    ]
+
+    # Each temperature holds its own subset of the reactions, in its own order
+    rng = np.random.default_rng(0)
+    lib = ReactionLibrary(phases)
+    for temp in range(500, 1000, 100):
+        chosen = rng.permutation(len(rxns))[:rng.integers(1, len(rxns) + 1)]
+        lib.add_rxns_at_temp(ScoredReactionSet([
+            ScoredReaction(*rxns[idx], float(rng.random()), energy_per_atom=-float(rng.random()))
+            for idx in chosen.tolist()
+        ], phases), temp)
+
+    matrix_lib = ScoreMatrixLibrary.from_library(lib)
+    assert matrix_lib.fingerprint() == lib.fingerprint()
+    assert matrix_lib.as_dict() == lib.as_dict()
+    assert ScoreMatrixLibrary.from_dict(lib.as_dict()).as_dict() == lib.as_dict()
+
+    excluded = matrix_lib.exclude_phases(["Ba2TiO4"])
+    assert excluded.fingerprint() == lib.exclude_phases(["Ba2TiO4"]).fingerprint()
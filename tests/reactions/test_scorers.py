@@ -0,0 +1,126 @@
+import math
+
+import numpy as np
+import pytest
+
+from pymatgen.entries.computed_entries import ComputedEntry
+from rxn_network.reactions.computed import ComputedReaction
+from rxn_network.reactions.reaction_set import ReactionSet
+
+from rxn_ca.phases import SolidPhaseSet
+from rxn_ca.reactions.scorers import (
+    BasicScore,
+    TammanHuttigScoreErf,
+    TammanHuttigScoreExponential,
+    TammanHuttigScoreSoftplus,
+    TammanScore,
+    TammanTightLinear,
+    GibbsErfScore,
+    ConstantScore,
+    reactant_features,
+    score_rxns,
+)
+
+PHASES = ["BaO", "TiO2", "BaTiO3", "BaO2"]
+MELTING_POINTS = { "BaO": 2200, "TiO2": 2100, "BaTiO3": 1900, "BaO2": 720 }
+
+SCORERS = [
+    TammanHuttigScoreErf,
+    TammanHuttigScoreExponential,
+    TammanHuttigScoreSoftplus,
+    TammanScore,
+    TammanTightLinear,
+    GibbsErfScore,
+    ConstantScore,
+]
+
+@pytest.fixture
+def phase_set():
+    return SolidPhaseSet(
+        PHASES,
+        volumes={ p: 1.0 for p in PHASES + ["O2"] },
+        densities={ p: 1.0 for p in PHASES },
+        melting_points=MELTING_POINTS,
+        experimentally_observed={ p: True for p in PHASES },
+    )
+
+@pytest.fixture
+def rxns():
+    entries = { f: ComputedEntry(f, e, entry_id=f) for f, e in [("BaO", -10.0), ("TiO2", -20.0), ("BaTiO3", -30.1), ("O2", -9.0), ("BaO2", -19.1)] }
+    return [
+        ComputedReaction.balance([entries["BaO"], entries["TiO2"]], [entries["BaTiO3"]]),
+        ComputedReaction.balance([entries["BaO"], entries["O2"]], [entries["BaO2"]]),
+        ComputedReaction.balance([entries["BaO2"]], [entries["BaO"], entries["O2"]]),
+    ]
+
+def test_reactant_features(rxns, phase_set):
+    min_mps, gas_reactants, solid_reactants = reactant_features(rxns, phase_set)
+
+    assert min_mps.tolist() == [2100, 2200, 720]
+    assert gas_reactants.tolist() == [False, True, False]
+    assert solid_reactants.tolist() == [2, 1, 1]
+
+@pytest.mark.parametrize("scorer_class", SCORERS)
+def test_score_matrix_matches_single_scores(scorer_class, rxns, phase_set):
+    temps = np.array([600, 900, 1200])
+    delta_g = np.array([[rxn.energy_per_atom] * len(temps) for rxn in rxns])
+
+    scores = scorer_class.score_matrix(temps, *reactant_features(rxns, phase_set), delta_g)
+    assert scores.shape == (len(rxns), len(temps))
+
+    for col, temp in enumerate(temps.tolist()):
+        scorer = scorer_class(phase_set=phase_set, temp=temp)
+        assert scores[:, col].tolist() == pytest.approx([scorer.score(rxn) for rxn in rxns])
+
+def test_erf_score_values(rxns, phase_set):
+    # Matches the scalar formulas: Tamman for two solids, Huttig for a single solid
+    scorer = TammanHuttigScoreErf(phase_set=phase_set, temp=1000)
+
+    def erf_adjustment(delta_g):
+        return 0.5 * (1 + math.erf(-35 * (delta_g + 0.03)))
+
+    tamman = math.log(1 + math.exp(14 * (1000 / 2100 - 0.8))) * erf_adjustment(rxns[0].energy_per_atom)
+    huttig = 0.25 * math.log(1 + math.exp(30 * (1000 / 2200 - 0.33))) * erf_adjustment(rxns[1].energy_per_atom)
+
+    assert scorer.score(rxns[0]) == pytest.approx(tamman)
+    assert scorer.score(rxns[1]) == pytest.approx(huttig)
+
+def test_score_rxns(rxns, phase_set):
+    scorer = TammanHuttigScoreErf(phase_set=phase_set, temp=1000)
+    scored = score_rxns(ReactionSet.from_rxns(rxns), scorer, phase_set=phase_set)
+
+    assert len(scored) == len(rxns)
+    for scored_rxn in scored:
+        assert isinstance(scored_rxn.competitiveness, float)
+
+    by_reactants = { scored_rxn.reactants: scored_rxn.competitiveness for scored_rxn in scored }
+    assert by_reactants[frozenset(["BaO", "TiO2"])] == pytest.approx(scorer.score(rxns[0]))
+
+class ScoreOnly(BasicScore):
+    # A scorer written against the original interface, implementing only score
+
+    def score(self, rxn):
+        return self.temp / 1000 - rxn.energy_per_atom
+
+def test_scorer_implementing_only_score(rxns, phase_set):
+    scorer = ScoreOnly(phase_set=phase_set, temp=1000)
+    assert scorer.score(rxns[0]) == pytest.approx(1 - rxns[0].energy_per_atom)
+
+    features = reactant_features(rxns, phase_set)
+    delta_g = np.array([[rxn.energy_per_atom] for rxn in rxns])
+    scores = ScoreOnly.score_matrix(np.array([1000]), *features, delta_g, rxns=rxns, phase_set=phase_set)
+    assert scores[:, 0].tolist() == pytest.approx([scorer.score(rxn) for rxn in rxns])
+
+    with pytest.raises(ValueError):
+        ScoreOnly.score_matrix(np.array([1000]), *features, delta_g)
+
+    # The reactions only carry their energy at one temperature
+    with pytest.raises(ValueError, match="one temperature"):
+        ScoreOnly.score_matrix(np.array([500, 1000]), *features, delta_g.repeat(2, axis=1), rxns=rxns, phase_set=phase_set)
+
+    scored = score_rxns(ReactionSet.from_rxns(rxns), scorer, phase_set=phase_set)
+    assert sorted(r.competitiveness for r in scored) == pytest.approx(sorted(scorer.score(rxn) for rxn in rxns))
+
+def test_scorer_implementing_neither(rxns, phase_set):
+    with pytest.raises(NotImplementedError):
+        BasicScore(phase_set=phase_set, temp=1000).score(rxns[0])